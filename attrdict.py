@@ -1,6 +1,9 @@
 import collections
+import contextlib
 import functools
+import gc
 
+from path_query import compile_query
 from restricted_object import create_restricted_object_cls
 
 NO_VALUE = object()
@@ -167,6 +170,9 @@ class AttrDict(collections.MutableMapping):
     def __delitem__(self, key):
         del self._dict[key]
 
+    def __contains__(self, key):
+        return key in self._dict
+
     def __len__(self):
         return len(self._dict)
 
@@ -193,12 +199,31 @@ class AttrDict(collections.MutableMapping):
             if value is NO_VALUE:
                 raise AttributeError(attr)
 
+    # Limits of repr(), None means no limit. Nested mappings below
+    # _repr_max_depth levels, items after the first _repr_max_items of a
+    # mapping and everything after _repr_max_chars are shown as
+    # _repr_elided. Use full_repr() to see everything.
+    _repr_max_depth = 10
+    _repr_max_items = 100
+    _repr_max_chars = 10000
+    _repr_elided = '...'
+
     def __repr__(self, *args, **kwargs):
-        result = '{class_name}({representation})'.format(
-            class_name=self.__class__.__name__,
-            representation=repr(self._dict),
+        return _bounded_repr(
+            self,
+            self._repr_max_depth,
+            self._repr_max_items,
+            self._repr_max_chars,
+            self._repr_elided,
         )
-        return result
+
+    def full_repr(self):
+        "repr without limits"
+        return _bounded_repr(self, None, None, None, self._repr_elided)
+
+    def _repr_items(self):
+        "iterable of (key, value) shown by repr"
+        return self._dict.iteritems()
 
     def _get_mapping(self, path):
         """
@@ -230,16 +255,76 @@ class AttrDict(collections.MutableMapping):
         return mapping
 
     def _get_or_create_mapping(self, path):
-        try:
-            mapping = self._get_mapping(path)
-        except PathKeyError:
-            mapping = self
-            for path_element in path:
-                if path_element not in mapping:
-                    mapping[path_element] = {}
+        """
+        Get mapping at path `path`, create missing mappings on the way
+
+        If it meets not a mapping on its way, a PathTypeError is raised
+        """
+        self._check_path(path, allow_empty=True)
+        mapping = self
+        for i, path_element in enumerate(path):
+            if path_element in mapping:
                 mapping = mapping[path_element]
+                if not isinstance(mapping, collections.Mapping):
+                    raise PathTypeError(
+                        "expected mapping, got %s instead" % repr(type(mapping)),
+                        dict(
+                            path=path[:i],
+                            key=path_element,
+                            full_path=path
+                        )
+                    )
+            else:
+                mapping = mapping._new_child(path_element)
         return mapping
 
+    def _new_child(self, key):
+        """
+        Create an empty mapping of the same class at `key` and return it
+
+        The mapping is set through __setitem__ when a subclass overrides
+        it, the node is stored directly otherwise.
+        """
+        if type(self).__setitem__.im_func is not _attrdict_setitem:
+            self[key] = {}
+            return self[key]
+        child = self._dict[key] = self.__class__()
+        return child
+
+    def _new_like(self, data=()):
+        """
+        Create a new tree of the same class holding `data`, used by merge
+
+        Subclasses taking settings in their constructor should override it.
+        """
+        return self.__class__(data)
+
+    def _raw_get(self, key, default=None):
+        """
+        Return the raw value at `key` in _dict, or `default`
+
+        Used to save values before changing them, no conversion nor hook
+        is involved. Subclasses not storing values in _dict override it.
+        """
+        return self._dict.get(key, default)
+
+    def _after_transaction(self, paths):
+        """
+        Called on the root of a transaction once it's committed or rolled
+        back, with the paths of its operations
+        """
+
+    def _restore_raw(self, key, value):
+        """
+        Put back raw `value` taken from _dict at `key`, NO_VALUE removes `key`
+
+        Used to roll back changes, no conversion nor hook is involved.
+        """
+        if value is NO_VALUE:
+            self._dict.pop(key, None)
+        else:
+            self._dict[key] = value
+
     @classmethod
     def _check_path(self, path, allow_empty=False):
         if not allow_empty:
@@ -255,9 +340,48 @@ class AttrDict(collections.MutableMapping):
         for i, path_element in enumerate(path):
             hash(path_element)
 
-    # XXX: check_exist?
+    def _probe_path(self, path):
+        mapping = self
+        for i in xrange(len(path) - 1):
+            path_element = path[i]
+            if path_element not in mapping:
+                return NO_VALUE
+            mapping = mapping[path_element]
+            if not isinstance(mapping, collections.Mapping):
+                raise PathTypeError(
+                    "expected mapping, got %s instead" % repr(type(mapping)),
+                    dict(
+                        path=path[:i],
+                        key=path_element,
+                        full_path=path
+                    )
+                )
+        key = path[-1]
+        if key not in mapping:
+            return NO_VALUE
+        return mapping[key]
+
+    @path_wrapper
+    def probe_path(self, path):
+        """
+        Return value at path `path`, or NO_VALUE if any key on the way is missing
+
+        Nothing is raised nor created for a missing key, if it meets not a
+        mapping on its way, a PathTypeError is raised
+        """
+        return self._probe_path(path)
+
     @path_wrapper
-    def get_path(self, path, default=None):
+    def get_path(self, path, default=None, strict=True):
+        """
+        Return value at path `path`, or `default` if the last key is missing
+
+        A missing intermediate key raises PathKeyError, unless `strict`
+        is False, in which case `default` is returned too.
+        """
+        if not strict:
+            value = self._probe_path(path)
+            return default if value is NO_VALUE else value
         mapping = self._get_mapping(path[:-1])
         return mapping.get(path[-1], default)
 
@@ -298,7 +422,7 @@ class AttrDict(collections.MutableMapping):
 
     @path_wrapper
     def has_path(self, path):
-        return self.get_path(path, NO_VALUE) is not NO_VALUE
+        return self._probe_path(path) is not NO_VALUE
 
     def _real_get(self, *args, **kwargs):
         return super(AttrDict, self).get(*args, **kwargs)
@@ -323,16 +447,325 @@ class AttrDict(collections.MutableMapping):
         return merge(self, other)
 
     def _inplace_merge(self, other):
-        return inplace_merge(self, other)
+        return generic_merge(self, other, inplace_merge)
+
+    def transaction(self):
+        return Transaction(self)
+
+    @classmethod
+    def bulk_load(cls, data=(), tuple_leaves=False, **kwargs):
+        """
+        Create a tree like the constructor does, with the GC paused
+
+        See gc_paused. With `tuple_leaves`, leaves of `data` which are
+        lists are stored as tuples, which the GC stops tracking once it
+        finds they hold no containers, code changing them in place would
+        break. `kwargs` are passed to the constructor as they are.
+        """
+        with gc_paused():
+            if tuple_leaves:
+                data = _tuple_leaves(dict(data))
+            return cls(data, **kwargs)
+
+    @classmethod
+    def from_items(cls, items, sorted=False):
+        """
+        Build a tree from an iterable of (path, value), like set_path for each
+
+        Consecutive paths share the walk over their common prefix, keys
+        under a newly created mapping aren't looked up. With `sorted`, the
+        paths must come in ascending order (a ValueError is raised when
+        they don't), then the first key past the common prefix isn't
+        looked up either when it's known to be new.
+        """
+        root = cls()
+        # cursor[i] is the mapping at previous[:i]
+        cursor = [root]
+        previous = ()
+        for path, value in items:
+            if not isinstance(path, (tuple, list)) or not path:
+                cls._check_path(path)
+            path = tuple(path)
+            if sorted and path < previous:
+                raise ValueError("paths aren't sorted", previous, path)
+            branch = path[:-1]
+            common = 0
+            limit = min(len(cursor) - 1, len(branch))
+            while common < limit and previous[common] == branch[common]:
+                common += 1
+            del cursor[common + 1:]
+            mapping = cursor[-1]
+            # In ascending order, a key which differs from `previous` at
+            # the same position is greater than all keys of its mapping
+            is_new = sorted and common < len(previous) - 1
+            for i in xrange(common, len(branch)):
+                path_element = branch[i]
+                if not is_new and path_element in mapping:
+                    mapping = mapping[path_element]
+                    if not isinstance(mapping, collections.Mapping):
+                        raise PathTypeError(
+                            "expected mapping, got %s instead" % repr(type(mapping)),
+                            dict(
+                                path=path[:i],
+                                key=path_element,
+                                full_path=path
+                            )
+                        )
+                else:
+                    mapping = mapping._new_child(path_element)
+                    is_new = True
+                cursor.append(mapping)
+            mapping[path[-1]] = value
+            previous = path
+        return root
+
+    def query(self, pattern):
+        """Yield (path, value) for paths matching `pattern`
+
+        See path_query for the pattern syntax.
+        """
+        return compile_query(pattern).find(self)
+
+
+def _iter_repr(root, max_depth, max_items, elided):
+    """Yield repr of AttrDict `root` in pieces
+
+    Nested AttrDicts are expanded with an explicit stack, so nothing
+    is formatted past the point where the consumer stops.
+    """
+    yield root.__class__.__name__ + '({'
+    # [items iterator, number of items shown, depth]
+    stack = [[iter(root._repr_items()), 0, 1]]
+    while stack:
+        frame = stack[-1]
+        item = next(frame[0], NO_VALUE)
+        if item is NO_VALUE:
+            stack.pop()
+            yield '})'
+            continue
+        if frame[1]:
+            yield ', '
+        if max_items is not None and frame[1] >= max_items:
+            stack.pop()
+            yield elided + '})'
+            continue
+        frame[1] += 1
+        key, value = item
+        yield repr(key) + ': '
+        if not isinstance(value, AttrDict):
+            yield repr(value)
+        elif max_depth is not None and frame[2] >= max_depth:
+            yield '%s({%s})' % (value.__class__.__name__,
+                                elided if value else '')
+        else:
+            yield value.__class__.__name__ + '({'
+            stack.append([iter(value._repr_items()), 0, frame[2] + 1])
+
+
+def _bounded_repr(root, max_depth, max_items, max_chars, elided):
+    pieces = []
+    length = 0
+    for piece in _iter_repr(root, max_depth, max_items, elided):
+        pieces.append(piece)
+        length += len(piece)
+        if max_chars is not None and length > max_chars:
+            return ''.join(pieces)[:max_chars] + elided
+    return ''.join(pieces)
+
+
+class AutoAttrDict(AttrDict):
+    """AttrDict which creates missing mappings on attribute access
+
+        d = AutoAttrDict()
+        d.a.b.c = 1
+
+    Only attributes autovivify, items behave as usual. Reading a missing
+    attribute creates an empty mapping as well, so does hasattr().
+    """
+    def __getattr__(self, attr):
+        if attr in self:
+            return self[attr]
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return self._new_child(attr)
+
+
+class Transaction(object):
+    """Batch of path operations applied to an AttrDict at once.
+
+    Paths are checked when operations are added, the tree isn't touched
+    until `commit()`, which is called on exit from the `with` block.
+    Consecutive operations share the traversal of their common prefix.
+    If any operation fails, the ones already applied are rolled back,
+    so the tree is either fully updated or left as it was.
+
+        with d.transaction() as tx:
+            tx.set(('a', 'b'), 1)
+            tx.pop(('a', 'c'))
+    """
+    def __init__(self, root):
+        self._root = root
+        self._operations = []
+        self.results = None
+
+    def _add(self, action, path, value):
+        self._root._check_path(path)
+        self._operations.append((action, tuple(path), value))
+
+    def set(self, path, value):
+        self._add('set', path, value)
+
+    def setdefault(self, path, value=None):
+        self._add('setdefault', path, value)
+
+    def pop(self, path, default=NO_VALUE):
+        self._add('pop', path, default)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+
+    def commit(self):
+        """Apply all operations, return the list of their results"""
+        operations, self._operations = self._operations, []
+        results = []
+        # (mapping, key, previous raw value) for every change made
+        undo = []
+        # cursor[i] is the mapping at prefix[:i]
+        cursor = [self._root]
+        prefix = ()
+        try:
+            for action, path, value in operations:
+                branch, key = path[:-1], path[-1]
+                common = 0
+                limit = min(len(prefix), len(branch))
+                while common < limit and prefix[common] == branch[common]:
+                    common += 1
+                del cursor[common + 1:]
+                mapping = self._walk(cursor, action, path, value, undo)
+                prefix = branch[:len(cursor) - 1]
+                if mapping is NO_VALUE:
+                    # pop with default, and the branch doesn't exist
+                    results.append(value)
+                    continue
+                previous = mapping._raw_get(key, NO_VALUE)
+                if action == 'set':
+                    mapping[key] = value
+                    result = None
+                elif action == 'setdefault':
+                    result = mapping._real_setdefault(key, value)
+                elif previous is not NO_VALUE:
+                    result = mapping._real_pop(key)
+                elif value is NO_VALUE:
+                    raise PathKeyError(key, dict(path=branch, full_path=path))
+                else:
+                    result = value
+                if previous is not mapping._raw_get(key, NO_VALUE):
+                    undo.append((mapping, key, previous))
+                results.append(result)
+        except:
+            for mapping, key, previous in reversed(undo):
+                mapping._restore_raw(key, previous)
+            raise
+        finally:
+            self._root._after_transaction(
+                [path for _, path, _ in operations])
+        self.results = results
+        return results
+
+    @staticmethod
+    def _walk(cursor, action, path, default, undo):
+        """Extend `cursor` up to the branch of `path`, return its mapping
+
+        Missing mappings are created unless we're popping, in which case
+        NO_VALUE is returned for a pop with default.
+        """
+        mapping = cursor[-1]
+        for i in xrange(len(cursor) - 1, len(path) - 1):
+            path_element = path[i]
+            if path_element in mapping:
+                mapping = mapping[path_element]
+                if not isinstance(mapping, collections.Mapping):
+                    raise PathTypeError(
+                        "expected mapping, got %s instead" % repr(type(mapping)),
+                        dict(
+                            path=path[:i],
+                            key=path_element,
+                            full_path=path
+                        )
+                    )
+            elif action == 'pop':
+                if default is NO_VALUE:
+                    raise PathKeyError(
+                        path_element,
+                        dict(
+                            path=path[:i],
+                            full_path=path,
+                        )
+                    )
+                return NO_VALUE
+            else:
+                undo.append((mapping, path_element, NO_VALUE))
+                mapping = mapping._new_child(path_element)
+            cursor.append(mapping)
+        return mapping
+
+
+def _tuple_leaves(value):
+    "copy of `value` with lists converted to tuples, in nested mappings too"
+    # Exact type checks first, isinstance with ABCs is slow
+    value_type = type(value)
+    if value_type is list:
+        return tuple(map(_tuple_leaves, value))
+    if value_type is dict or (
+            value_type not in _SCALAR_TYPES and isinstance(value, collections.Mapping)):
+        return dict(zip(value.iterkeys(), map(_tuple_leaves, value.itervalues())))
+    return value
+
+
+_SCALAR_TYPES = frozenset([int, long, float, bool, str, unicode, type(None)])
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """
+    Disable the cyclic GC in the block, for building or merging big trees
+
+    A tree is made of many long-lived containers, collections triggered
+    while it's being built only rescan it.
+
+        with gc_paused():
+            config = merge(defaults, overrides)
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+_attrdict_setitem = AttrDict.__setitem__.im_func
 
 
 def merge(left, right):
     "return a new dictionary which is a recursively merged left and right"
-    return generic_merge(type(left)(left), right, merge)
+    if isinstance(left, AttrDict):
+        result = left._new_like(left)
+    else:
+        result = type(left)(left)
+    return generic_merge(result, right, merge)
 
 
 def inplace_merge(left, right):
     "inplace recursive merge two dictionaties"
+    if isinstance(left, AttrDict):
+        # Subclasses may wrap the merge, in a transaction for instance
+        return left._inplace_merge(right)
     return generic_merge(left, right, inplace_merge)
 
 
@@ -385,6 +818,57 @@ class DictDescriptor(object):
         dct._raw_delitem(key)
 
 
+class ComputedField(DictDescriptor):
+    """Read-only value computed by `func(dct)` and cached per instance.
+
+    The cached value is dropped when one of the keys or paths in
+    `depends_on` is written through the TypedAttrDict holding the field,
+    or through its path methods. Writing into a nested mapping directly
+    (`dct.db.host = ...`) isn't seen, use `dct.set_path` for that.
+    Deleting the field drops the cached value.
+
+        class Config(TypedAttrDict):
+            url = ComputedField(make_url, depends_on=['db'])
+    """
+    def __init__(self, func, depends_on=()):
+        self.func = func
+        dependencies = []
+        for dependency in depends_on:
+            if not isinstance(dependency, (tuple, list)):
+                dependency = (dependency,)
+            AttrDict._check_path(dependency)
+            dependencies.append(tuple(dependency))
+        self.depends_on = tuple(dependencies)
+
+    def __dictget__(self, dct, key):
+        cache = dct._computed_cache
+        if key not in cache:
+            cache[key] = self.func(dct)
+        return cache[key]
+
+    def __dictset__(self, dct, key, value):
+        raise TypeError("computed field is read-only", key)
+
+    def __dictdel__(self, dct, key):
+        dct._computed_cache.pop(key, None)
+
+
+def _computed_fields(cls):
+    "return ((key, dependencies), ...) for the computed fields of `cls`"
+    fields = cls.__dict__.get('_computed_fields_cache')
+    if fields is None:
+        attributes = {}
+        for klass in reversed(cls.__mro__):
+            attributes.update(vars(klass))
+        fields = tuple(
+            (key, value.depends_on)
+            for key, value in attributes.iteritems()
+            if isinstance(value, ComputedField)
+        )
+        cls._computed_fields_cache = fields
+    return fields
+
+
 def get_descriptor(obj, key):
     return getattr(type(obj), key,  NO_VALUE)
 
@@ -424,6 +908,9 @@ class TypedAttrDict(AttrDict):
     def __getitem__(self, key):
         return self._action_func(GET, key)
 
+    # Keys handled by descriptors may have no value in _dict
+    __contains__ = collections.Mapping.__contains__.im_func
+
     def __setitem__(self, key, value):
         self._action_func(SET, key, value)
 
@@ -434,7 +921,60 @@ class TypedAttrDict(AttrDict):
         return super(TypedAttrDict, self).__getitem__(key)
 
     def _raw_setitem(self, key, value):
+        self._invalidate_computed((key,))
         return super(TypedAttrDict, self).__setitem__(key, value)
 
     def _raw_delitem(self, key):
+        self._invalidate_computed((key,))
         return super(TypedAttrDict, self).__delitem__(key)
+
+    # Computed fields
+
+    @property
+    def _computed_cache(self):
+        "computed field key -> cached value"
+        try:
+            return self.__dict__['_computed_values']
+        except KeyError:
+            cache = self.__dict__['_computed_values'] = {}
+            return cache
+
+    def _peek_computed_cache(self):
+        "the computed values cache, or None if nothing was computed yet"
+        return self.__dict__.get('_computed_values')
+
+    def _invalidate_computed(self, path):
+        """
+        Drop cached computed values depending on anything at or under `path`
+
+        Called by the _raw_*item methods, where stored values change.
+        """
+        if not _computed_fields(type(self)):
+            return
+        cache = self._peek_computed_cache()
+        if not cache:
+            return
+        for key, dependencies in _computed_fields(type(self)):
+            if key in cache and any(
+                    dependency[:len(path)] == path or
+                    path[:len(dependency)] == dependency
+                    for dependency in dependencies):
+                del cache[key]
+
+    def _after_transaction(self, paths):
+        for path in paths:
+            self._invalidate_computed(path)
+
+    def set_path(self, path, value):
+        super(TypedAttrDict, self).set_path(path, value)
+        self._invalidate_computed(tuple(path))
+
+    def setdefault_path(self, path, value=None):
+        result = super(TypedAttrDict, self).setdefault_path(path, value)
+        self._invalidate_computed(tuple(path))
+        return result
+
+    def pop_path(self, path, default=NO_VALUE):
+        result = super(TypedAttrDict, self).pop_path(path, default)
+        self._invalidate_computed(tuple(path))
+        return result
@@ -0,0 +1,250 @@
+"""Column-wise storage for many records of the same shape.
+
+    table = AttrDictTable.from_records(records)
+    table[0].db.port
+    table.column(('db', 'port'))
+
+Every leaf path gets its own column, a list or an `array.array` when a
+typecode is given for it, so a record costs a slot per leaf instead of a
+few objects and hash tables per node. Rows are lightweight views into
+the columns.
+"""
+import array
+import collections
+
+from attrdict import AttrDict, NO_VALUE, PathKeyError, PathTypeError
+
+
+def _leaf_items(record):
+    "yield (path, value) for every leaf of `record`, empty mappings included"
+    stack = [((), record)]
+    while stack:
+        prefix, mapping = stack.pop()
+        for key, value in mapping.iteritems():
+            path = prefix + (key,)
+            if isinstance(value, collections.Mapping) and value:
+                stack.append((path, value))
+            else:
+                yield path, value
+
+
+class AttrDictTable(object):
+    def __init__(self, leaf_paths, typecodes=None):
+        """Create an empty table with a column for each of `leaf_paths`
+
+        `typecodes` maps some of the paths to array module typecodes.
+        """
+        typecodes = typecodes or {}
+        self._columns = collections.OrderedDict()
+        # Branch path -> keys under it, for row views
+        self._branches = collections.OrderedDict([((), [])])
+        for path in leaf_paths:
+            AttrDict._check_path(path)
+            path = tuple(path)
+            if path in self._columns or path in self._branches:
+                raise ValueError("duplicate path", path)
+            if path in typecodes:
+                self._columns[path] = array.array(typecodes[path])
+            else:
+                self._columns[path] = []
+            for i in xrange(len(path)):
+                branch = path[:i]
+                if branch in self._columns:
+                    raise ValueError("path is both a leaf and a branch", branch)
+                keys = self._branches.setdefault(branch, [])
+                if path[i] not in keys:
+                    keys.append(path[i])
+        self._length = 0
+
+    @classmethod
+    def from_records(cls, records, typecodes=None):
+        """Create a table from records, shaped like the first of them"""
+        records = iter(records)
+        first = next(records, NO_VALUE)
+        if first is NO_VALUE:
+            raise ValueError("can't guess the shape without records")
+        paths = sorted(path for path, _ in _leaf_items(first))
+        table = cls(paths, typecodes)
+        table.append(first)
+        table.extend(records)
+        return table
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return Row(self, index)
+
+    def __iter__(self):
+        for index in xrange(self._length):
+            yield Row(self, index)
+
+    @property
+    def paths(self):
+        return self._columns.keys()
+
+    def column(self, path):
+        "return the column of leaf `path`, changing it changes the rows"
+        return self._columns[tuple(path)]
+
+    def append(self, record):
+        self.extend([record])
+
+    def extend(self, records):
+        """Append records, all of them must have exactly the table paths
+
+        Nothing is appended if one of the records has a different shape,
+        or a value which doesn't fit the typecode of its column.
+        """
+        columns = self._columns
+        rows = collections.defaultdict(list)
+        count = 0
+        for record in records:
+            leaves = 0
+            for path, value in _leaf_items(record):
+                if path not in columns:
+                    raise ValueError("unknown path", path)
+                rows[path].append(value)
+                leaves += 1
+            if leaves != len(columns):
+                missing = [path for path in columns
+                           if len(rows[path]) != count + 1]
+                raise ValueError("record is missing paths", missing)
+            count += 1
+        # Arrays check their values on conversion, every chunk is built
+        # before any column changes
+        chunks = []
+        for path, values in rows.iteritems():
+            column = columns[path]
+            if isinstance(column, array.array):
+                values = array.array(column.typecode, values)
+            chunks.append((column, values))
+        for column, values in chunks:
+            column.extend(values)
+        self._length += count
+
+    def to_records(self, factory=AttrDict):
+        return [row.to_attrdict(factory) for row in self]
+
+    def __repr__(self):
+        return '{class_name}({paths!r}, length={length})'.format(
+            class_name=self.__class__.__name__,
+            paths=self.paths,
+            length=self._length,
+        )
+
+
+class Row(collections.MutableMapping):
+    """View of a single record (or a branch of it) in an AttrDictTable
+
+    Leaf values can be changed, but the shape of the record can't.
+    """
+    def __init__(self, table, index, prefix=()):
+        self._table = table
+        self._index = index
+        self._prefix = prefix
+
+    def _lookup(self, path, default=NO_VALUE):
+        table = self._table
+        column = table._columns.get(path)
+        if column is not None:
+            return column[self._index]
+        if path in table._branches:
+            return Row(table, self._index, path)
+        return default
+
+    def __getitem__(self, key):
+        value = self._lookup(self._prefix + (key,))
+        if value is NO_VALUE:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        path = self._prefix + (key,)
+        try:
+            column = self._table._columns[path]
+        except KeyError:
+            raise KeyError(key)
+        column[self._index] = value
+
+    def __delitem__(self, key):
+        raise TypeError("can't delete keys from a table row", key)
+
+    def __iter__(self):
+        return iter(self._table._branches[self._prefix])
+
+    def __len__(self):
+        return len(self._table._branches[self._prefix])
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        value = self._lookup(self._prefix + (attr,))
+        if value is NO_VALUE:
+            raise AttributeError(attr)
+        return value
+
+    def __setattr__(self, attr, value):
+        if attr.startswith('_'):
+            super(Row, self).__setattr__(attr, value)
+        else:
+            self[attr] = value
+
+    def __delattr__(self, attr):
+        if attr.startswith('_'):
+            super(Row, self).__delattr__(attr)
+        else:
+            del self[attr]
+
+    def get_path(self, path, default=None, strict=True):
+        """Like AttrDict.get_path
+
+        A missing last key gives `default`, a missing mapping on the way
+        raises PathKeyError unless `strict` is False, and a leaf on the
+        way raises PathTypeError.
+        """
+        AttrDict._check_path(path)
+        path = tuple(path)
+        value = self._lookup(self._prefix + path)
+        if value is not NO_VALUE:
+            return value
+        table = self._table
+        for i in xrange(len(path) - 1):
+            branch = self._prefix + path[:i + 1]
+            if branch in table._columns:
+                raise PathTypeError(
+                    "expected mapping, got %s instead" % repr(
+                        type(self._lookup(branch))),
+                    dict(path=path[:i], key=path[i], full_path=path))
+            if branch not in table._branches:
+                if not strict:
+                    return default
+                raise PathKeyError(
+                    path[i], dict(path=path[:i], full_path=path))
+        return default
+
+    def set_path(self, path, value):
+        AttrDict._check_path(path)
+        path = tuple(path)
+        try:
+            column = self._table._columns[self._prefix + path]
+        except KeyError:
+            raise PathKeyError(path[-1], dict(path=path[:-1], full_path=path))
+        column[self._index] = value
+
+    def to_attrdict(self, factory=AttrDict):
+        result = factory()
+        for path in self._table._columns:
+            if path[:len(self._prefix)] == self._prefix:
+                result.set_path(path[len(self._prefix):], self._lookup(path))
+        return result
+
+    def __repr__(self):
+        return '{class_name}({representation!r})'.format(
+            class_name=self.__class__.__name__,
+            representation=dict(self.iteritems()),
+        )
@@ -0,0 +1,1126 @@
+"""Micro benchmarks for attrdict.
+
+Run `python benchmarks.py`, every benchmark reports a single number where
+lower is better (seconds per call unless stated otherwise). Use `--save`
+to store the results as a JSON baseline and `--compare` to check the
+current run against it, the exit status is 1 if anything got slower than
+`--threshold` allows.
+"""
+import argparse
+import collections
+import fnmatch
+import gc
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+from attrdict import (
+    AttrDict, AutoAttrDict, TypedAttrDict, DictDescriptor, ComputedField,
+    NO_VALUE, PathKeyError, merge, inplace_merge
+)
+import instrumentation
+import path_tracer
+import restricted_object
+from attrdict_table import AttrDictTable
+from cache_attrdict import CacheAttrDict
+from file_config import FileConfigLoader
+from indexed_collection import IndexedCollection
+from interned_attrdict import InternedAttrDict
+from memory_report import deep_sizeof, memory_report
+from path_columns import collect_path, collect_paths
+from observable_attrdict import ObservableAttrDict
+from shared_keys_attrdict import SharedKeysAttrDict
+from slotted_record import record_class
+from snapshot_attrdict import SnapshotAttrDict
+from sorted_attrdict import SortedAttrDict
+from sqlite_attrdict import SqliteAttrDict
+
+BENCHMARKS = collections.OrderedDict()
+
+# Multiplier for the number of calls, set by --quick
+SCALE = 1.0
+
+DEFAULT_THRESHOLD = 0.2
+
+# Number of nodes for memory benchmarks of big trees, scaled by SCALE
+MEMORY_NODES = 10 ** 6
+
+
+def benchmark(name, unit='s'):
+    "register the decorated function as a benchmark called `name`"
+    def decorator(func):
+        BENCHMARKS[name] = (func, unit)
+        return func
+    return decorator
+
+
+def _time(func, number, repeat=3):
+    "best time of a single `func()` call in seconds"
+    number = max(1, int(number * SCALE))
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def _config(width=10, depth=3):
+    if not depth:
+        return 0
+    return dict(('k%d' % i, _config(width, depth - 1)) for i in range(width))
+
+
+def _path(depth):
+    return tuple('k%d' % (i % 10) for i in range(depth))
+
+
+def _deep(depth):
+    "AttrDict with a single leaf at _path(depth)"
+    d = AttrDict()
+    d.set_path(_path(depth), 1)
+    return d
+
+
+# Construction
+
+def _register_construction(name, source, number):
+    @benchmark('construct.%s' % name)
+    def construct():
+        return _time(lambda: AttrDict(source), number)
+
+_register_construction(
+    'flat_100', dict(('k%d' % i, i) for i in range(100)), 2000)
+_register_construction('tree_10x10x10', _config(), 50)
+_register_construction('chain_10', _deep(10), 5000)
+_register_construction(
+    'mixed', dict(ints=range(100), nested=_config(5, 2), s='x' * 100), 2000)
+
+
+# Item and attribute access
+
+@benchmark('access.getattr')
+def access_getattr():
+    d = AttrDict(key=1)
+    return _time(lambda: d.key, 200000)
+
+
+@benchmark('access.getitem')
+def access_getitem():
+    d = AttrDict(key=1)
+    return _time(lambda: d['key'], 200000)
+
+
+@benchmark('access.getattr_missing')
+def access_getattr_missing():
+    d = AttrDict(key=1)
+    return _time(lambda: getattr(d, 'unknown', None), 100000)
+
+
+@benchmark('access.setattr')
+def access_setattr():
+    d = AttrDict()
+
+    def setattr_():
+        d.key = 1
+    return _time(setattr_, 200000)
+
+
+# Path methods
+
+def _register_path_benchmarks(depth):
+    path = _path(depth)
+
+    @benchmark('get_path.depth_%d' % depth)
+    def get_path():
+        d = _deep(depth)
+        return _time(lambda: d.get_path(path), 50000)
+
+    @benchmark('set_path.depth_%d' % depth)
+    def set_path():
+        d = _deep(depth)
+        return _time(lambda: d.set_path(path, 2), 50000)
+
+    @benchmark('set_path_new_branch.depth_%d' % depth)
+    def set_path_new_branch():
+        return _time(lambda: AttrDict().set_path(path, 2), 20000)
+
+    @benchmark('pop_path.depth_%d' % depth)
+    def pop_path():
+        d = _deep(depth)
+
+        def set_and_pop():
+            d.set_path(path, 1)
+            d.pop_path(path)
+        return _time(set_and_pop, 20000)
+
+    @benchmark('has_path_miss.depth_%d' % depth)
+    def has_path_miss():
+        d = _deep(depth)
+        missing = path[:-1] + ('unknown',)
+        return _time(lambda: d.has_path(missing), 50000)
+
+    @benchmark('probe_path_miss.depth_%d' % depth)
+    def probe_path_miss():
+        """Missing first key, compare to get_path_not_strict_miss"""
+        d = _deep(depth)
+        missing = ('unknown',) + path[1:]
+        return _time(lambda: d.probe_path(missing), 50000)
+
+    @benchmark('get_path_not_strict_miss.depth_%d' % depth)
+    def get_path_not_strict_miss():
+        d = _deep(depth)
+        missing = ('unknown',) + path[1:]
+        return _time(lambda: d.get_path(missing, strict=False), 50000)
+
+for _depth in (1, 2, 3, 5, 10):
+    _register_path_benchmarks(_depth)
+del _depth
+
+
+def _flag_paths(miss_percent, count=100):
+    "paths of depth 3, `miss_percent` of them missing an intermediate key"
+    misses = count * miss_percent // 100
+    return ([('flags', 'unknown', 'f%d' % i) for i in range(misses)] +
+            [('flags', 'group', 'f%d' % i) for i in range(count - misses)])
+
+
+def _register_probe_benchmarks(miss_percent):
+    @benchmark('has_path.%d_percent_miss' % miss_percent)
+    def has_path_mixed():
+        """100 flag probes, compare to the strict get_path variant"""
+        d = AttrDict(flags=dict(group=dict(('f%d' % i, True) for i in range(100))))
+        paths = _flag_paths(miss_percent)
+        return _time(lambda: [d.has_path(path) for path in paths], 500)
+
+    @benchmark('get_path_strict_catching.%d_percent_miss' % miss_percent)
+    def get_path_strict_mixed():
+        d = AttrDict(flags=dict(group=dict(('f%d' % i, True) for i in range(100))))
+        paths = _flag_paths(miss_percent)
+
+        def probe(path):
+            try:
+                return d.get_path(path, NO_VALUE) is not NO_VALUE
+            except PathKeyError:
+                return False
+        return _time(lambda: [probe(path) for path in paths], 500)
+
+for _miss_percent in (0, 10, 50, 90, 100):
+    _register_probe_benchmarks(_miss_percent)
+del _miss_percent
+
+
+def _flat_items():
+    "(path, value) rows of a 10x10x10x10 tree in sorted order"
+    return sorted(
+        ((('k%d' % a, 'k%d' % b, 'k%d' % c, 'k%d' % d), 0)
+         for a in range(10) for b in range(10)
+         for c in range(10) for d in range(10)))
+
+
+@benchmark('from_items.sorted_10000')
+def from_items_sorted():
+    """Compare to from_items.set_path_loop_10000"""
+    items = _flat_items()
+    return _time(lambda: AttrDict.from_items(items, sorted=True), 10)
+
+
+@benchmark('from_items.unsorted_10000')
+def from_items_unsorted():
+    items = _flat_items()
+    random.Random(0).shuffle(items)
+    return _time(lambda: AttrDict.from_items(items), 10)
+
+
+@benchmark('from_items.set_path_loop_10000')
+def from_items_set_path_loop():
+    items = _flat_items()
+
+    def build():
+        d = AttrDict()
+        for path, value in items:
+            d.set_path(path, value)
+    return _time(build, 10)
+
+
+@benchmark('autovivify.setattr_depth_3')
+def autovivify_setattr():
+    """Compare to set_path_new_branch.depth_3"""
+    def setattr_():
+        AutoAttrDict().k0.k1.k2 = 2
+    return _time(setattr_, 20000)
+
+
+@benchmark('magic.get')
+def magic_get():
+    d = _deep(3)
+    return _time(lambda: d.get.k0.k1.k2(), 50000)
+
+
+@benchmark('magic.set')
+def magic_set():
+    d = _deep(3)
+
+    def set_():
+        d.set.k0.k1.k2 = 2
+    return _time(set_, 50000)
+
+
+# Merges
+
+@benchmark('merge.tree_10x10x10')
+def merge_tree():
+    left = AttrDict(_config())
+    right = AttrDict(_config())
+    return _time(lambda: merge(left, right), 20)
+
+
+@benchmark('inplace_merge.tree_10x10x10')
+def inplace_merge_tree():
+    left = AttrDict(_config())
+    right = AttrDict(_config())
+    return _time(lambda: inplace_merge(left, right), 20)
+
+
+# repr
+
+@benchmark('repr.tree_10x10x10x10')
+def repr_tree():
+    """Bounded repr, compare to repr.full_tree_10x10x10x10"""
+    d = AttrDict(_config(depth=4))
+    return _time(lambda: repr(d), 100)
+
+
+@benchmark('repr.full_tree_10x10x10x10')
+def repr_full_tree():
+    d = AttrDict(_config(depth=4))
+    return _time(d.full_repr, 10)
+
+
+# TypedAttrDict
+
+class _Upper(DictDescriptor):
+    def __dictget__(self, dct, key):
+        return super(_Upper, self).__dictget__(dct, key).upper()
+
+
+class _Typed(TypedAttrDict):
+    plain = DictDescriptor()
+    upper = _Upper()
+    computed = ComputedField(lambda dct: dct.upper * 2, depends_on=['upper'])
+
+
+@benchmark('typed.getattr')
+def typed_getattr():
+    d = _Typed(plain=1)
+    return _time(lambda: d.plain, 100000)
+
+
+@benchmark('typed.getattr_hook')
+def typed_getattr_hook():
+    d = _Typed(upper='value')
+    return _time(lambda: d.upper, 100000)
+
+
+@benchmark('typed.getattr_computed')
+def typed_getattr_computed():
+    """Cached value, compare to typed.getattr_hook"""
+    d = _Typed(upper='value')
+    return _time(lambda: d.computed, 100000)
+
+
+@benchmark('typed.setattr')
+def typed_setattr():
+    d = _Typed()
+
+    def setattr_():
+        d.plain = 1
+    return _time(setattr_, 100000)
+
+
+# Slotted records
+
+class _Server(TypedAttrDict):
+    host = port = user = db = name = DictDescriptor()
+
+
+_ServerRecord = record_class(_Server)
+
+
+def _servers(cls, count=10000):
+    return [cls(host='h%d' % i, port=i, user='u', db=dict(name='n'))
+            for i in range(count)]
+
+
+@benchmark('record.memory_per_record', unit='bytes')
+def record_memory_per_record():
+    """Compare to record.typed_memory_per_record"""
+    servers = _servers(_ServerRecord)
+    return float(deep_sizeof(servers)) / len(servers)
+
+
+@benchmark('record.typed_memory_per_record', unit='bytes')
+def record_typed_memory_per_record():
+    servers = _servers(_Server)
+    return float(deep_sizeof(servers)) / len(servers)
+
+
+def _register_record_benchmarks(name, cls):
+    @benchmark('record.%s_getattr' % name)
+    def getattr_():
+        d = cls(host='h')
+        return _time(lambda: d.host, 100000)
+
+    @benchmark('record.%s_getitem' % name)
+    def getitem():
+        d = cls(host='h')
+        return _time(lambda: d['host'], 100000)
+
+    @benchmark('record.%s_get_path_depth_2' % name)
+    def get_path():
+        d = cls(db=dict(name='n'))
+        return _time(lambda: d.get_path(('db', 'name')), 100000)
+
+    @benchmark('record.%s_setattr' % name)
+    def setattr_():
+        d = cls()
+
+        def set_():
+            d.port = 1
+        return _time(set_, 100000)
+
+for _name, _cls in [('slotted', _ServerRecord), ('typed', _Server)]:
+    _register_record_benchmarks(_name, _cls)
+del _name, _cls
+
+
+# Memory
+
+@benchmark('memory.per_node', unit='bytes')
+def memory_per_node():
+    d = AttrDict(_config())
+    nodes = 1 + 10 + 100
+    return float(deep_sizeof(d)) / nodes
+
+
+# Snapshots, transactions and subscriptions
+
+@benchmark('snapshot.read')
+def snapshot_read():
+    holder = SnapshotAttrDict(_config())
+    return _time(lambda: holder.snapshot().k1.k2.k3, 100000)
+
+
+@benchmark('snapshot.read_with_busy_writer')
+def snapshot_read_with_busy_writer():
+    """Should be about the same as snapshot.read"""
+    holder = SnapshotAttrDict(_config())
+    stop = threading.Event()
+
+    def write():
+        i = 0
+        while not stop.is_set():
+            holder.set_path(('k5', 'k5', 'k5'), i)
+            i += 1
+            # Much more often than a config reloader would do it
+            time.sleep(0.01)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        return _time(lambda: holder.snapshot().k1.k2.k3, 100000)
+    finally:
+        stop.set()
+        writer.join()
+
+
+_SIBLING_PATHS = [('a', 'b', 'c', 'k%d' % i) for i in range(1000)]
+
+
+@benchmark('transaction.set_path_1000')
+def transaction_set_path():
+    """1000 sibling writes with plain set_path, compare to transaction.set"""
+    def set_path():
+        d = AttrDict()
+        for path in _SIBLING_PATHS:
+            d.set_path(path, 1)
+    return _time(set_path, 100)
+
+
+@benchmark('transaction.set_1000')
+def transaction_set():
+    def transaction():
+        d = AttrDict()
+        with d.transaction() as tx:
+            for path in _SIBLING_PATHS:
+                tx.set(path, 1)
+    return _time(transaction, 100)
+
+
+def _observable_write(subscriptions):
+    d = ObservableAttrDict(_config())
+    for i in range(subscriptions):
+        d.subscribe(('k%d' % (i % 10), 'k%d' % (i // 10 % 10), i),
+                    lambda event: None)
+    d.subscribe(('k1', 'k2', 'k3'), lambda event: None)
+    node = d.k1.k2
+
+    def write():
+        node['k3'] = 1
+    return _time(write, 20000)
+
+
+@benchmark('observable.notify')
+def observable_notify():
+    return _observable_write(0)
+
+
+@benchmark('observable.notify_20000_subscriptions')
+def observable_notify_crowded():
+    """Should be about the same as observable.notify"""
+    return _observable_write(20000)
+
+
+# Queries
+
+def _services(count=200):
+    return AttrDict(services=dict(
+        ('s%d' % i, dict(db=dict(port=i, host='h'), env=_config(5, 2)))
+        for i in range(count)
+    ))
+
+
+def _naive_scan(mapping, pattern, path=()):
+    "recursive scan of the whole tree, checking every path"
+    if len(path) == len(pattern) and all(
+            segment == '*' or segment == key
+            for segment, key in zip(pattern, path)):
+        yield path, mapping
+    if isinstance(mapping, collections.Mapping):
+        for key, value in mapping.iteritems():
+            for match in _naive_scan(value, pattern, path + (key,)):
+                yield match
+
+
+@benchmark('query.any')
+def query_any():
+    d = _services()
+    pattern = ('services', '*', 'db', 'port')
+    return _time(lambda: list(d.query(pattern)), 200)
+
+
+@benchmark('query.naive_scan')
+def query_naive_scan():
+    """Same query as query.any by walking the whole tree"""
+    d = _services()
+    pattern = ('services', '*', 'db', 'port')
+    return _time(lambda: list(_naive_scan(d, pattern)), 20)
+
+
+@benchmark('query.any_depth')
+def query_any_depth():
+    d = _services()
+    return _time(lambda: list(d.query(('**', 'port'))), 20)
+
+
+# Columns
+
+def _records(count=10000):
+    return [AttrDict(db=dict(host='h', port=i), name='r%d' % i)
+            for i in range(count)]
+
+
+@benchmark('columns.get_path_loop')
+def columns_get_path_loop():
+    """Per record get_path, compare to columns.collect_path"""
+    records = _records()
+    path = ('db', 'port')
+    return _time(lambda: [r.get_path(path) for r in records], 5)
+
+
+@benchmark('columns.collect_path')
+def columns_collect_path():
+    records = _records()
+    return _time(lambda: collect_path(records, ('db', 'port')), 5)
+
+
+@benchmark('columns.collect_paths_3')
+def columns_collect_paths():
+    records = _records()
+    paths = [('db', 'port'), ('db', 'host'), ('name',)]
+    return _time(lambda: collect_paths(records, paths), 5)
+
+
+# File configs
+
+def _time_reloads(reload_):
+    """Time `reload_(loader, override)` with a changed override file in
+    front of a 10x10x10x10 default file"""
+    directory = tempfile.mkdtemp()
+    try:
+        paths = [os.path.join(directory, name)
+                 for name in ('defaults.json', 'override.json')]
+        with open(paths[0], 'w') as file_:
+            json.dump(_config(depth=4), file_)
+        loader = FileConfigLoader(paths)
+        counter = [0]
+
+        def change_and_reload():
+            counter[0] += 1
+            with open(paths[1], 'w') as file_:
+                json.dump(dict(k0=dict(k0=dict(k0=dict(k0=counter[0])))), file_)
+            os.utime(paths[1], (counter[0], counter[0]))
+            reload_(loader, paths)
+        return _time(change_and_reload, 20)
+    finally:
+        shutil.rmtree(directory)
+
+
+@benchmark('file_config.reload_one_leaf')
+def file_config_reload():
+    """Compare to file_config.full_reload"""
+    return _time_reloads(lambda loader, paths: loader.reload())
+
+
+@benchmark('file_config.full_reload')
+def file_config_full_reload():
+    """Parse all files and build a new tree, like before FileConfigLoader"""
+    def full_reload(loader, paths):
+        tree = AttrDict()
+        for path in paths:
+            with open(path) as file_:
+                inplace_merge(tree, json.load(file_))
+    return _time_reloads(full_reload)
+
+
+# SQLite storage
+
+def _time_sqlite(func, number, cache_size=10000):
+    """Time `func(tree)` on a SQLite tree holding _config(depth=4)"""
+    directory = tempfile.mkdtemp()
+    try:
+        tree = SqliteAttrDict(os.path.join(directory, 'tree.db'),
+                              _config(depth=4), cache_size=cache_size)
+        try:
+            return _time(lambda: func(tree), number)
+        finally:
+            tree.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+@benchmark('sqlite.get_path_depth_4_cached')
+def sqlite_get_path_cached():
+    """Compare to get_path.depth_5"""
+    path = _path(4)
+    return _time_sqlite(lambda tree: tree.get_path(path), 10000)
+
+
+@benchmark('sqlite.get_path_depth_4_uncached')
+def sqlite_get_path_uncached():
+    paths = [('k%d' % i, 'k%d' % j, 'k1', 'k2')
+             for i in range(10) for j in range(10)]
+    return _time_sqlite(
+        lambda tree: [tree.get_path(path) for path in paths], 10, cache_size=1)
+
+
+@benchmark('sqlite.set_path_100_batched')
+def sqlite_set_path_batched():
+    """Compare to sqlite.set_path_100"""
+    def set_paths(tree):
+        with tree.batch():
+            for i in range(100):
+                tree.set_path(('k1', 'k%d' % (i % 10), 'new'), i)
+    return _time_sqlite(set_paths, 10)
+
+
+@benchmark('sqlite.set_path_100')
+def sqlite_set_path():
+    def set_paths(tree):
+        for i in range(100):
+            tree.set_path(('k1', 'k%d' % (i % 10), 'new'), i)
+    return _time_sqlite(set_paths, 3)
+
+
+@benchmark('sqlite.iterate_subtree_1000')
+def sqlite_iterate():
+    return _time_sqlite(
+        lambda tree: [leaf for mapping in tree.k1.itervalues()
+                      for branch in mapping.itervalues()
+                      for leaf in branch.itervalues()], 10)
+
+
+# Indexes
+
+def _team_records(count=10000):
+    return [dict(id=i, owner=dict(team='t%d' % (i % 100))) for i in range(count)]
+
+
+@benchmark('indexed.find')
+def indexed_find():
+    """Compare to indexed.scan"""
+    records = IndexedCollection(_team_records(), indexes=[('owner', 'team')])
+    return _time(lambda: records.find(('owner', 'team'), 't42'), 10000)
+
+
+@benchmark('indexed.scan')
+def indexed_scan():
+    records = [AttrDict(record) for record in _team_records()]
+    path = ('owner', 'team')
+    return _time(
+        lambda: [r for r in records if r.get_path(path) == 't42'], 5)
+
+
+@benchmark('indexed.find_range')
+def indexed_find_range():
+    records = IndexedCollection(_team_records(), sorted_indexes=['id'])
+    return _time(lambda: records.find_range('id', 5000, 5100), 10000)
+
+
+@benchmark('indexed.set_path')
+def indexed_set_path():
+    """Compare to observable.notify"""
+    records = IndexedCollection(_team_records(), indexes=[('owner', 'team')])
+    record = next(iter(records))
+    return _time(lambda: record.set_path(('owner', 'team'), 'x'), 10000)
+
+
+# Tables
+
+@benchmark('table.memory_per_record', unit='bytes')
+def table_memory_per_record():
+    """Compare to table.list_memory_per_record"""
+    table = AttrDictTable.from_records(_records())
+    size = sys.getsizeof(table)
+    for path in table.paths:
+        size += deep_sizeof(table.column(path))
+    return float(size) / len(table)
+
+
+@benchmark('table.list_memory_per_record', unit='bytes')
+def table_list_memory_per_record():
+    records = _records()
+    return float(deep_sizeof(records)) / len(records)
+
+
+@benchmark('table.extend_10000')
+def table_extend():
+    records = _records()
+    table = AttrDictTable.from_records(records[:1])
+    return _time(lambda: table.extend(records), 3)
+
+
+@benchmark('table.row_getattr')
+def table_row_getattr():
+    """Compare to get_path.depth_2"""
+    table = AttrDictTable.from_records(_records())
+    row = table[500]
+    return _time(lambda: row.db.port, 50000)
+
+
+@benchmark('table.column_sum')
+def table_column_sum():
+    """Compare to columns.collect_path"""
+    table = AttrDictTable.from_records(_records())
+    return _time(lambda: sum(table.column(('db', 'port'))), 100)
+
+
+@benchmark('memory.report_tree_10x10x10x10')
+def memory_report_tree():
+    d = AttrDict(_config(depth=4))
+    return _time(lambda: memory_report(d, max_depth=2), 3)
+
+
+@benchmark('memory.report_tree_10x10x10x10_sampled')
+def memory_report_tree_sampled():
+    """At most 2 children per node below depth 1"""
+    d = AttrDict(_config(depth=4))
+    return _time(lambda: memory_report(d, sample=2), 3)
+
+
+# Garbage collector
+
+def _listed_blocks(count=10000):
+    return dict(
+        ('host%d' % i, dict(tags=['web', 'eu'], ports=[80, 443]))
+        for i in range(count)
+    )
+
+
+@benchmark('gc.construct_10000_blocks')
+def gc_construct():
+    """Compare to gc.bulk_load_10000_blocks"""
+    blocks = _listed_blocks()
+    return _time(lambda: AttrDict(blocks), 3)
+
+
+@benchmark('gc.bulk_load_10000_blocks')
+def gc_bulk_load():
+    blocks = _listed_blocks()
+    return _time(lambda: AttrDict.bulk_load(blocks), 3)
+
+
+@benchmark('gc.bulk_load_tuple_leaves_10000_blocks')
+def gc_bulk_load_tuple_leaves():
+    """Includes the copy of the input converting lists to tuples"""
+    blocks = _listed_blocks()
+    return _time(lambda: AttrDict.bulk_load(blocks, tuple_leaves=True), 3)
+
+
+def _time_collect(tree):
+    "time of a full collection while `tree` is alive"
+    gc.collect()
+    return _time(gc.collect, 3)
+
+
+@benchmark('gc.collect_list_leaves')
+def gc_collect_list_leaves():
+    """Compare to gc.collect_tuple_leaves"""
+    return _time_collect(AttrDict(_listed_blocks()))
+
+
+@benchmark('gc.collect_tuple_leaves')
+def gc_collect_tuple_leaves():
+    """Tuples of scalars are untracked, the nodes still are"""
+    return _time_collect(
+        AttrDict.bulk_load(_listed_blocks(), tuple_leaves=True))
+
+
+# Interning
+
+def _host_blocks(count=10000):
+    return dict(
+        ('host%d' % i, dict(port=80, opts=dict(timeout=1.5, retries=3)))
+        for i in range(count)
+    )
+
+
+@benchmark('interned.memory_per_block', unit='bytes')
+def interned_memory_per_block():
+    """Compare to interned.attrdict_memory_per_block"""
+    blocks = _host_blocks()
+    return float(deep_sizeof(InternedAttrDict(blocks))) / len(blocks)
+
+
+@benchmark('interned.attrdict_memory_per_block', unit='bytes')
+def interned_attrdict_memory_per_block():
+    blocks = _host_blocks()
+    return float(deep_sizeof(AttrDict(blocks))) / len(blocks)
+
+
+@benchmark('interned.construct_10000_blocks')
+def interned_construct():
+    """Compare to interned.attrdict_construct_10000_blocks"""
+    blocks = _host_blocks()
+    return _time(lambda: InternedAttrDict(blocks), 3)
+
+
+@benchmark('interned.attrdict_construct_10000_blocks')
+def interned_attrdict_construct():
+    blocks = _host_blocks()
+    return _time(lambda: AttrDict(blocks), 3)
+
+
+# Sorted keys
+
+_SORTED_KEYS = ['user:%d:%s' % (i, field)
+                for i in range(50000) for field in ('age', 'name')]
+
+
+@benchmark('sorted.iprefix_100000_keys')
+def sorted_iprefix():
+    """Compare to sorted.scan_and_sort_100000_keys"""
+    d = SortedAttrDict((key, 1) for key in _SORTED_KEYS)
+    return _time(lambda: list(d.iprefix('user:4242:')), 10000)
+
+
+@benchmark('sorted.scan_and_sort_100000_keys')
+def sorted_scan_and_sort():
+    d = AttrDict((key, 1) for key in _SORTED_KEYS)
+    return _time(
+        lambda: sorted(key for key in d if key.startswith('user:4242:')), 5)
+
+
+@benchmark('sorted.setitem_100000_keys')
+def sorted_setitem():
+    """Building with random keys, compare to sorted.attrdict_setitem_100000_keys"""
+    keys = list(_SORTED_KEYS)
+    random.Random(0).shuffle(keys)
+
+    def build():
+        d = SortedAttrDict()
+        for key in keys:
+            d[key] = 1
+    return _time(build, 1)
+
+
+@benchmark('sorted.attrdict_setitem_100000_keys')
+def sorted_attrdict_setitem():
+    keys = list(_SORTED_KEYS)
+    random.Random(0).shuffle(keys)
+
+    def build():
+        d = AttrDict()
+        for key in keys:
+            d[key] = 1
+    return _time(build, 1)
+
+
+# Key-sharing
+
+def _memory_per_node(cls):
+    count = max(1, int(MEMORY_NODES * SCALE))
+    nodes = [cls(id=i, host='h', port=80) for i in xrange(count)]
+    return float(deep_sizeof(nodes) - sys.getsizeof(nodes)) / count
+
+
+@benchmark('shared_keys.memory_per_node', unit='bytes')
+def shared_keys_memory_per_node():
+    """Compare to shared_keys.attrdict_memory_per_node"""
+    return _memory_per_node(SharedKeysAttrDict)
+
+
+@benchmark('shared_keys.attrdict_memory_per_node', unit='bytes')
+def shared_keys_attrdict_memory_per_node():
+    return _memory_per_node(AttrDict)
+
+
+@benchmark('shared_keys.getattr')
+def shared_keys_getattr():
+    """Compare to access.getattr"""
+    d = SharedKeysAttrDict(key=1)
+    return _time(lambda: d.key, 200000)
+
+
+# Caches
+
+_CACHE_PATHS = [('t%d' % (i % 10), 'r%d' % (i % 100), i) for i in range(10000)]
+
+
+class _FlatLRU(object):
+    "path -> value LRU, like functools.lru_cache keeps its entries"
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = collections.OrderedDict()
+
+    def get(self, path, default=None):
+        try:
+            value = self.data.pop(path)
+        except KeyError:
+            return default
+        self.data[path] = value
+        return value
+
+    def set(self, path, value):
+        self.data.pop(path, None)
+        self.data[path] = value
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+
+@benchmark('cache.set_path_evicting')
+def cache_set_path_evicting():
+    """Compare to cache.flat_lru_set_evicting"""
+    cache = CacheAttrDict(max_leaves=1000)
+
+    def fill():
+        for path in _CACHE_PATHS:
+            cache.set_path(path, 1)
+    return _time(fill, 3)
+
+
+@benchmark('cache.flat_lru_set_evicting')
+def cache_flat_lru_set_evicting():
+    cache = _FlatLRU(1000)
+
+    def fill():
+        for path in _CACHE_PATHS:
+            cache.set(path, 1)
+    return _time(fill, 3)
+
+
+@benchmark('cache.get_path')
+def cache_get_path():
+    """Compare to cache.flat_lru_get and get_path.depth_3"""
+    cache = CacheAttrDict(max_leaves=1000)
+    cache.set_path(('a', 'b', 'c'), 1)
+    return _time(lambda: cache.get_path(('a', 'b', 'c')), 50000)
+
+
+@benchmark('cache.flat_lru_get')
+def cache_flat_lru_get():
+    cache = _FlatLRU(1000)
+    cache.set(('a', 'b', 'c'), 1)
+    return _time(lambda: cache.get(('a', 'b', 'c')), 50000)
+
+
+@benchmark('cache.getattr')
+def cache_getattr():
+    """Compare to access.getattr"""
+    cache = CacheAttrDict(dict(key=1), max_leaves=1000)
+    return _time(lambda: cache.key, 50000)
+
+
+# Instrumentation
+
+@benchmark('instrumentation.set_path_enabled')
+def instrumentation_enabled():
+    """Compare to set_path.depth_3 for the cost of counting"""
+    d = _deep(3)
+    with instrumentation.measure():
+        return _time(lambda: d.set_path(_path(3), 2), 50000)
+
+
+@benchmark('instrumentation.set_path_disabled')
+def instrumentation_disabled():
+    """Should be the same as set_path.depth_3"""
+    d = _deep(3)
+    instrumentation.enable()
+    instrumentation.disable()
+    return _time(lambda: d.set_path(_path(3), 2), 50000)
+
+
+# Path tracing
+
+@benchmark('trace.get_path_depth_3')
+def trace_get_path():
+    """Compare to get_path.depth_3 for the cost of tracing"""
+    d = _deep(3)
+    with path_tracer.tracing(d):
+        return _time(lambda: d.get_path(_path(3)), 50000)
+
+
+@benchmark('trace.getattr')
+def trace_getattr():
+    """Compare to access.getattr"""
+    d = AttrDict(key=1)
+    with path_tracer.tracing(d):
+        return _time(lambda: d.key, 200000)
+
+
+@benchmark('trace.start_tree_10x10x10x10')
+def trace_start():
+    """Only the root is registered, doesn't depend on the tree size"""
+    d = AttrDict(_config(depth=4))
+
+    def start_stop():
+        path_tracer.start(d)
+        path_tracer.stop()
+    return _time(start_stop, 1000)
+
+
+@benchmark('trace.pruned_copy_tree_10x10x10x10')
+def trace_pruned_copy():
+    """100 of the 10000 leaves read"""
+    d = AttrDict(_config(depth=4))
+    with path_tracer.tracing(d) as trace:
+        for i in range(100):
+            d.get_path(('k%d' % (i % 10), 'k%d' % (i // 10), 'k0', 'k0'))
+    return _time(lambda: path_tracer.pruned_copy(trace), 100)
+
+
+# Import time
+
+def _run_python(code):
+    # The modules are imported from the directory of this script
+    return subprocess.check_call(
+        [sys.executable, '-c', code],
+        cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+@benchmark('import.attrdict')
+def import_attrdict():
+    """Time of `import attrdict` minus the interpreter startup"""
+    startup = _time(lambda: _run_python('pass'), 10)
+    return max(0, _time(lambda: _run_python('import attrdict'), 10) - startup)
+
+
+@benchmark('restricted_object.create_class')
+def restricted_object_create_class():
+    """Creation of a new class, without the cache"""
+    def create():
+        restricted_object._classes.clear()
+        restricted_object.create_restricted_object_cls(['__setattr__'])
+    return _time(create, 1000)
+
+
+# Runner
+
+def run(pattern='*'):
+    results = collections.OrderedDict()
+    for name, (func, unit) in BENCHMARKS.iteritems():
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+        results[name] = func()
+        print '%-45s %s' % (name, _format(results[name], unit))
+    return results
+
+
+def _format(value, unit):
+    if unit != 's':
+        return '%.1f %s' % (value, unit)
+    for scale, suffix in [(1, 's'), (1e3, 'ms'), (1e6, 'us')]:
+        if value * scale >= 1:
+            break
+    else:
+        scale, suffix = 1e9, 'ns'
+    return '%.2f %s' % (value * scale, suffix)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return names of benchmarks that got worse than baseline by more
+    than `threshold` (a fraction, 0.2 is 20%)
+
+    Benchmarks with a zero baseline, like import.attrdict clamped to 0 in
+    a quick run, are skipped: no slowdown can be measured against them.
+    """
+    regressions = []
+    for name, value in results.iteritems():
+        if not baseline.get(name):
+            continue
+        if value > baseline[name] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    global SCALE
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('pattern', nargs='?', default='*',
+                        help='run only benchmarks matching this glob')
+    parser.add_argument('--save', metavar='FILE',
+                        help='store results as a JSON baseline')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare results with a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown relative to the baseline '
+                             '(default: %(default)s)')
+    parser.add_argument('--quick', action='store_true',
+                        help='make 10 times fewer calls, less precise')
+    args = parser.parse_args(argv)
+    if args.quick:
+        SCALE = 0.1
+    results = run(args.pattern)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, separators=(',', ': '))
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name in regressions:
+            if baseline[name]:
+                change = '+%.0f%%' % ((results[name] / baseline[name] - 1) * 100)
+            else:
+                change = 'from 0'
+            print 'REGRESSION %s: %s -> %s (%s)' % (
+                name, baseline[name], results[name], change)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""AttrDict used as a bounded cache.
+
+    cache = CacheAttrDict(max_leaves=10000, ttl=60)
+    cache.set_path(('tenant', 'resource', 42), value, ttl=5)
+    cache.get_path(('tenant', 'resource', 42))
+
+Every leaf is tracked by its full path in an LRU list kept by the root
+node. Reading a leaf moves it to the end of the list, when there are more
+leaves (or bytes) than allowed the least recently used ones are evicted
+and mappings left empty by the eviction are removed too. Expired leaves
+are dropped when they're read, or by `expire()`.
+"""
+import collections
+import sys
+import time
+
+from attrdict import AttrDict, NO_VALUE
+
+
+class CacheAttrDict(AttrDict):
+    def __init__(self, data=(), max_leaves=None, max_bytes=None, ttl=None,
+                 sizeof=sys.getsizeof, clock=time.time):
+        """
+        `max_bytes` is checked against the sum of `sizeof(leaf)`, `ttl`
+        is the default time to live of leaves in seconds of `clock`.
+        """
+        self._init_root(max_leaves, max_bytes, ttl, sizeof, clock)
+        super(CacheAttrDict, self).__init__(data)
+
+    def _init_root(self, max_leaves, max_bytes, ttl, sizeof, clock):
+        self._root = self
+        self._path = ()
+        self._max_leaves = max_leaves
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._ttl_override = NO_VALUE
+        self._sizeof = sizeof
+        self._clock = clock
+        # Leaf path -> (deadline or None, size)
+        self._lru = collections.OrderedDict()
+        self._bytes = 0
+        self._counters = collections.Counter()
+
+    def _make_child(self, key):
+        child = self.__class__.__new__(self.__class__)
+        child._dict = {}
+        child._root = self._root
+        child._path = self._path + (key,)
+        return child
+
+    def _new_child(self, key):
+        if key in self._dict:
+            # An expired leaf is in the way
+            self._root._forget(self._path + (key,), self._dict[key])
+        child = self._dict[key] = self._make_child(key)
+        return child
+
+    def _new_like(self, data=()):
+        root = self._root
+        return self.__class__(
+            data, max_leaves=root._max_leaves, max_bytes=root._max_bytes,
+            ttl=root._ttl, sizeof=root._sizeof, clock=root._clock)
+
+    # Storage
+
+    def _insert(self, key, value):
+        assert value is not NO_VALUE, repr(key)
+        if isinstance(value, collections.Mapping):
+            child = self._new_child(key)
+            for child_key, child_value in value.iteritems():
+                child._insert(child_key, child_value)
+        else:
+            root = self._root
+            if key in self._dict:
+                root._forget(self._path + (key,), self._dict[key])
+            self._dict[key] = value
+            root._register(self._path + (key,), value)
+
+    def __setitem__(self, key, value):
+        self._insert(key, value)
+        self._root._evict()
+
+    def __delitem__(self, key):
+        value = self._dict.pop(key)
+        self._root._forget(self._path + (key,), value)
+
+    def _restore_raw(self, key, value):
+        """
+        Roll back `key` keeping the LRU in step, restored leaves are
+        tracked as if they were just set. Nodes which were removed from
+        the tree in the meantime, by an eviction, are roots of their own
+        cache by now, the rollback happens there.
+        """
+        root = self._root
+        path = self._path + (key,)
+        if key in self._dict:
+            root._forget(path, self._dict[key])
+        super(CacheAttrDict, self)._restore_raw(key, value)
+        if value is not NO_VALUE:
+            root._adopt(path, value)
+        root._evict()
+
+    def __getitem__(self, key):
+        root = self._root
+        try:
+            value = self._dict[key]
+        except KeyError:
+            root._counters['misses'] += 1
+            raise
+        if isinstance(value, CacheAttrDict):
+            return value
+        path = self._path + (key,)
+        entry = root._lru.pop(path)
+        deadline = entry[0]
+        if deadline is not None and deadline <= root._clock():
+            root._counters['expirations'] += 1
+            root._counters['misses'] += 1
+            root._remove_leaf(path, entry)
+            raise KeyError(key)
+        root._lru[path] = entry
+        root._counters['hits'] += 1
+        return value
+
+    def __contains__(self, key):
+        if key not in self._dict:
+            return False
+        value = self._dict[key]
+        if isinstance(value, CacheAttrDict):
+            return True
+        root = self._root
+        deadline = root._lru[self._path + (key,)][0]
+        return deadline is None or deadline > root._clock()
+
+    # LRU bookkeeping, done by the root node
+
+    def _register(self, path, value):
+        ttl = self._ttl if self._ttl_override is NO_VALUE else self._ttl_override
+        deadline = None if ttl is None else self._clock() + ttl
+        size = self._sizeof(value)
+        self._lru[path] = (deadline, size)
+        self._bytes += size
+
+    def _forget(self, path, value):
+        """Stop tracking leaves at and under `path`, removed from the tree
+
+        A removed mapping becomes the root of its own cache, with the same
+        limits, so writes into it don't reach this LRU anymore.
+        """
+        stack = [(path, value)]
+        while stack:
+            path, node = stack.pop()
+            if isinstance(node, CacheAttrDict):
+                stack.extend(
+                    (path + (key,), child)
+                    for key, child in node._dict.iteritems())
+            else:
+                self._bytes -= self._lru.pop(path)[1]
+        if isinstance(value, CacheAttrDict):
+            self._detach(value)
+
+    def _detach(self, node):
+        node._init_root(self._max_leaves, self._max_bytes, self._ttl,
+                        self._sizeof, self._clock)
+        node._adopt((), node)
+
+    def _adopt(self, path, value):
+        "track the leaves at and under `path`, and make this the nodes' root"
+        stack = [(path, value)]
+        while stack:
+            path, value = stack.pop()
+            if isinstance(value, CacheAttrDict):
+                value._root = self
+                value._path = path
+                stack.extend(
+                    (path + (key,), child)
+                    for key, child in value._dict.iteritems())
+            else:
+                self._register(path, value)
+
+    def _remove_leaf(self, path, entry):
+        "remove untracked leaf `path` from the tree with emptied parents"
+        self._bytes -= entry[1]
+        nodes = [self]
+        for key in path[:-1]:
+            nodes.append(nodes[-1]._dict[key])
+        del nodes[-1]._dict[path[-1]]
+        for i in xrange(len(nodes) - 1, 0, -1):
+            if nodes[i]._dict:
+                break
+            del nodes[i - 1]._dict[path[i - 1]]
+            self._detach(nodes[i])
+
+    def _evict(self):
+        lru = self._lru
+        max_leaves, max_bytes = self._max_leaves, self._max_bytes
+        while lru and (
+                (max_leaves is not None and len(lru) > max_leaves) or
+                (max_bytes is not None and self._bytes > max_bytes)):
+            path, entry = lru.popitem(last=False)
+            self._remove_leaf(path, entry)
+            self._counters['evictions'] += 1
+
+    # Public API
+
+    def set_path(self, path, value, ttl=NO_VALUE):
+        """Like AttrDict.set_path, `ttl` overrides the default time to
+        live for the leaves being set, None means they never expire"""
+        root = self._root
+        previous, root._ttl_override = root._ttl_override, ttl
+        try:
+            return super(CacheAttrDict, self).set_path(path, value)
+        finally:
+            root._ttl_override = previous
+
+    def expire(self):
+        "remove all expired leaves, return how many were removed"
+        root = self._root
+        now = root._clock()
+        expired = [
+            (path, entry) for path, entry in root._lru.iteritems()
+            if entry[0] is not None and entry[0] <= now
+        ]
+        for path, entry in expired:
+            del root._lru[path]
+            root._remove_leaf(path, entry)
+        root._counters['expirations'] += len(expired)
+        return len(expired)
+
+    def stats(self):
+        root = self._root
+        return dict(
+            hits=root._counters['hits'],
+            misses=root._counters['misses'],
+            evictions=root._counters['evictions'],
+            expirations=root._counters['expirations'],
+            leaves=len(root._lru),
+            bytes=root._bytes,
+        )
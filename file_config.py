@@ -0,0 +1,220 @@
+"""Config tree loaded from local files and updated when they change.
+
+    loader = FileConfigLoader(['defaults.json', 'local.json'])
+    loader.tree.db.port
+    loader.reload()             # -> paths which changed
+    watcher = loader.watch(interval=1.0, callback=on_change)
+
+Files are merged in order like `inplace_merge` does, so later files
+override leaves of the earlier ones. On reload only the files whose
+mtime, inode or size changed are parsed again, and only the leaves whose
+value changed are set or removed in the live tree, so the tree keeps its
+identity and the cost of the update depends on the size of the change.
+"""
+import collections
+import json
+import os
+import threading
+
+from attrdict import AttrDict, MergeError, NO_VALUE, gc_paused
+
+
+def _flatten(mapping):
+    "return ({leaf path: value}, set of branch paths) of `mapping`"
+    leaves = {}
+    branches = set()
+    stack = [((), mapping)]
+    while stack:
+        prefix, mapping = stack.pop()
+        for key, value in mapping.iteritems():
+            path = prefix + (key,)
+            if isinstance(value, collections.Mapping) and value:
+                branches.add(path)
+                stack.append((path, value))
+            else:
+                leaves[path] = value
+    return leaves, branches
+
+
+def _same(left, right):
+    return left is right or (type(left) is type(right) and left == right)
+
+
+_EMPTY = ({}, frozenset())
+
+
+class FileConfigLoader(object):
+    def __init__(self, paths, tree=None, factory=AttrDict, parser=json.load,
+                 bulk=False):
+        """Load `paths` into `tree`, a new `factory()` by default
+
+        `parser` is called with an open file and should return a mapping.
+        Missing files are treated as empty. With `bulk`, reloads run with
+        the GC paused, see attrdict.gc_paused.
+        """
+        self._paths = list(paths)
+        self.tree = factory() if tree is None else tree
+        self._parser = parser
+        self._bulk = bulk
+        # File path -> (mtime, inode, size), None for a missing file
+        self._signatures = {}
+        # Per file (leaves, branches), see _flatten
+        self._contents = [_EMPTY] * len(self._paths)
+        self.reload()
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime, stat.st_ino, stat.st_size)
+
+    def _parse(self, path):
+        with open(path) as file_:
+            data = self._parser(file_)
+        if not isinstance(data, collections.Mapping):
+            raise ValueError("expected a mapping in %s" % path, type(data))
+        return _flatten(data)
+
+    def reload(self, force=False):
+        """Parse files changed since the last reload and update the tree
+
+        Return the sorted list of leaf paths whose value changed. On error
+        (parsing, or a leaf in one file being a mapping in another one)
+        the tree and the loader are left as they were.
+        """
+        if self._bulk:
+            with gc_paused():
+                return self._reload(force)
+        return self._reload(force)
+
+    def _reload(self, force):
+        changed_files = {}
+        signatures = {}
+        for i, path in enumerate(self._paths):
+            signature = self._signature(path)
+            if not force and signature == self._signatures.get(path, NO_VALUE):
+                continue
+            signatures[path] = signature
+            changed_files[i] = _EMPTY if signature is None else self._parse(path)
+        if not changed_files:
+            return []
+        old_contents = self._contents
+        contents = list(old_contents)
+        candidates = set()
+        added_branches = set()
+        removed_branches = set()
+        for i, (leaves, branches) in changed_files.iteritems():
+            old_leaves, old_branches = old_contents[i]
+            contents[i] = (leaves, branches)
+            for path, value in leaves.iteritems():
+                if not _same(old_leaves.get(path, NO_VALUE), value):
+                    candidates.add(path)
+            candidates.update(
+                path for path in old_leaves if path not in leaves)
+            added_branches.update(branches - old_branches)
+            removed_branches.update(old_branches - branches)
+        # Only the paths which changed in some file can conflict
+        self._check_conflicts(contents, candidates)
+        self._check_conflicts(contents, added_branches)
+        changes = []
+        for path in candidates:
+            old = self._effective(old_contents, path)
+            new = self._effective(contents, path)
+            if not _same(old, new):
+                changes.append((path, old, new))
+        self._apply(changes, contents, removed_branches)
+        self._contents = contents
+        self._signatures.update(signatures)
+        return sorted(path for path, _, _ in changes)
+
+    @staticmethod
+    def _effective(contents, path):
+        "value of leaf `path` after merging all files, or NO_VALUE"
+        for leaves, _ in reversed(contents):
+            value = leaves.get(path, NO_VALUE)
+            if value is not NO_VALUE:
+                return value
+        return NO_VALUE
+
+    @staticmethod
+    def _check_conflicts(contents, paths):
+        for path in paths:
+            is_leaf = is_mapping = False
+            for leaves, branches in contents:
+                if path in branches:
+                    is_mapping = True
+                elif path in leaves:
+                    if isinstance(leaves[path], collections.Mapping):
+                        is_mapping = True
+                    else:
+                        is_leaf = True
+            if is_leaf and is_mapping:
+                raise MergeError(
+                    path, dict(message="Can't merge value with a mapping"))
+
+    def _apply(self, changes, contents, removed_branches):
+        tree = self.tree
+        is_branch = lambda path: any(path in branches for _, branches in contents)
+        # Removals first, so that new branches can replace removed leaves
+        for path, old, new in changes:
+            if new is NO_VALUE or isinstance(new, collections.Mapping):
+                if isinstance(old, collections.Mapping) and is_branch(path):
+                    continue
+                tree.pop_path(path, None)
+        for path, old, new in changes:
+            if isinstance(new, collections.Mapping):
+                tree.setdefault_path(path, {})
+            elif new is not NO_VALUE:
+                tree.set_path(path, new)
+        # Remove mappings left empty, deepest first
+        for path in sorted(removed_branches, key=len, reverse=True):
+            if is_branch(path) or self._effective(contents, path) is not NO_VALUE:
+                continue
+            mapping = tree.get_path(path, NO_VALUE, strict=False)
+            if isinstance(mapping, collections.Mapping) and not mapping:
+                tree.pop_path(path)
+
+    def watch(self, interval=1.0, callback=None):
+        """Reload in a daemon thread every `interval` seconds
+
+        `callback` is called with the changed paths after every reload
+        which changed something. Return a Watcher, call its `stop()` to
+        stop watching.
+        """
+        watcher = Watcher(self, interval, callback)
+        watcher.start()
+        return watcher
+
+
+class Watcher(threading.Thread):
+    """Thread polling the files of a FileConfigLoader
+
+    An exception raised by a reload is kept in `error`, the thread goes on
+    and retries on the next poll.
+    """
+    def __init__(self, loader, interval, callback=None):
+        super(Watcher, self).__init__()
+        self.daemon = True
+        self.loader = loader
+        self.interval = interval
+        self.callback = callback
+        self.error = None
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                changed = self.loader.reload()
+            except Exception, exc:
+                self.error = exc
+                continue
+            self.error = None
+            if changed and self.callback is not None:
+                self.callback(changed)
+
+    def stop(self):
+        self._stopped.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
@@ -0,0 +1,175 @@
+"""Collection of AttrDict records with secondary indexes on paths.
+
+    users = IndexedCollection(records, indexes=[('owner', 'team')],
+                              sorted_indexes=['age'])
+    users.find(('owner', 'team'), 'x')
+    users.find_range('age', 18, 30)
+
+Records are kept as ObservableAttrDicts, the collection subscribes to the
+indexed paths of every record, so changes made through `__setitem__`,
+`set_path`, `pop_path` and friends on the record (or on nested mappings
+of it) update the indexes. Records without the path, or with an
+unhashable value there, aren't in the index of that path.
+"""
+import bisect
+import collections
+
+from attrdict import NO_VALUE, PathKeyError, PathTypeError
+from observable_attrdict import ObservableAttrDict
+
+
+def _as_path(path):
+    if not isinstance(path, (tuple, list)):
+        path = (path,)
+    ObservableAttrDict._check_path(path)
+    return tuple(path)
+
+
+def _lookup(record, path):
+    try:
+        value = record.get_path(path, NO_VALUE)
+    except (PathKeyError, PathTypeError):
+        return NO_VALUE
+    try:
+        hash(value)
+    except TypeError:
+        return NO_VALUE
+    return value
+
+
+class _Index(object):
+    "Index of one path, hashed and possibly sorted"
+    def __init__(self, is_sorted):
+        # id(record) -> indexed value
+        self.values = {}
+        # value -> set of id(record)
+        self.buckets = {}
+        # sorted [(value, id(record))] or None
+        self.entries = [] if is_sorted else None
+
+    def add(self, record_id, value):
+        self.values[record_id] = value
+        self.buckets.setdefault(value, set()).add(record_id)
+        if self.entries is not None:
+            bisect.insort(self.entries, (value, record_id))
+
+    def discard(self, record_id):
+        value = self.values.pop(record_id, NO_VALUE)
+        if value is NO_VALUE:
+            return
+        bucket = self.buckets[value]
+        bucket.discard(record_id)
+        if not bucket:
+            del self.buckets[value]
+        if self.entries is not None:
+            del self.entries[bisect.bisect_left(self.entries, (value, record_id))]
+
+
+class IndexedCollection(object):
+    def __init__(self, records=(), indexes=(), sorted_indexes=()):
+        """Create a collection with hash indexes on paths in `indexes`
+        and sorted indexes, for find_range, on `sorted_indexes`"""
+        # id(record) -> record
+        self._records = collections.OrderedDict()
+        # id(record) -> subscriptions of the record
+        self._subscriptions = {}
+        # path -> _Index
+        self._indexes = {}
+        for path in indexes:
+            self.add_index(path)
+        for path in sorted_indexes:
+            self.add_index(path, sorted=True)
+        for record in records:
+            self.add(record)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return self._records.itervalues()
+
+    def __contains__(self, record):
+        return id(record) in self._records
+
+    def add_index(self, path, sorted=False):
+        path = _as_path(path)
+        if path in self._indexes:
+            raise ValueError("path is already indexed", path)
+        index = self._indexes[path] = _Index(sorted)
+        for record_id, record in self._records.iteritems():
+            self._subscribe(record, path)
+            value = _lookup(record, path)
+            if value is not NO_VALUE:
+                index.add(record_id, value)
+
+    def _subscribe(self, record, path):
+        record_id = id(record)
+
+        def reindex(event):
+            index = self._indexes[path]
+            index.discard(record_id)
+            value = _lookup(record, path)
+            if value is not NO_VALUE:
+                index.add(record_id, value)
+        self._subscriptions[record_id].append(record.subscribe(path, reindex))
+
+    def add(self, record):
+        """Add a record and return it
+
+        Mappings which aren't ObservableAttrDicts are copied into one,
+        change the returned record to keep the indexes up to date.
+        """
+        if not isinstance(record, ObservableAttrDict):
+            record = ObservableAttrDict(record)
+        record_id = id(record)
+        if record_id in self._records:
+            raise ValueError("record is already in the collection")
+        self._records[record_id] = record
+        self._subscriptions[record_id] = []
+        for path, index in self._indexes.iteritems():
+            self._subscribe(record, path)
+            value = _lookup(record, path)
+            if value is not NO_VALUE:
+                index.add(record_id, value)
+        return record
+
+    def remove(self, record):
+        record_id = id(record)
+        if record_id not in self._records:
+            raise KeyError(record)
+        del self._records[record_id]
+        for subscription in self._subscriptions.pop(record_id):
+            subscription.cancel()
+        for index in self._indexes.itervalues():
+            index.discard(record_id)
+
+    def _index(self, path):
+        path = _as_path(path)
+        try:
+            return self._indexes[path]
+        except KeyError:
+            raise KeyError("path isn't indexed", path)
+
+    def find(self, path, value):
+        "return the list of records whose value at `path` equals `value`"
+        records = self._records
+        return [records[record_id]
+                for record_id in self._index(path).buckets.get(value, ())]
+
+    def count(self, path, value):
+        return len(self._index(path).buckets.get(value, ()))
+
+    def find_range(self, path, low=NO_VALUE, high=NO_VALUE):
+        """Return the list of records with `low` <= value at `path` < `high`,
+        sorted by that value. Omitted bounds aren't checked."""
+        entries = self._index(path).entries
+        if entries is None:
+            raise TypeError("path has no sorted index", path)
+        start, stop = 0, len(entries)
+        # (value,) sorts before any (value, record_id)
+        if low is not NO_VALUE:
+            start = bisect.bisect_left(entries, (low,))
+        if high is not NO_VALUE:
+            stop = bisect.bisect_left(entries, (high,))
+        records = self._records
+        return [records[record_id] for _, record_id in entries[start:stop]]
@@ -0,0 +1,141 @@
+"""Opt-in counters for AttrDict hot paths.
+
+    import instrumentation
+    with instrumentation.measure() as stats:
+        handle_request()
+    print stats['path_depths']
+
+Counting works by replacing the instrumented methods with counting
+wrappers in `enable()`, `disable()` puts the original functions back, so
+while disabled there is no overhead at all. Counters are global and not
+synchronized, with several threads the numbers are approximate.
+"""
+import collections
+import contextlib
+
+import attrdict
+from attrdict import (
+    AttrDict, TypedAttrDict, PathFunctor, PathKeyError, PathTypeError,
+    NO_VALUE
+)
+
+COUNTERS = [
+    'node_conversions',
+    'path_functors',
+    'path_key_errors',
+    'path_type_errors',
+    'merge_nodes',
+    'descriptor_dispatches',
+]
+
+_counters = collections.Counter()
+_path_depths = collections.Counter()
+
+# (owner, name, original attribute or NO_VALUE) for every patch applied
+_patches = []
+
+
+def _patch(owner, name, make_wrapper):
+    if isinstance(owner, type):
+        original = owner.__dict__.get(name, NO_VALUE)
+    else:
+        original = getattr(owner, name)
+    # Inherited attribute, e.g. KeyError.__init__
+    wrapped = getattr(owner, name) if original is NO_VALUE else original
+    wrapper = make_wrapper(wrapped)
+    wrapper.__name__ = name
+    _patches.append((owner, name, original))
+    setattr(owner, name, wrapper)
+
+
+def _counting(counter):
+    def make_wrapper(wrapped):
+        def wrapper(*args, **kwargs):
+            _counters[counter] += 1
+            return wrapped(*args, **kwargs)
+        return wrapper
+    return make_wrapper
+
+
+def _counting_conversions(wrapped):
+    def __setitem__(self, key, value):
+        if isinstance(value, collections.Mapping):
+            _counters['node_conversions'] += 1
+        return wrapped(self, key, value)
+    return __setitem__
+
+
+def _counting_depths(leaf_keys):
+    "count the depth of the branch of paths ending with `leaf_keys` keys"
+    def make_wrapper(wrapped):
+        def wrapper(self, path):
+            _path_depths[max(0, len(path) - leaf_keys)] += 1
+            return wrapped(self, path)
+        return wrapper
+    return make_wrapper
+
+
+def is_enabled():
+    return bool(_patches)
+
+
+def enable():
+    if is_enabled():
+        return
+    _patch(AttrDict, '__setitem__', _counting_conversions)
+    # The traversals of the path methods, each of them counts the branch
+    # it walks once
+    _patch(AttrDict, '_get_mapping', _counting_depths(0))
+    _patch(AttrDict, '_get_or_create_mapping', _counting_depths(0))
+    _patch(AttrDict, '_probe_path', _counting_depths(1))
+    _patch(PathFunctor, '__init__', _counting('path_functors'))
+    _patch(PathKeyError, '__init__', _counting('path_key_errors'))
+    _patch(PathTypeError, '__init__', _counting('path_type_errors'))
+    _patch(attrdict, 'generic_merge', _counting('merge_nodes'))
+    _patch(TypedAttrDict, '_action_func', _counting('descriptor_dispatches'))
+
+
+def disable():
+    while _patches:
+        owner, name, original = _patches.pop()
+        if original is NO_VALUE:
+            delattr(owner, name)
+        else:
+            setattr(owner, name, original)
+
+
+def stats():
+    "return a snapshot of all counters"
+    result = dict((counter, _counters[counter]) for counter in COUNTERS)
+    result['path_depths'] = dict(_path_depths)
+    return result
+
+
+def reset():
+    _counters.clear()
+    _path_depths.clear()
+
+
+@contextlib.contextmanager
+def measure():
+    """Count what happens inside the block.
+
+    Yields a dict which is filled in with the same keys as `stats()` on
+    exit. Instrumentation is enabled for the block if it wasn't before.
+    """
+    was_enabled = is_enabled()
+    enable()
+    before = stats()
+    result = {}
+    try:
+        yield result
+    finally:
+        after = stats()
+        if not was_enabled:
+            disable()
+        for counter in COUNTERS:
+            result[counter] = after[counter] - before[counter]
+        depths = collections.Counter(after['path_depths'])
+        depths.subtract(before['path_depths'])
+        result['path_depths'] = dict(
+            (depth, count) for depth, count in depths.iteritems() if count)
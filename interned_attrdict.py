@@ -0,0 +1,203 @@
+"""Hash-consing of AttrDict trees.
+
+    config = InternedAttrDict(generated_config)
+    config.intern_stats()['bytes_saved']
+
+Identical immutable leaves and identical subtrees are stored once, as
+shared FrozenAttrDict nodes. The tree is a CopyOnWriteAttrDict, so reads
+return views on the shared nodes and a node is copied before it's changed,
+the sharing isn't visible to the code using it. Subtrees with mutable leaves (lists and such) are never
+shared.
+"""
+import collections
+import sys
+import types
+import weakref
+
+from attrdict import NO_VALUE
+from snapshot_attrdict import CopyOnWriteAttrDict, FrozenAttrDict
+
+_INTERNABLE_TYPES = frozenset([
+    str, unicode, int, long, float, complex, bool, types.NoneType,
+])
+
+
+class InternPool(object):
+    """Table of shared subtrees
+
+    Subtrees are held weakly, they're forgotten once no tree uses them,
+    several trees can be loaded into the same pool to share subtrees
+    between them. Leaves are shared within one intern() call, and across
+    calls through the subtrees holding them: a node is looked up by the
+    values of its leaves.
+    """
+    def __init__(self):
+        # frozenset of (key type, key, child signature) -> FrozenAttrDict,
+        # a child signature is the signature of a leaf or id() of a node
+        self._nodes = weakref.WeakValueDictionary()
+        self._counters = collections.Counter()
+
+    @staticmethod
+    def _signature(value):
+        "return the key of `value` in the table of leaves, None if mutable"
+        value_type = type(value)
+        if value_type not in _INTERNABLE_TYPES:
+            return None
+        if value_type is float:
+            # -0.0 == 0.0, but they aren't the same value
+            return (float, value.hex())
+        return (value_type, value)
+
+    def _intern_leaf(self, value, leaves):
+        "return (interned value, signature or None if unshareable, size)"
+        size = sys.getsizeof(value)
+        signature = self._signature(value)
+        if signature is None:
+            self._counters['unique_bytes'] += size
+            return value, None, size
+        leaf = leaves.get(signature, NO_VALUE)
+        if leaf is NO_VALUE:
+            leaves[signature] = value
+            self._counters['unique_leaves'] += 1
+            self._counters['unique_bytes'] += size
+            return value, signature, size
+        self._counters['leaf_hits'] += 1
+        return leaf, signature, size
+
+    def _intern_key(self, key, leaves):
+        signature = self._signature(key)
+        if signature is None:
+            return key
+        return leaves.setdefault(signature, key)
+
+    def _intern_node(self, children, signatures, children_size):
+        """return (node, deep size) for (key, child) pairs, `signatures`
+        is the list of their (key type, key, child signature), or None if
+        one of them isn't shareable"""
+        if signatures is not None:
+            signature = frozenset(signatures)
+            node = self._nodes.get(signature)
+            if node is not None:
+                self._counters['node_hits'] += 1
+                return node, node._interned_size
+        node = FrozenAttrDict.__new__(FrozenAttrDict)
+        node._dict = dict(children)
+        size = sys.getsizeof(node) + sys.getsizeof(node._dict)
+        self._counters['unique_bytes'] += size
+        if signatures is not None:
+            node._interned_size = size + children_size
+            self._nodes[signature] = node
+        return node, size + children_size
+
+    def intern(self, value):
+        """Return `value` with mappings converted to shared FrozenAttrDicts
+        and leaves replaced by their shared copies"""
+        # signature -> leaf, for this call
+        leaves = {}
+        if not isinstance(value, collections.Mapping):
+            result, _, size = self._intern_leaf(value, leaves)
+            self._counters['total_bytes'] += size
+            return result
+        # [items iterator, (key, child) pairs, child signatures or None,
+        #  key, children size]
+        stack = [[value.iteritems(), [], [], NO_VALUE, 0]]
+        while True:
+            frame = stack[-1]
+            item = next(frame[0], NO_VALUE)
+            if item is NO_VALUE:
+                stack.pop()
+                result, size = self._intern_node(frame[1], frame[2], frame[4])
+                shareable = frame[2] is not None
+                if not stack:
+                    self._counters['total_bytes'] += size
+                    return result
+                key = frame[3]
+                frame = stack[-1]
+                signature = id(result) if shareable else None
+            else:
+                key, child = item
+                key = self._intern_key(key, leaves)
+                if isinstance(child, collections.Mapping):
+                    stack.append([child.iteritems(), [], [], key, 0])
+                    continue
+                result, signature, size = self._intern_leaf(child, leaves)
+            frame[1].append((key, result))
+            if signature is None:
+                frame[2] = None
+            elif frame[2] is not None:
+                frame[2].append((type(key), key, signature))
+            frame[4] += size
+
+    def clear(self):
+        "forget everything interned so far, trees loaded stay as they are"
+        self.__init__()
+
+    def stats(self):
+        """Return counters of the pool
+
+        `nodes` is the number of shared subtrees still alive, `leaves` the
+        number of distinct leaves met by intern() calls. `bytes_total` is
+        what the interned values would take without any sharing,
+        `bytes_unique` what they take with it, both are computed with
+        sys.getsizeof and don't include the keys.
+        """
+        counters = self._counters
+        return dict(
+            nodes=len(self._nodes),
+            leaves=counters['unique_leaves'],
+            node_hits=counters['node_hits'],
+            leaf_hits=counters['leaf_hits'],
+            bytes_total=counters['total_bytes'],
+            bytes_unique=counters['unique_bytes'],
+            bytes_saved=counters['total_bytes'] - counters['unique_bytes'],
+        )
+
+
+class InternedAttrDict(CopyOnWriteAttrDict):
+    """CopyOnWriteAttrDict which interns everything stored into it
+
+    Every instance gets its own pool, use `load` to share one.
+    """
+    def __init__(self, *args, **kwargs):
+        self._pool = InternPool()
+        self._dict = {}
+        self.update(*args, **kwargs)
+
+    @classmethod
+    def load(cls, data, pool=None):
+        "create a tree from mapping `data` interned into `pool`"
+        result = cls.__new__(cls)
+        result._pool = InternPool() if pool is None else pool
+        result._dict = {}
+        result.update(data)
+        return result
+
+    def _from_frozen(self, frozen):
+        result = super(InternedAttrDict, self)._from_frozen(frozen)
+        result._pool = self._pool
+        return result
+
+    def _new_child(self, key):
+        self._make_private()
+        child = self._dict[key] = self._from_frozen(FrozenAttrDict())
+        return child
+
+    def __setitem__(self, key, value):
+        assert value is not NO_VALUE, repr(key)
+        self._make_private()
+        self._dict[key] = self._pool.intern(value)
+
+    def __eq__(self, other):
+        if not isinstance(other, collections.Mapping):
+            return NotImplemented
+        # Compare the frozen children as they are, without copying them
+        return self._dict == dict(other.iteritems())
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def intern_stats(self):
+        return self._pool.stats()
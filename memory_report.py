@@ -0,0 +1,123 @@
+"""Deep memory accounting of AttrDict trees.
+
+    for entry in memory_report(config, max_depth=2)[:10]:
+        print entry.path, entry.size
+
+Sizes are computed with sys.getsizeof: node objects, their attributes
+(the `_dict` table included), keys and leaves, following lists, tuples,
+sets and dicts. Objects referenced from several places are counted once,
+for the first subtree they're met in. The tree is walked with explicit
+stacks, so its depth doesn't matter.
+"""
+import collections
+import gc
+import random
+import sys
+
+from attrdict import AttrDict
+
+SubtreeSize = collections.namedtuple(
+    'SubtreeSize', ['path', 'size', 'nodes', 'leaves'])
+
+_CONTAINERS = (list, tuple, set, frozenset)
+
+
+def _attributes(obj):
+    "values of the instance attributes of `obj`, in __dict__ and slots"
+    result = []
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            if name.startswith('__') and not name.endswith('__'):
+                name = '_%s%s' % (cls.__name__.lstrip('_'), name)
+            value = getattr(obj, name, None)
+            if value is not None:
+                result.append(value)
+    # Reading obj.__dict__ would create it for instances which have none
+    # yet, like slotted records. It's the dict referenced by `obj` which
+    # isn't in a slot.
+    in_slots = set(map(id, result))
+    for referent in gc.get_referents(obj):
+        if type(referent) is dict and id(referent) not in in_slots:
+            result.append(referent)
+            break
+    return result
+
+
+def _sizeof(obj, seen, nodes_boundary=False):
+    """Size of `obj` and the objects it references, not counting the ids in
+    `seen` and adding the counted ones to it. With `nodes_boundary`, other
+    AttrDict nodes than `obj` aren't followed."""
+    size = 0
+    stack = [obj]
+    root = obj
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        is_node = isinstance(obj, AttrDict)
+        if is_node and nodes_boundary and obj is not root:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.iterkeys())
+            stack.extend(obj.itervalues())
+        elif isinstance(obj, _CONTAINERS):
+            stack.extend(obj)
+        elif is_node:
+            stack.extend(_attributes(obj))
+    return size
+
+
+def deep_sizeof(obj):
+    "rough number of bytes taken by `obj` and everything it references"
+    return _sizeof(obj, set())
+
+
+def memory_report(tree, max_depth=1, sample=None, seed=0):
+    """Return SubtreeSize for the root and every mapping up to `max_depth`
+    levels under it, sorted by size, biggest first
+
+    `size`, `nodes` and `leaves` include everything under the path. With
+    `sample`, at most that many children of each node below `max_depth`
+    are visited (randomly chosen with `seed`) and their sizes are
+    extrapolated, so the numbers are estimates.
+    """
+    rng = random.Random(seed)
+    seen = set()
+    # path -> [size, nodes, leaves]
+    totals = collections.OrderedDict()
+    # (node, path, weight), weight is the extrapolation factor
+    stack = [(tree, (), 1.0)]
+    while stack:
+        node, path, weight = stack.pop()
+        if len(path) <= max_depth:
+            totals[path] = [0, 0, 0]
+        if id(node) in seen:
+            # Shared subtree, already counted elsewhere
+            continue
+        size = _sizeof(node, seen, nodes_boundary=True)
+        children = []
+        leaves = 0
+        for key, value in node._repr_items():
+            if isinstance(value, AttrDict):
+                children.append((key, value))
+            elif not isinstance(value, collections.Mapping):
+                leaves += 1
+        child_weight = weight
+        if sample is not None and len(path) >= max_depth and len(children) > sample:
+            child_weight = weight * len(children) / sample
+            children = rng.sample(children, sample)
+        for key, child in children:
+            stack.append((child, path + (key,), child_weight))
+        for depth in xrange(min(len(path), max_depth) + 1):
+            entry = totals[path[:depth]]
+            entry[0] += size * weight
+            entry[1] += weight
+            entry[2] += leaves * weight
+    result = [
+        SubtreeSize(path, int(round(size)), int(round(nodes)), int(round(leaves)))
+        for path, (size, nodes, leaves) in totals.iteritems()
+    ]
+    result.sort(key=lambda entry: entry.size, reverse=True)
+    return result
@@ -0,0 +1,230 @@
+import collections
+import contextlib
+import Queue
+
+from attrdict import AttrDict, NO_VALUE, SET, DEL
+
+
+ChangeEvent = collections.namedtuple('ChangeEvent', ['action', 'path', 'value'])
+
+_CANCELLED = object()
+
+
+class _TrieNode(object):
+    __slots__ = ['children', 'subscriptions']
+
+    def __init__(self):
+        self.children = {}
+        self.subscriptions = []
+
+
+class SubscriptionTrie(object):
+    """Subscriptions indexed by their path prefix.
+
+    A change at some path only visits the nodes on that path and the
+    subtree below it, so the cost doesn't depend on the number of
+    unrelated subscriptions.
+    """
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def __nonzero__(self):
+        return bool(self._root.children or self._root.subscriptions)
+
+    def add(self, prefix, subscription):
+        node = self._root
+        for path_element in prefix:
+            node = node.children.setdefault(path_element, _TrieNode())
+        node.subscriptions.append(subscription)
+
+    def remove(self, prefix, subscription):
+        nodes = [self._root]
+        for path_element in prefix:
+            nodes.append(nodes[-1].children[path_element])
+        nodes[-1].subscriptions.remove(subscription)
+        # Prune branches which have no subscriptions left
+        for i in xrange(len(prefix), 0, -1):
+            node = nodes[i]
+            if node.children or node.subscriptions:
+                break
+            del nodes[i - 1].children[prefix[i - 1]]
+
+    def match(self, path):
+        "return subscriptions for prefixes of `path` and paths under it"
+        node = self._root
+        result = list(node.subscriptions)
+        for path_element in path:
+            node = node.children.get(path_element)
+            if node is None:
+                return result
+            result.extend(node.subscriptions)
+        stack = node.children.values()
+        while stack:
+            node = stack.pop()
+            result.extend(node.subscriptions)
+            stack.extend(node.children.itervalues())
+        return result
+
+    def dispatch(self, event):
+        for subscription in self.match(event.path):
+            subscription(event)
+
+
+class Subscription(object):
+    """Handle returned by `ObservableAttrDict.subscribe`.
+
+    Without a callback the events are queued and can be consumed by
+    iterating over the subscription, possibly from another thread.
+    Iteration stops after `cancel()`.
+    """
+    def __init__(self, owner, prefix, callback=None):
+        self._owner = owner
+        self.prefix = prefix
+        self._queue = None
+        if callback is None:
+            self._queue = Queue.Queue()
+            callback = self._queue.put
+        self._callback = callback
+
+    def __call__(self, event):
+        self._callback(event)
+
+    def get(self, block=True, timeout=None):
+        """Return the next queued event
+
+        Raises Queue.Empty like Queue.get does, and StopIteration once the
+        subscription is cancelled.
+        """
+        if self._queue is None:
+            raise TypeError("subscription with a callback has no queue")
+        event = self._queue.get(block, timeout)
+        if event is _CANCELLED:
+            # Keep the marker for other consumers
+            self._queue.put(_CANCELLED)
+            raise StopIteration
+        return event
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.get()
+            except StopIteration:
+                return
+
+    def cancel(self):
+        if self._owner is None:
+            return
+        self._owner._trie.remove(self.prefix, self)
+        self._owner = None
+        if self._queue is not None:
+            self._queue.put(_CANCELLED)
+
+
+class ObservableAttrDict(AttrDict):
+    """AttrDict which reports changes to subscribers.
+
+    Every change made through `__setitem__` and `__delitem__` (and so by
+    set_path, pop_path, merges etc.) produces a ChangeEvent with the path
+    relative to the node which was subscribed to. Events are delivered
+    synchronously, or at the end of a `batch()` block, where only the last
+    event for each path is kept. A transaction rolled back reports the
+    values it restores.
+    """
+    def __init__(self, *args, **kwargs):
+        self._parent = None
+        self._key = None
+        self._trie = None
+        self._pending = None
+        super(ObservableAttrDict, self).__init__(*args, **kwargs)
+
+    def __setitem__(self, key, value):
+        previous = self._dict.get(key)
+        if value is previous and isinstance(value, ObservableAttrDict):
+            # A child set back in place, by generic_merge for instance: its
+            # changes were reported already, and its subscriptions must
+            # keep working
+            return
+        super(ObservableAttrDict, self).__setitem__(key, value)
+        value = self._dict[key]
+        if previous is not value:
+            self._detach(previous)
+        if isinstance(value, ObservableAttrDict):
+            value._parent = self
+            value._key = key
+        self._notify(SET, key, value)
+
+    def __delitem__(self, key):
+        previous = self._dict[key]
+        super(ObservableAttrDict, self).__delitem__(key)
+        self._detach(previous)
+        self._notify(DEL, key, None)
+
+    def _restore_raw(self, key, value):
+        """
+        Roll back `key`: the restored node is attached again and the
+        subscribers, notified of the change being undone, get an event
+        for the restored value.
+        """
+        previous = self._dict.get(key, NO_VALUE)
+        super(ObservableAttrDict, self)._restore_raw(key, value)
+        if previous is value:
+            return
+        self._detach(previous)
+        if value is NO_VALUE:
+            self._notify(DEL, key, None)
+        else:
+            if isinstance(value, ObservableAttrDict):
+                value._parent = self
+                value._key = key
+            self._notify(SET, key, value)
+
+    @staticmethod
+    def _detach(node):
+        if isinstance(node, ObservableAttrDict):
+            node._parent = None
+            node._key = None
+
+    def _notify(self, action, key, value):
+        path = (key,)
+        node = self
+        while True:
+            if node._trie:
+                event = ChangeEvent(action, path, value)
+                if node._pending is not None:
+                    node._pending.pop(path, None)
+                    node._pending[path] = event
+                else:
+                    node._trie.dispatch(event)
+            if node._parent is None:
+                break
+            path = (node._key,) + path
+            node = node._parent
+
+    def subscribe(self, path_prefix=(), callback=None):
+        """Subscribe to changes at and under `path_prefix`
+
+        `callback` is called with a ChangeEvent, if it's omitted the
+        returned Subscription should be iterated over instead.
+        """
+        self._check_path(path_prefix, allow_empty=True)
+        path_prefix = tuple(path_prefix)
+        if self._trie is None:
+            self._trie = SubscriptionTrie()
+        subscription = Subscription(self, path_prefix, callback)
+        self._trie.add(path_prefix, subscription)
+        return subscription
+
+    @contextlib.contextmanager
+    def batch(self):
+        "deliver changes to this node's subscribers at the end of the block"
+        if self._pending is not None:
+            # Nested batch, the outer one delivers everything
+            yield
+            return
+        self._pending = collections.OrderedDict()
+        try:
+            yield
+        finally:
+            pending, self._pending = self._pending, None
+            for event in pending.itervalues():
+                self._trie.dispatch(event)
@@ -0,0 +1,158 @@
+"""Column-wise access to the same path in many records.
+
+    ports = collect_path(records, ('db', 'port'), default=0)
+    columns = collect_paths(records, [('db', 'host'), ('db', 'port')])
+    assign_path(records, ('db', 'port'), ports)
+
+Paths are checked once per call instead of once per record, and reading
+several paths shares the traversal of their common prefixes. With NumPy
+installed, passing `dtype` returns numpy arrays instead of lists.
+"""
+import collections
+import itertools
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from attrdict import AttrDict, NO_VALUE, PathTypeError
+
+
+def _type_error(path, i, value):
+    return PathTypeError(
+        "expected mapping, got %s instead" % repr(type(value)),
+        dict(
+            path=path[:i],
+            key=path[i],
+            full_path=path
+        )
+    )
+
+
+def _as_column(values, dtype):
+    if dtype is None:
+        return values
+    if numpy is None:
+        raise ImportError("numpy is required for dtype=%r" % (dtype,))
+    return numpy.array(values, dtype=dtype)
+
+
+def collect_path(records, path, default=None, dtype=None):
+    """Return the value at `path` of every record in `records`
+
+    Records without the path, or any part of it, give `default`.
+    A non-mapping in the middle of the path raises PathTypeError.
+    """
+    AttrDict._check_path(path)
+    path = tuple(path)
+    branch, key = path[:-1], path[-1]
+    result = []
+    append = result.append
+    for record in records:
+        mapping = record
+        for i, path_element in enumerate(branch):
+            if path_element not in mapping:
+                mapping = NO_VALUE
+                break
+            mapping = mapping[path_element]
+            if not isinstance(mapping, collections.Mapping):
+                raise _type_error(path, i, mapping)
+        if mapping is not NO_VALUE and key in mapping:
+            append(mapping[key])
+        else:
+            append(default)
+    return _as_column(result, dtype)
+
+
+class _Node(object):
+    "Node of a trie of paths"
+    __slots__ = ['children', 'columns', 'all_columns']
+
+    def __init__(self):
+        self.children = collections.OrderedDict()
+        # Columns of paths ending here
+        self.columns = []
+        # Columns of paths ending here or below
+        self.all_columns = []
+
+
+def _build_trie(paths):
+    root = _Node()
+    columns = collections.OrderedDict()
+    for path in paths:
+        AttrDict._check_path(path)
+        path = tuple(path)
+        if path in columns:
+            continue
+        column = columns[path] = []
+        node = root
+        for path_element in path:
+            node = node.children.setdefault(path_element, _Node())
+            node.all_columns.append(column)
+        node.columns.append(column)
+    return root, columns
+
+
+def collect_paths(records, paths, default=None, dtype=None):
+    """Return an OrderedDict of path -> column, like collect_path for
+    every path in `paths` at once"""
+    root, columns = _build_trie(paths)
+    for record in records:
+        stack = [(record, root, ())]
+        while stack:
+            mapping, node, prefix = stack.pop()
+            for path_element, child in node.children.iteritems():
+                if path_element not in mapping:
+                    for column in child.all_columns:
+                        column.append(default)
+                    continue
+                value = mapping[path_element]
+                for column in child.columns:
+                    column.append(value)
+                if not child.children:
+                    continue
+                path = prefix + (path_element,)
+                if not isinstance(value, collections.Mapping):
+                    full_path = path + (next(iter(child.children)),)
+                    raise _type_error(full_path, len(prefix), value)
+                stack.append((value, child, path))
+    for path, column in columns.iteritems():
+        columns[path] = _as_column(column, dtype)
+    return columns
+
+
+def assign_path(records, path, values):
+    """Set `path` of every record to the corresponding item of `values`
+
+    Missing mappings on the way are created like set_path does. Lengths
+    and the types on the way are checked first, no record is changed if
+    one of them is wrong.
+    """
+    AttrDict._check_path(path)
+    path = tuple(path)
+    branch, key = path[:-1], path[-1]
+    if not isinstance(records, collections.Sized):
+        records = list(records)
+    if not isinstance(values, collections.Sized):
+        values = list(values)
+    if len(records) != len(values):
+        raise ValueError("records and values differ in length")
+    # (deepest existing mapping on the branch, its depth) for every record
+    starts = []
+    for record in records:
+        mapping = record
+        depth = 0
+        for path_element in branch:
+            if path_element not in mapping:
+                break
+            value = mapping[path_element]
+            if not isinstance(value, collections.Mapping):
+                raise _type_error(path, depth, value)
+            mapping = value
+            depth += 1
+        starts.append((mapping, depth))
+    for (mapping, depth), value in itertools.izip(starts, values):
+        for path_element in branch[depth:]:
+            mapping = mapping._new_child(path_element)
+        mapping[key] = value
@@ -0,0 +1,160 @@
+"""Wildcard queries over nested mappings.
+
+A pattern is a sequence of segments, each of them is one of:
+
+    ANY ('*')          any single key
+    ANY_DEPTH ('**')   any number of keys, including none
+    callable           keys for which it returns true
+    Key(x)             key `x` even if it's '*', '**' or a callable
+    anything else      this exact key
+
+    for path, port in compile_query(('services', '*', 'db', 'port')).find(d):
+        ...
+
+Patterns are compiled into matchers once, matching only descends into the
+branches that can match and yields results lazily.
+"""
+import collections
+
+ANY = '*'
+ANY_DEPTH = '**'
+
+
+class Key(object):
+    "Literal key segment"
+    __slots__ = ['key']
+
+    def __init__(self, key):
+        self.key = key
+
+    def __repr__(self):
+        return 'Key(%r)' % (self.key,)
+
+
+class _KeyMatcher(object):
+    __slots__ = ['key']
+
+    def __init__(self, key):
+        self.key = key
+
+    def children(self, mapping):
+        if self.key in mapping:
+            yield self.key, mapping[self.key]
+
+
+class _AnyMatcher(object):
+    __slots__ = []
+
+    def children(self, mapping):
+        return mapping.iteritems()
+
+
+class _PredicateMatcher(object):
+    __slots__ = ['predicate']
+
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def children(self, mapping):
+        predicate = self.predicate
+        for key, value in mapping.iteritems():
+            if predicate(key):
+                yield key, value
+
+
+class _AnyDepthMatcher(object):
+    __slots__ = []
+
+
+_ANY_MATCHER = _AnyMatcher()
+_ANY_DEPTH_MATCHER = _AnyDepthMatcher()
+
+
+def _compile_segment(segment):
+    if isinstance(segment, Key):
+        return _KeyMatcher(segment.key)
+    if segment == ANY:
+        return _ANY_MATCHER
+    if segment == ANY_DEPTH:
+        return _ANY_DEPTH_MATCHER
+    if callable(segment):
+        return _PredicateMatcher(segment)
+    hash(segment)
+    return _KeyMatcher(segment)
+
+
+class Query(object):
+    """Compiled pattern"""
+    def __init__(self, pattern):
+        if not isinstance(pattern, (tuple, list)):
+            raise TypeError(
+                "expected tuple or list, got %s instead"
+                % repr(type(pattern)))
+        self.pattern = tuple(pattern)
+        matchers = []
+        for segment in pattern:
+            matcher = _compile_segment(segment)
+            if matcher is _ANY_DEPTH_MATCHER and matchers and \
+                    matchers[-1] is _ANY_DEPTH_MATCHER:
+                # '**', '**' is the same as '**'
+                continue
+            matchers.append(matcher)
+        self._matchers = tuple(matchers)
+        # With several '**' the same path can be reached in different ways
+        self._unique = matchers.count(_ANY_DEPTH_MATCHER) > 1
+
+    def find(self, mapping):
+        "yield (path, value) for every match in `mapping`"
+        matchers = self._matchers
+        last = len(matchers)
+        seen = set() if self._unique else None
+        # Stack of (value, path, index of the next matcher)
+        stack = [(mapping, (), 0)]
+        while stack:
+            value, path, i = stack.pop()
+            if i == last:
+                if seen is not None:
+                    if path in seen:
+                        continue
+                    seen.add(path)
+                yield path, value
+                continue
+            matcher = matchers[i]
+            if matcher is _ANY_DEPTH_MATCHER:
+                # Either '**' matches no more keys...
+                stack.append((value, path, i + 1))
+                # ...or at least one more
+                is_last = i + 1 == last
+                for key, child in value.iteritems():
+                    if isinstance(child, collections.Mapping):
+                        stack.append((child, path + (key,), i))
+                    elif is_last:
+                        stack.append((child, path + (key,), last))
+                continue
+            is_last = i + 1 == last
+            for key, child in matcher.children(value):
+                if is_last or isinstance(child, collections.Mapping):
+                    stack.append((child, path + (key,), i + 1))
+
+    def __repr__(self):
+        return 'Query(%r)' % (self.pattern,)
+
+
+_MAX_CACHED_QUERIES = 256
+_queries = {}
+
+
+def compile_query(pattern):
+    """Return a Query for `pattern`, compiled queries are cached"""
+    if isinstance(pattern, Query):
+        return pattern
+    try:
+        return _queries[pattern]
+    except (KeyError, TypeError):
+        pass
+    query = Query(pattern)
+    if isinstance(pattern, tuple):
+        if len(_queries) >= _MAX_CACHED_QUERIES:
+            _queries.clear()
+        _queries[pattern] = query
+    return query
@@ -0,0 +1,201 @@
+"""Opt-in tracing of the paths read in an AttrDict tree.
+
+    with path_tracer.tracing(config) as trace:
+        run_service()
+    print sorted(trace.counts.items(), key=lambda item: -item[1])[:10]
+    worker_config = path_tracer.pruned_copy(trace)
+
+Like instrumentation, tracing replaces the __getitem__ methods of AttrDict
+and its subclasses with recording wrappers while it's active, there is no
+overhead when it's not. Attribute access, get_path and the magic functors
+all read through __getitem__. A read of `key` in a node is counted for the
+node path followed by `key`. Only the root is known when tracing starts,
+the other nodes get their path when they're read from a traced node, so
+a node referenced before tracing isn't counted until it's read again
+from the tree. Reads of nodes out of the traced tree aren't counted.
+
+At most `max_paths` different paths are counted, reads of other paths are
+only counted in `dropped`. Only one trace can be active at a time, the
+structures aren't synchronized, with several threads the counts are
+approximate.
+"""
+import collections
+import contextlib
+import weakref
+
+from attrdict import AttrDict, NO_VALUE
+
+# The active Trace, or None
+_trace = None
+
+# id(node) -> _NodeRef for the nodes of the traced tree
+_nodes = {}
+
+# (id(node), key) of the reads in progress. Subclasses' __getitem__ call
+# the one of their base for the same read, which mustn't count it again.
+_reading = set()
+
+# (owner, name, original attribute) for every patch applied
+_patches = []
+
+
+class Trace(object):
+    """Paths read in `tree`
+
+    `counts` maps paths to their number of reads, `dropped` is the number
+    of reads of paths which didn't fit in `max_paths`.
+    """
+    def __init__(self, tree, max_paths):
+        self.tree = tree
+        self.max_paths = max_paths
+        self.counts = {}
+        self.dropped = 0
+
+    def __repr__(self):
+        return 'Trace(%d paths, %d dropped)' % (len(self.counts), self.dropped)
+
+
+class _NodeRef(weakref.ref):
+    "weak reference to a traced node, forgotten with it"
+    __slots__ = ('node_id', 'path')
+
+    def __new__(cls, node, path):
+        return super(_NodeRef, cls).__new__(cls, node, _forget)
+
+    def __init__(self, node, path):
+        super(_NodeRef, self).__init__(node, _forget)
+        self.node_id = id(node)
+        self.path = path
+
+
+def _forget(ref):
+    if _nodes.get(ref.node_id) is ref:
+        del _nodes[ref.node_id]
+
+
+def _register(node, path):
+    _nodes[id(node)] = _NodeRef(node, path)
+
+
+def _record(node, key, value):
+    ref = _nodes.get(id(node))
+    if ref is None:
+        return
+    path = ref.path + (key,)
+    counts = _trace.counts
+    if path in counts:
+        counts[path] += 1
+    elif len(counts) < _trace.max_paths:
+        counts[path] = 1
+    else:
+        _trace.dropped += 1
+    if isinstance(value, AttrDict):
+        value_ref = _nodes.get(id(value))
+        if value_ref is None or value_ref.path != path:
+            _register(value, path)
+
+
+def _tracing_getitem(wrapped):
+    def __getitem__(self, key):
+        reading = (id(self), key)
+        if reading in _reading:
+            return wrapped(self, key)
+        _reading.add(reading)
+        try:
+            value = wrapped(self, key)
+        finally:
+            _reading.discard(reading)
+        _record(self, key, value)
+        return value
+    return __getitem__
+
+
+def _patch(owner, name, make_wrapper):
+    original = owner.__dict__[name]
+    wrapper = make_wrapper(original)
+    wrapper.__name__ = name
+    _patches.append((owner, name, original))
+    setattr(owner, name, wrapper)
+
+
+def _attrdict_classes():
+    "AttrDict and all of its subclasses"
+    result = []
+    stack = [AttrDict]
+    while stack:
+        cls = stack.pop()
+        if cls not in result:
+            result.append(cls)
+            stack.extend(cls.__subclasses__())
+    return result
+
+
+def is_tracing():
+    return _trace is not None
+
+
+def start(tree, max_paths=100000):
+    "start tracing the reads in `tree`, return the Trace filled in"
+    global _trace
+    if _trace is not None:
+        raise RuntimeError("already tracing", _trace.tree)
+    _register(tree, ())
+    _trace = Trace(tree, max_paths)
+    for cls in _attrdict_classes():
+        if '__getitem__' in cls.__dict__:
+            _patch(cls, '__getitem__', _tracing_getitem)
+    return _trace
+
+
+def stop():
+    "stop tracing, return the finished Trace or None if there was none"
+    global _trace
+    while _patches:
+        owner, name, original = _patches.pop()
+        setattr(owner, name, original)
+    _nodes.clear()
+    _reading.clear()
+    trace, _trace = _trace, None
+    return trace
+
+
+@contextlib.contextmanager
+def tracing(tree, max_paths=100000):
+    "trace the reads in `tree` inside the block, see start()"
+    trace = start(tree, max_paths)
+    try:
+        yield trace
+    finally:
+        stop()
+
+
+def pruned_copy(trace):
+    """Return an AttrDict with only the parts of the traced tree that were read
+
+    A mapping read without any read under it is copied whole, code which
+    iterates a mapping or passes it on usually needs all of it. Paths
+    which aren't in the tree anymore are skipped. Keys only tested with
+    `in` or has_path aren't kept. Values are read like the traced code
+    read them, through TypedAttrDict descriptors for instance.
+    """
+    if trace is _trace:
+        raise RuntimeError("trace still active")
+    # Tree of the read paths, key -> subtree of the paths under it
+    read = {}
+    for path in trace.counts:
+        node = read
+        for key in path:
+            node = node.setdefault(key, {})
+    result = AttrDict()
+    stack = [(trace.tree, read, result)]
+    while stack:
+        source, read_keys, target = stack.pop()
+        for key, read_under in read_keys.iteritems():
+            value = source.get(key, NO_VALUE)
+            if value is NO_VALUE:
+                continue
+            if read_under and isinstance(value, collections.Mapping):
+                stack.append((value, read_under, target._new_child(key)))
+            else:
+                target[key] = value
+    return result
@@ -123,26 +123,59 @@ def access_violation(self, *args, **kwargs):
     self._access_violation(method_name, *args, **kwargs)
 
 
-def create_restricted_object_cls(dont_override_methods=[]):
-    dont_override_methods = set(dont_override_methods)
+def _make_method_access_violation(method):
+    # XXX: functools.partial objects have no __get__
+    def method_access_violation(self, method_name=method, *args, **kwargs):
+        self._access_violation(method_name, *args, **kwargs)
+    return method_access_violation
 
-    class RestrictedObject(object):
-        def _access_violation(self, method_name, *args, **kwargs):
-            raise TypeError(method_name, args, kwargs)
 
+def _access_violation(self, method_name, *args, **kwargs):
+    raise TypeError(method_name, args, kwargs)
+
+
+def _parse_methods(methods):
+    result = {}
     for method in methods.split('\n'):
         method = method.strip()
         if not method or method.startswith('#'):
             continue
-        if method in dont_override_methods:
-            dont_override_methods.remove(method)
-            continue
+        result[method] = _make_method_access_violation(method)
+    return result
+
+# Method name -> function raising access violation, parsed once at import.
+# Functions are not bound to a class, so all classes can share them.
+_METHOD_TABLE = _parse_methods(methods)
+
+# These names mean something to type() itself, they are set afterwards
+_SET_AFTER_CREATION = frozenset(['__slots__'])
+
+_classes = {}
+
 
-        # XXX: functools.partial objects have no __get__
-        def method_access_violation(self, method_name=method, *args, **kwargs):
-            self._access_violation(method_name, *args, **kwargs)
+def create_restricted_object_cls(dont_override_methods=()):
+    """Return a class which raises TypeError from its special methods
 
-        setattr(RestrictedObject, method, method_access_violation)
-    if dont_override_methods:
-        raise ValueError("Unknown attributes", dont_override_methods)
-    return RestrictedObject
+    Classes are cached by the set of `dont_override_methods`, so calling
+    this twice with the same methods gives the same class.
+    """
+    dont_override_methods = frozenset(dont_override_methods)
+    try:
+        return _classes[dont_override_methods]
+    except KeyError:
+        pass
+    unknown = dont_override_methods.difference(_METHOD_TABLE)
+    if unknown:
+        raise ValueError("Unknown attributes", set(unknown))
+    namespace = dict(
+        (method, func) for method, func in _METHOD_TABLE.iteritems()
+        if method not in dont_override_methods
+        and method not in _SET_AFTER_CREATION
+    )
+    namespace['_access_violation'] = _access_violation
+    namespace['__module__'] = __name__
+    cls = type('RestrictedObject', (object,), namespace)
+    for method in _SET_AFTER_CREATION.difference(dont_override_methods):
+        setattr(cls, method, _METHOD_TABLE[method])
+    _classes[dont_override_methods] = cls
+    return cls
@@ -0,0 +1,125 @@
+"""AttrDict storing values in a list indexed by a shared key layout.
+
+Nodes created with the same set of keys share one immutable KeyLayout,
+each of them only keeps a list of values instead of its own hash table.
+Adding or deleting a key switches that node to a private dict, so the
+layout never changes once it's shared.
+"""
+import collections
+import weakref
+
+from attrdict import AttrDict, NO_VALUE
+
+
+class KeyLayout(object):
+    __slots__ = ['keys', 'index', '__weakref__']
+
+    def __init__(self, keys):
+        self.keys = tuple(keys)
+        self.index = dict((key, i) for i, key in enumerate(self.keys))
+
+    def __repr__(self):
+        return 'KeyLayout(%r)' % (self.keys,)
+
+
+# frozenset of (type, key) -> KeyLayout, layouts go away with their last
+# node. Types are part of the signature, 'a' == u'a' and 1 == True but a
+# node must iterate its own keys.
+_layouts = weakref.WeakValueDictionary()
+
+
+def get_layout(keys):
+    "return the shared layout for `keys`"
+    keys = list(keys)
+    frozen_keys = frozenset((type(key), key) for key in keys)
+    layout = _layouts.get(frozen_keys)
+    if layout is None:
+        layout = _layouts[frozen_keys] = KeyLayout(keys)
+    return layout
+
+
+class SharedKeysAttrDict(AttrDict):
+    """AttrDict with key-sharing storage, see the module docstring.
+
+    In shared mode `_layout` is the KeyLayout and `_values` a list of
+    values, in private mode `_layout` is None and `_values` a dict.
+    """
+    def __init__(self, *args, **kwargs):
+        other = dict(*args, **kwargs)
+        layout = get_layout(other)
+        values = [None] * len(layout.keys)
+        index = layout.index
+        cls = self.__class__
+        for key, value in other.iteritems():
+            assert value is not NO_VALUE, repr(key)
+            if isinstance(value, collections.Mapping):
+                value = cls(value)
+            values[index[key]] = value
+        self._layout = layout
+        self._values = values
+
+    @property
+    def _dict(self):
+        "the values as a dict, switches the node to private mode"
+        layout = self._layout
+        if layout is not None:
+            self._values = dict(zip(layout.keys, self._values))
+            self._layout = None
+        return self._values
+
+    @_dict.setter
+    def _dict(self, value):
+        self._layout = None
+        self._values = value
+
+    def __setitem__(self, key, value):
+        assert value is not NO_VALUE, repr(key)
+        if isinstance(value, collections.Mapping):
+            value = self.__class__(value)
+        layout = self._layout
+        if layout is not None and key in layout.index:
+            self._values[layout.index[key]] = value
+        else:
+            self._dict[key] = value
+
+    def __getitem__(self, key):
+        layout = self._layout
+        if layout is not None:
+            return self._values[layout.index[key]]
+        return self._values[key]
+
+    def __delitem__(self, key):
+        del self._dict[key]
+
+    def _raw_get(self, key, default=None):
+        layout = self._layout
+        if layout is not None:
+            if key in layout.index:
+                return self._values[layout.index[key]]
+            return default
+        return self._values.get(key, default)
+
+    def _restore_raw(self, key, value):
+        layout = self._layout
+        if layout is not None and value is not NO_VALUE and key in layout.index:
+            self._values[layout.index[key]] = value
+        else:
+            super(SharedKeysAttrDict, self)._restore_raw(key, value)
+
+    def __contains__(self, key):
+        layout = self._layout
+        if layout is not None:
+            return key in layout.index
+        return key in self._values
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        layout = self._layout
+        if layout is not None:
+            return iter(layout.keys)
+        return iter(self._values)
+
+    def _repr_items(self):
+        return self.iteritems()
@@ -0,0 +1,152 @@
+"""TypedAttrDict records storing their fields in slots.
+
+    class Config(TypedAttrDict):
+        host = port = db = name = DictDescriptor()
+
+    ConfigRecord = record_class(Config)
+    config = ConfigRecord(host='localhost', db=dict(name='app'))
+    config.get_path(('db', 'name'))
+
+The record class is a subclass of the schema with one slot per declared
+field, a missing key being an empty slot. Nodes have neither the `_dict`
+table nor an instance __dict__, descriptor hooks run as usual since they
+go through the `_raw_*item` methods. Nested mappings are records of the
+same class, like for TypedAttrDict. Computed values are cached in a slot
+as well. Reads and writes cost about the same as with the schema class,
+the slot is found in a per-class table.
+
+Python 2 ABCs have no __slots__, so the instance __dict__ pointer is
+still there, it's just never filled.
+"""
+import collections
+
+from attrdict import ComputedField, DESCRIPTOR_ACTIONS, NO_VALUE
+
+
+def _slot_name(key):
+    return '_slot_' + key
+
+
+def declared_fields(cls):
+    "sorted keys of the dict-descriptors of `cls` having a stored value"
+    attributes = {}
+    for klass in reversed(cls.__mro__):
+        attributes.update(vars(klass))
+    return sorted(
+        key for key, value in attributes.iteritems()
+        if not key.startswith('_') and not isinstance(value, ComputedField) and any(
+            hasattr(type(value), method_name)
+            for method_name, _ in DESCRIPTOR_ACTIONS.itervalues())
+    )
+
+
+def record_class(cls, name=None):
+    """Return the slotted record class of TypedAttrDict subclass `cls`
+
+    The class is created once per `cls`, unless a `name` is given.
+    """
+    if name is None:
+        result = cls.__dict__.get('_record_class')
+        if result is not None:
+            return result
+    fields = declared_fields(cls)
+    result = type(name or cls.__name__ + 'Record', (SlottedRecord, cls), dict(
+        __slots__=[_slot_name(key) for key in fields],
+        __module__=cls.__module__,
+    ))
+    # (key, slot member descriptor) in iteration order
+    result._slot_members = tuple(
+        (key, result.__dict__[_slot_name(key)]) for key in fields)
+    result._slot_index = dict(result._slot_members)
+    if name is None:
+        cls._record_class = result
+    return result
+
+
+class SlottedRecord(object):
+    """Storage of the classes made by record_class, see the module docstring
+
+    Goes first in the bases, before the TypedAttrDict subclass.
+    """
+    __slots__ = ('_computed_values',)
+
+    def __init__(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).iteritems():
+            self[key] = value
+
+    @property
+    def _dict(self):
+        "copy of the stored values as a dict, read-only"
+        return dict(self._repr_items())
+
+    # The slot tables are read from the class, going through the
+    # instance costs a call of TypedAttrDict.__getattribute__
+    def _raw_getitem(self, key):
+        try:
+            return type(self)._slot_index[key].__get__(self)
+        except (KeyError, AttributeError):
+            raise KeyError(key)
+
+    def _raw_setitem(self, key, value):
+        assert value is not NO_VALUE, repr(key)
+        self._invalidate_computed((key,))
+        if isinstance(value, collections.Mapping):
+            value = self.__class__(value)
+        type(self)._slot_index[key].__set__(self, value)
+
+    def _raw_delitem(self, key):
+        self._invalidate_computed((key,))
+        try:
+            type(self)._slot_index[key].__delete__(self)
+        except (KeyError, AttributeError):
+            raise KeyError(key)
+
+    def _raw_get(self, key, default=None):
+        try:
+            return type(self)._slot_index[key].__get__(self)
+        except (KeyError, AttributeError):
+            return default
+
+    def _restore_raw(self, key, value):
+        member = type(self)._slot_index[key]
+        if value is not NO_VALUE:
+            member.__set__(self, value)
+            return
+        try:
+            member.__delete__(self)
+        except AttributeError:
+            pass
+
+    def __len__(self):
+        return sum(1 for key in self)
+
+    def __iter__(self):
+        return (key for key, value in self._repr_items())
+
+    def _repr_items(self):
+        for key, member in type(self)._slot_members:
+            try:
+                value = member.__get__(self)
+            except AttributeError:
+                continue
+            yield key, value
+
+    # An empty slot would fall back to AttrDict.__getattr__, the slot
+    # member is used directly
+    @property
+    def _computed_cache(self):
+        try:
+            return _computed_values.__get__(self)
+        except AttributeError:
+            cache = {}
+            _computed_values.__set__(self, cache)
+            return cache
+
+    def _peek_computed_cache(self):
+        try:
+            return _computed_values.__get__(self)
+        except AttributeError:
+            return None
+
+
+_computed_values = SlottedRecord.__dict__['_computed_values']
@@ -0,0 +1,170 @@
+import collections
+import contextlib
+import threading
+
+from attrdict import AttrDict, NO_VALUE
+
+
+class FrozenAttrDict(AttrDict):
+    """Immutable AttrDict.
+
+    Nested mappings are frozen too, already frozen subtrees are shared
+    instead of being copied, so it is safe to hand the same node to several
+    snapshots. Lists become tuples and sets frozensets, other mutable
+    leaves are stored as they are.
+    """
+    def __init__(self, *args, **kwargs):
+        self._dict = dict(
+            (key, freeze(value))
+            for key, value in dict(*args, **kwargs).iteritems()
+        )
+
+    def __setitem__(self, key, value):
+        raise TypeError("%s is immutable" % self.__class__.__name__, key)
+
+    def __delitem__(self, key):
+        raise TypeError("%s is immutable" % self.__class__.__name__, key)
+
+    def _new_child(self, key):
+        raise TypeError("%s is immutable" % self.__class__.__name__, key)
+
+
+def freeze(value):
+    """Return `value` with all nested mappings converted to FrozenAttrDict
+
+    Lists and tuples are converted to tuples of frozen items, sets to
+    frozensets. Subclasses of these types, namedtuples for instance, are
+    left alone.
+    """
+    if isinstance(value, FrozenAttrDict):
+        return value
+    value_type = type(value)
+    if value_type is list or value_type is tuple:
+        return tuple(freeze(item) for item in value)
+    if value_type is set:
+        return frozenset(value)
+    if isinstance(value, CopyOnWriteAttrDict):
+        if value._shared is not None:
+            # Unchanged view, see CopyOnWriteAttrDict
+            return value._shared[2]
+        # Don't go through __getitem__, frozen children are kept as they are
+        return FrozenAttrDict(value._dict)
+    if isinstance(value, collections.Mapping):
+        return FrozenAttrDict(value)
+    return value
+
+
+class CopyOnWriteAttrDict(AttrDict):
+    """AttrDict whose FrozenAttrDict children are copied on first write.
+
+    Reading a frozen child returns a view sharing its table, nothing is
+    copied. The first write into a view copies the table and puts the view
+    in place of the frozen child in its parent, which is made private the
+    same way first. Only the nodes on written paths become private copies,
+    everything else keeps pointing to the frozen subtrees it was created
+    from. A view whose frozen child was replaced in the parent meanwhile
+    isn't attached anymore.
+    """
+    # (parent, key, frozen child) while a view shares the child's table
+    _shared = None
+
+    @classmethod
+    def _from_frozen(cls, frozen):
+        result = cls.__new__(cls)
+        result._dict = dict(frozen._dict)
+        return result
+
+    def _view(self, key, frozen):
+        view = self.__class__.__new__(self.__class__)
+        # Other attributes, like the pool of InternedAttrDict, are the
+        # same as the parent's
+        view.__dict__.update(self.__dict__)
+        view._dict = frozen._dict
+        view._shared = (self, key, frozen)
+        return view
+
+    def _make_private(self):
+        "copy the table of a view and attach the view to its parent"
+        shared = self._shared
+        if shared is None:
+            return
+        parent, key, frozen = shared
+        parent._make_private()
+        self._dict = dict(self._dict)
+        self._shared = None
+        if parent._dict.get(key) is frozen:
+            parent._dict[key] = self
+
+    def __setitem__(self, key, value):
+        self._make_private()
+        if isinstance(value, FrozenAttrDict):
+            # Frozen subtrees are shared as is
+            self._dict[key] = value
+        else:
+            super(CopyOnWriteAttrDict, self).__setitem__(key, value)
+
+    def __getitem__(self, key):
+        value = self._dict[key]
+        if isinstance(value, FrozenAttrDict):
+            return self._view(key, value)
+        return value
+
+    def __delitem__(self, key):
+        self._make_private()
+        super(CopyOnWriteAttrDict, self).__delitem__(key)
+
+    def _new_child(self, key):
+        self._make_private()
+        return super(CopyOnWriteAttrDict, self)._new_child(key)
+
+    def _restore_raw(self, key, value):
+        self._make_private()
+        super(CopyOnWriteAttrDict, self)._restore_raw(key, value)
+
+
+class SnapshotAttrDict(object):
+    """Holder of a FrozenAttrDict which is replaced as a whole on update.
+
+    Readers call `snapshot()` and get a consistent immutable tree, no locks
+    are involved on the read side: publishing a new version is a single
+    reference assignment. Writers are serialized, each of them works on a
+    private copy-on-write draft, so unchanged subtrees are shared between
+    consecutive snapshots. An old snapshot is freed as soon as the last
+    reader drops it.
+    """
+    def __init__(self, *args, **kwargs):
+        self._current = FrozenAttrDict(*args, **kwargs)
+        self._write_lock = threading.Lock()
+
+    def snapshot(self):
+        return self._current
+
+    @contextlib.contextmanager
+    def update(self):
+        """Yield a draft of the current snapshot and publish it on exit.
+
+        If the block raises, the draft is thrown away and readers never
+        see any part of it.
+        """
+        with self._write_lock:
+            draft = CopyOnWriteAttrDict._from_frozen(self._current)
+            yield draft
+            self._current = freeze(draft)
+
+    def set_path(self, path, value):
+        with self.update() as draft:
+            draft.set_path(path, value)
+
+    def pop_path(self, path, default=NO_VALUE):
+        with self.update() as draft:
+            return draft.pop_path(path, default)
+
+    def inplace_merge(self, other):
+        with self.update() as draft:
+            draft._inplace_merge(other)
+
+    def __repr__(self):
+        return '{class_name}({snapshot!r})'.format(
+            class_name=self.__class__.__name__,
+            snapshot=self._current,
+        )
@@ -0,0 +1,114 @@
+"""AttrDict keeping its keys sorted.
+
+    users = SortedAttrDict()
+    users['user:42:name'] = 'ann'
+    list(users.iprefix('user:42:'))
+    list(users.irange('a', 'b'))
+
+Values are in a dict as usual, keys are also kept in a list of sorted
+blocks of bounded size, with the last key of every block in a separate
+list. Finding a key position is a bisect of that list and of one block,
+so inserts and deletes cost O(log n + block size), and range scans
+O(log n + k) for k keys returned. Iteration is in key order.
+"""
+import bisect
+import itertools
+
+from attrdict import AttrDict, NO_VALUE
+
+# Blocks are split when they get twice as big
+_BLOCK_SIZE = 512
+
+
+class SortedAttrDict(AttrDict):
+    def __init__(self, *args, **kwargs):
+        # Sorted blocks of keys, and the last key of each block
+        self._blocks = []
+        self._maxes = []
+        super(SortedAttrDict, self).__init__(*args, **kwargs)
+
+    def _insert_key(self, key):
+        blocks, maxes = self._blocks, self._maxes
+        if not maxes:
+            blocks.append([key])
+            maxes.append(key)
+            return
+        i = bisect.bisect_left(maxes, key)
+        if i == len(maxes):
+            i -= 1
+            block = blocks[i]
+            block.append(key)
+            maxes[i] = key
+        else:
+            block = blocks[i]
+            bisect.insort(block, key)
+        if len(block) > 2 * _BLOCK_SIZE:
+            blocks.insert(i + 1, block[_BLOCK_SIZE:])
+            del block[_BLOCK_SIZE:]
+            maxes.insert(i, block[-1])
+
+    def _remove_key(self, key):
+        blocks, maxes = self._blocks, self._maxes
+        i = bisect.bisect_left(maxes, key)
+        block = blocks[i]
+        j = bisect.bisect_left(block, key)
+        del block[j]
+        if not block:
+            del blocks[i]
+            del maxes[i]
+        elif j == len(block):
+            maxes[i] = block[-1]
+
+    def __setitem__(self, key, value):
+        if key not in self._dict:
+            self._insert_key(key)
+        super(SortedAttrDict, self).__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super(SortedAttrDict, self).__delitem__(key)
+        self._remove_key(key)
+
+    def _restore_raw(self, key, value):
+        if value is NO_VALUE:
+            if key in self._dict:
+                self._remove_key(key)
+        elif key not in self._dict:
+            self._insert_key(key)
+        super(SortedAttrDict, self)._restore_raw(key, value)
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._blocks)
+
+    def _repr_items(self):
+        return ((key, self._dict[key]) for key in self)
+
+    def irange(self, low=NO_VALUE, high=NO_VALUE, inclusive=(True, False)):
+        """Yield keys between `low` and `high` in order
+
+        Omitted bounds aren't checked, `inclusive` tells whether keys equal
+        to `low` and `high` are included. Changing the mapping while
+        iterating isn't supported.
+        """
+        blocks = self._blocks
+        i = j = 0
+        if low is not NO_VALUE:
+            find = bisect.bisect_left if inclusive[0] else bisect.bisect_right
+            i = find(self._maxes, low)
+            if i == len(blocks):
+                return
+            j = find(blocks[i], low)
+        for block in itertools.islice(blocks, i, None):
+            for key in itertools.islice(block, j, None):
+                if high is not NO_VALUE and (
+                        high < key or (not inclusive[1] and key == high)):
+                    return
+                yield key
+            j = 0
+
+    def iprefix(self, prefix):
+        "yield string (or tuple) keys starting with `prefix`, in order"
+        length = len(prefix)
+        for key in self.irange(prefix):
+            if not isinstance(key, (basestring, tuple)) or key[:length] != prefix:
+                return
+            yield key
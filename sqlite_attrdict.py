@@ -0,0 +1,315 @@
+"""AttrDict stored in a SQLite file, for trees bigger than memory.
+
+    tenants = SqliteAttrDict('tenants.db', cache_size=100000)
+    tenants.set_path(('acme', 'db', 'host'), 'localhost')
+    tenants.get_path(('acme', 'db', 'host'))
+    with tenants.batch():
+        for name, config in configs:
+            tenants[name] = config
+
+Every mapping and leaf is a row of the `nodes` table, linked to the row of
+its mapping by `parent`, so removing a mapping removes its subtree by
+cascade. Mappings read from the tree are handles on their row, nothing
+under them is loaded until it's asked for. The rows last looked up are
+kept in an LRU of `cache_size` entries, iteration streams rows from a
+cursor, so memory use doesn't depend on the size of the tree.
+
+Every change is written in a SQLite transaction, committed at the end of
+the operation, set_path, pop_path, inplace_merge and transaction()
+included, or at the end of the outermost `batch()` block. Operations and
+blocks nested in a batch run in savepoints, an error undoes the writes of
+the failed one only. merge() returns an in-memory AttrDict. Leaf values
+and keys are pickled: a leaf changed in place isn't saved until it's set
+again, and keys are equal when their pickles are. Changing the tree while iterating it isn't supported, and
+handles on removed mappings aren't usable anymore.
+"""
+import collections
+import contextlib
+import cPickle as pickle
+import sqlite3
+
+from attrdict import AttrDict, NO_VALUE, Transaction
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    parent INTEGER REFERENCES nodes (id) ON DELETE CASCADE,
+    key BLOB NOT NULL,
+    -- Pickled leaf, NULL for a mapping
+    value BLOB,
+    UNIQUE (parent, key)
+);
+INSERT OR IGNORE INTO nodes (id, parent, key) VALUES (1, NULL, X'');
+'''
+
+_ROOT_ID = 1
+
+
+def _dumps(obj):
+    return pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
+
+def _loads(blob):
+    return pickle.loads(str(blob))
+
+
+class _Store(object):
+    """Connection and LRU shared by the handles of one file
+
+    Keys are passed pickled. The LRU maps (parent id, pickled key) to
+    (node id, leaf value or NO_VALUE for a mapping).
+    """
+    def __init__(self, filename, cache_size):
+        # Transactions and savepoints are managed by batch()
+        self.connection = sqlite3.connect(filename, isolation_level=None)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(_SCHEMA)
+        self.cache_size = cache_size
+        self.lru = collections.OrderedDict()
+        self._batch_depth = 0
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Run the block in a transaction
+
+        Nested blocks run in a savepoint of the outer transaction, an
+        error in them only undoes their own writes.
+        """
+        depth = self._batch_depth
+        if depth:
+            savepoint = 'batch%d' % depth
+            begin = 'SAVEPOINT ' + savepoint
+            commit = 'RELEASE ' + savepoint
+            rollback = ['ROLLBACK TO ' + savepoint, commit]
+        else:
+            begin, commit, rollback = 'BEGIN', 'COMMIT', ['ROLLBACK']
+        execute = self.connection.execute
+        execute(begin)
+        self._batch_depth = depth + 1
+        try:
+            yield
+        except BaseException:
+            for statement in rollback:
+                execute(statement)
+            # Rows written by the block may be cached
+            self.lru.clear()
+            raise
+        else:
+            execute(commit)
+        finally:
+            self._batch_depth = depth
+
+    def _cache(self, cache_key, entry):
+        lru = self.lru
+        lru[cache_key] = entry
+        if len(lru) > self.cache_size:
+            lru.popitem(last=False)
+
+    def lookup(self, parent, key):
+        "return (node id, leaf value or NO_VALUE) at `key`, None if missing"
+        cache_key = (parent, key)
+        lru = self.lru
+        entry = lru.pop(cache_key, None)
+        if entry is not None:
+            lru[cache_key] = entry
+            return entry
+        row = self.connection.execute(
+            'SELECT id, value FROM nodes WHERE parent = ? AND key = ?',
+            (parent, sqlite3.Binary(key))).fetchone()
+        if row is None:
+            return None
+        node_id, value = row
+        entry = (node_id, NO_VALUE if value is None else _loads(value))
+        self._cache(cache_key, entry)
+        return entry
+
+    def remove(self, parent, key, entry):
+        "remove `key` with its subtree, `entry` is its lookup() result"
+        self.connection.execute('DELETE FROM nodes WHERE id = ?', (entry[0],))
+        self.lru.pop((parent, key), None)
+        if entry[1] is NO_VALUE:
+            # Entries under the removed mapping are stale
+            self.lru.clear()
+
+    def set_leaf(self, parent, key, value):
+        entry = self.lookup(parent, key)
+        if entry is not None and entry[1] is not NO_VALUE:
+            node_id = entry[0]
+            self.connection.execute(
+                'UPDATE nodes SET value = ? WHERE id = ?',
+                (sqlite3.Binary(_dumps(value)), node_id))
+        else:
+            if entry is not None:
+                self.remove(parent, key, entry)
+            node_id = self._insert(parent, key, _dumps(value))
+        self._cache((parent, key), (node_id, value))
+
+    def set_mapping(self, parent, key, mapping):
+        """Store a copy of `mapping` at `key`, return its node id
+
+        The copy is written unattached first, `mapping` may be under the
+        mapping it replaces.
+        """
+        entry = self.lookup(parent, key)
+        if (entry is not None and isinstance(mapping, SqliteAttrDict) and
+                mapping._store is self and mapping._id == entry[0]):
+            return entry[0]
+        node_id = self._insert(None, key, None)
+        stack = [(node_id, mapping)]
+        while stack:
+            node_parent, node = stack.pop()
+            for child_key, child_value in node.iteritems():
+                assert child_value is not NO_VALUE, repr(child_key)
+                if isinstance(child_value, collections.Mapping):
+                    child_id = self._insert(node_parent, _dumps(child_key), None)
+                    stack.append((child_id, child_value))
+                else:
+                    self._insert(
+                        node_parent, _dumps(child_key), _dumps(child_value))
+        if entry is not None:
+            self.remove(parent, key, entry)
+        self.connection.execute(
+            'UPDATE nodes SET parent = ? WHERE id = ?', (parent, node_id))
+        self._cache((parent, key), (node_id, NO_VALUE))
+        return node_id
+
+    def _insert(self, parent, key, value):
+        "insert a row with pickled `key` and `value`, None for a mapping"
+        if value is not None:
+            value = sqlite3.Binary(value)
+        return self.connection.execute(
+            'INSERT INTO nodes (parent, key, value) VALUES (?, ?, ?)',
+            (parent, sqlite3.Binary(key), value)).lastrowid
+
+    def children(self, parent):
+        "stream (key, node id, leaf value or NO_VALUE) of a mapping"
+        for key, node_id, value in self.connection.execute(
+                'SELECT key, id, value FROM nodes WHERE parent = ?', (parent,)):
+            yield (_loads(key), node_id,
+                   NO_VALUE if value is None else _loads(value))
+
+
+class _SqliteTransaction(Transaction):
+    "Transaction committed in one SQLite transaction, which undoes it"
+    def commit(self):
+        with self._root.batch():
+            return super(_SqliteTransaction, self).commit()
+
+
+class SqliteAttrDict(AttrDict):
+    def __init__(self, filename, data=(), cache_size=10000):
+        """
+        Open the tree in SQLite file `filename` (created if missing), and
+        set the items of `data` in it. At most `cache_size` looked up
+        nodes are kept in memory.
+        """
+        self._store = _Store(filename, cache_size)
+        self._id = _ROOT_ID
+        if data:
+            with self.batch():
+                for key, value in dict(data).iteritems():
+                    self[key] = value
+
+    def _handle(self, node_id):
+        "the mapping stored at row `node_id`"
+        handle = self.__class__.__new__(self.__class__)
+        handle._store = self._store
+        handle._id = node_id
+        return handle
+
+    def batch(self):
+        "context manager running the changes of the block in one transaction"
+        return self._store.batch()
+
+    def close(self):
+        "close the file, the tree and all of its handles can't be used after"
+        self._store.connection.close()
+
+    def _value(self, entry):
+        node_id, value = entry
+        return self._handle(node_id) if value is NO_VALUE else value
+
+    def __getitem__(self, key):
+        entry = self._store.lookup(self._id, _dumps(key))
+        if entry is None:
+            raise KeyError(key)
+        return self._value(entry)
+
+    def __contains__(self, key):
+        return self._store.lookup(self._id, _dumps(key)) is not None
+
+    def __setitem__(self, key, value):
+        assert value is not NO_VALUE, repr(key)
+        store = self._store
+        with store.batch():
+            if isinstance(value, collections.Mapping):
+                store.set_mapping(self._id, _dumps(key), value)
+            else:
+                store.set_leaf(self._id, _dumps(key), value)
+
+    def __delitem__(self, key):
+        store = self._store
+        encoded_key = _dumps(key)
+        with store.batch():
+            entry = store.lookup(self._id, encoded_key)
+            if entry is None:
+                raise KeyError(key)
+            store.remove(self._id, encoded_key, entry)
+
+    def _raw_get(self, key, default=None):
+        entry = self._store.lookup(self._id, _dumps(key))
+        return default if entry is None else self._value(entry)
+
+    def _restore_raw(self, key, value):
+        # Rolling back the savepoint or transaction of the commit, see
+        # _SqliteTransaction, restores the rows
+        pass
+
+    def _new_child(self, key):
+        with self._store.batch():
+            return self._handle(
+                self._store.set_mapping(self._id, _dumps(key), {}))
+
+    def __len__(self):
+        return self._store.connection.execute(
+            'SELECT COUNT(*) FROM nodes WHERE parent = ?', (self._id,)
+        ).fetchone()[0]
+
+    def __iter__(self):
+        return (key for key, node_id, value in self._store.children(self._id))
+
+    def _repr_items(self):
+        for key, node_id, value in self._store.children(self._id):
+            yield key, self._value((node_id, value))
+
+    def __eq__(self, other):
+        if isinstance(other, SqliteAttrDict) and (
+                other._store is self._store and other._id == self._id):
+            return True
+        return super(SqliteAttrDict, self).__eq__(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def set_path(self, path, value):
+        with self.batch():
+            super(SqliteAttrDict, self).set_path(path, value)
+
+    def setdefault_path(self, path, value=None):
+        with self.batch():
+            return super(SqliteAttrDict, self).setdefault_path(path, value)
+
+    def pop_path(self, path, default=NO_VALUE):
+        with self.batch():
+            return super(SqliteAttrDict, self).pop_path(path, default)
+
+    def _new_like(self, data=()):
+        "merges are done in a new in-memory AttrDict"
+        return AttrDict(data)
+
+    def transaction(self):
+        return _SqliteTransaction(self)
+
+    def _inplace_merge(self, other):
+        with self.batch():
+            return super(SqliteAttrDict, self)._inplace_merge(other)
@@ -1,12 +1,15 @@
 
+import gc
+
 import pytest
 import mock
 from mock import MagicMock, call
 
 from attrdict import (
-    AttrDict, PathTypeError, PathKeyError,
+    AttrDict, AutoAttrDict, PathTypeError, PathKeyError,
     path_functor_wrapper, merge, inplace_merge, generic_merge,
-    MergeError, TypedAttrDict, DictDescriptor
+    MergeError, TypedAttrDict, DictDescriptor, ComputedField, NO_VALUE,
+    gc_paused
 )
 
 AD = AttrDict
@@ -94,6 +97,41 @@ class TestBasicProperties(object):
         x = AD(element=1)
         assert repr(x) == str(x) == "AttrDict({'element': 1})"
 
+    def test_repr_nested(self):
+        x = AD(a=dict(b=dict()), c=[1])
+        assert repr(x) == "AttrDict({'a': AttrDict({'b': AttrDict({})}), 'c': [1]})"
+
+    def test_repr_max_depth(self):
+        class Limited(AD):
+            _repr_max_depth = 1
+        x = Limited(a=dict(b=1), c=dict())
+        assert repr(x) == "Limited({'a': Limited({...}), 'c': Limited({})})"
+
+    def test_repr_max_items(self):
+        class Limited(AD):
+            _repr_max_items = 2
+        x = Limited(a=dict((i, i) for i in range(5)))
+        assert repr(x) == "Limited({'a': Limited({0: 0, 1: 1, ...})})"
+
+    def test_repr_max_chars_stops_early(self):
+        class Limited(AD):
+            _repr_max_chars = 20
+        formatted = []
+
+        class Leaf(object):
+            def __repr__(self):
+                formatted.append(self)
+                return 'x' * 10
+        x = Limited((i, Leaf()) for i in range(100))
+        assert repr(x) == 'Limited({0: xxxxxxxx...'
+        assert len(formatted) == 1
+
+    def test_full_repr(self):
+        class Limited(AD):
+            _repr_max_depth = _repr_max_items = _repr_max_chars = 1
+        x = Limited(a=dict(b=1))
+        assert x.full_repr() == "Limited({'a': Limited({'b': 1})})"
+
     # Test that AttrDict doesn't share subdicts with another AttrDicts
 
     def test_update_dict_is_copied(self):
@@ -179,6 +217,30 @@ class TestGetMapping(object):
         assert x.root.branch is m
         assert isinstance(m, type(x))
 
+    def test_get_or_create_mapping_single_pass(self, ad2):
+        with mock.patch('attrdict.AttrDict._get_mapping') as get_mapping:
+            m = ad2._get_or_create_mapping(('root', 'branch', 'twig'))
+        assert not get_mapping.called
+        assert ad2.root.branch.twig is m
+        assert ad2.root.leaf == 2
+
+    def test_new_child(self, ad1):
+        child = ad1._new_child('branch')
+        assert ad1.branch is child
+        assert child == AD()
+        assert type(child) is AD
+
+    def test_new_child_through_setitem(self):
+        class Logged(AD):
+            def __setitem__(self, key, value):
+                keys.append(key)
+                super(Logged, self).__setitem__(key, value)
+        keys = []
+        logged = Logged()
+        logged.set_path(('A', 'B'), 1)
+        assert keys == ['A', 'B']
+        assert type(logged.A) is Logged
+
     def test_get_or_create_mapping_fails_to_create_attrdict(self, ad2):
         path = ('root', 'leaf')
         with pytest.raises(TypeError) as exc_info:
@@ -211,6 +273,49 @@ class TestGetPath(object):
     def test_depth_2_none_on_default(self, ad2):
         assert ad2.get_path(('root', 'unknown')) is None
 
+    def test_missing_intermediate_raises(self, ad3):
+        with pytest.raises(PathKeyError):
+            ad3.get_path(('root', 'unknown', 'leaf'), 'default')
+
+    def test_missing_intermediate_not_strict(self, ad3):
+        assert ad3.get_path(('root', 'unknown', 'leaf'), 'default', strict=False) == 'default'
+        assert ad3.get_path(('root', 'branch', 'leaf'), strict=False) == 3
+
+    def test_not_strict_still_raises_type_error(self, ad2):
+        with pytest.raises(PathTypeError):
+            ad2.get_path(('root', 'leaf', 'x'), strict=False)
+
+
+class TestProbePath(object):
+    def test_hit(self, ad3):
+        assert ad3.probe_path(('root', 'branch', 'leaf')) == 3
+        assert ad3.probe_path(['root', 'branch']) is ad3.root.branch
+
+    @pytest.mark.parametrize('path', [
+        ('unknown',),
+        ('root', 'unknown'),
+        ('root', 'unknown', 'leaf'),
+        ('root', 'branch', 'unknown'),
+    ])
+    def test_miss(self, ad3, path):
+        assert ad3.probe_path(path) is NO_VALUE
+        assert ad3 == AD(root=AD(branch=AD(leaf=3)))
+
+    def test_not_a_mapping(self, ad3):
+        path = ('root', 'branch', 'leaf', 'x')
+        with pytest.raises(PathTypeError) as exc_info:
+            ad3.probe_path(path)
+        assert_path_not_a_mapping_error(
+            exc_info, path=('root', 'branch'), key='leaf', full_path=path
+        )
+
+    def test_typed_attrdict(self):
+        class Tad(TypedAttrDict):
+            branch = leaf = DictDescriptor()
+        tad = Tad(branch=dict(leaf=1))
+        assert tad.probe_path(('branch', 'leaf')) == 1
+        assert tad.probe_path(('branch', 'unknown')) is NO_VALUE
+
 
 class CheckPathCalled(Exception):
     pass
@@ -223,6 +328,7 @@ class TestCheckPath(object):
         ("setdefault_path", [42]),
         ("pop_path", [42]),
         ("has_path", []),
+        ("probe_path", []),
     ])
 
     @all_methods_decorator
@@ -372,6 +478,9 @@ class TestHasPath(object):
     def test_depth_2_no(self, ad2):
         assert not ad2.has_path(('root', 'unknown'))
 
+    def test_missing_intermediate(self, ad2):
+        assert not ad2.has_path(('unknown', 'leaf'))
+
 
 class TestMagicSyntax(object):
     def test_get(self, ad3):
@@ -720,3 +829,292 @@ class TestTypedAttrDict(object):
         tad = Tad()
         tad.key = 'hello'
         assert tad.key == 'hello world'[::-1]
+
+
+class TestComputedField(object):
+    @pytest.fixture
+    def config(self):
+        calls = []
+
+        def url(dct):
+            calls.append(1)
+            return '%s:%s' % (dct.get_path(('db', 'host')),
+                              dct.get_path(('db', 'port')))
+
+        class Config(TypedAttrDict):
+            # Nested mappings are Config too
+            db = host = port = user = name = DictDescriptor()
+            url_ = ComputedField(url, depends_on=[('db', 'host'), ('db', 'port')])
+            title = ComputedField(lambda dct: dct.name.title(), depends_on=['name'])
+        config = Config()
+        config._raw_setitem('db', dict(host='localhost', port=5432, user='u'))
+        config._raw_setitem('name', 'main')
+        config._calls = calls
+        return config
+
+    def test_value_is_cached(self, config):
+        assert config.url_ == 'localhost:5432'
+        assert config['url_'] == 'localhost:5432'
+        assert len(config._calls) == 1
+
+    @pytest.mark.parametrize('write', [
+        lambda config: config.set_path(('db', 'port'), 6432),
+        lambda config: config.set.db.port(6432),
+        lambda config: config.__setitem__('db', dict(host='localhost', port=6432)),
+        lambda config: config._raw_setitem('db', dict(host='localhost', port=6432)),
+        lambda config: config._inplace_merge(dict(db=dict(port=6432))),
+    ])
+    def test_write_to_dependency_invalidates(self, config, write):
+        config.url_
+        write(config)
+        assert config.url_ == 'localhost:6432'
+        assert len(config._calls) == 2
+
+    def test_delete_of_dependency_invalidates(self, config):
+        assert config.title == 'Main'
+        config._raw_delitem('name')
+        with pytest.raises(AttributeError):
+            config.title
+
+    def test_unrelated_write_keeps_cache(self, config):
+        config.url_
+        config.title
+        config.set_path(('db', 'user'), 'admin')
+        config.name = 'other'
+        assert config.url_ == 'localhost:5432'
+        assert len(config._calls) == 1
+        assert config.title == 'Other'
+
+    def test_transaction_invalidates(self, config):
+        config.url_
+        with config.transaction() as tx:
+            tx.set(('db', 'host'), 'remote')
+        assert config.url_ == 'remote:5432'
+
+    def test_read_only(self, config):
+        with pytest.raises(TypeError):
+            config.title = 'x'
+
+    def test_del_drops_cached_value(self, config):
+        config.url_
+        del config.url_
+        config.url_
+        assert len(config._calls) == 2
+
+
+class TestAutoAttrDict(object):
+    def test_setattr_creates_intermediate_nodes(self):
+        x = AutoAttrDict()
+        x.a.b.c = 1
+        assert x == AD(a=AD(b=AD(c=1)))
+        assert type(x.a.b) is AutoAttrDict
+
+    def test_existing_value(self):
+        x = AutoAttrDict(a=dict(b=1))
+        assert x.a.b == 1
+
+    def test_getitem_doesnt_autovivify(self):
+        x = AutoAttrDict()
+        with pytest.raises(KeyError):
+            x['a']
+        assert 'a' not in x
+
+    def test_underscore_attributes_dont_autovivify(self):
+        x = AutoAttrDict()
+        with pytest.raises(AttributeError):
+            x._unknown
+        assert x == AD()
+
+    def test_set_path(self):
+        x = AutoAttrDict()
+        x.set_path(('a', 'b'), 1)
+        assert type(x.a) is AutoAttrDict
+
+
+class TestFromItems(object):
+    ITEMS = [
+        (('a', 'b', 'c'), 1),
+        (('a', 'b', 'd'), 2),
+        (('a', 'e'), dict(f=3)),
+        (('a', 'e', 'g'), 4),
+        (('h',), 5),
+    ]
+
+    @pytest.mark.parametrize('is_sorted', [False, True])
+    def test_builds_like_set_path(self, is_sorted):
+        expected = AD()
+        for path, value in self.ITEMS:
+            expected.set_path(path, value)
+        result = AD.from_items(iter(self.ITEMS), sorted=is_sorted)
+        assert result == expected
+        assert isinstance(result.a.e, AD)
+
+    def test_unsorted_input(self):
+        expected = AD()
+        for path, value in reversed(self.ITEMS):
+            expected.set_path(path, value)
+        assert AD.from_items(reversed(self.ITEMS)) == expected
+
+    def test_revisited_branch(self):
+        items = [(('a', 'x'), 1), (('b', 'y'), 2), (('a', 'z'), 3)]
+        assert AD.from_items(items) == AD(a=AD(x=1, z=3), b=AD(y=2))
+
+    def test_replaced_branch(self):
+        items = [(('a', 'b', 'c'), 1), (('a', 'b'), 2), (('a', 'b'), dict(d=3)),
+                 (('a', 'b', 'e'), 4)]
+        assert AD.from_items(items) == AD(a=AD(b=AD(d=3, e=4)))
+
+    @pytest.mark.parametrize('is_sorted', [False, True])
+    def test_path_type_error(self, is_sorted):
+        items = [(('a', 'b'), 1), (('a', 'b', 'c'), 2)]
+        with pytest.raises(PathTypeError) as exc_info:
+            AD.from_items(items, sorted=is_sorted)
+        assert_path_not_a_mapping_error(
+            exc_info, path=('a',), key='b', full_path=('a', 'b', 'c'))
+
+    def test_not_sorted(self):
+        with pytest.raises(ValueError):
+            AD.from_items([(('b',), 1), (('a',), 2)], sorted=True)
+
+    @pytest.mark.parametrize('path', [(), 'a', None])
+    def test_bad_path(self, path):
+        with pytest.raises((TypeError, ValueError)):
+            AD.from_items([(path, 1)])
+
+    def test_subclass(self):
+        result = AutoAttrDict.from_items([(('a', 'b'), 1)])
+        assert type(result.a) is AutoAttrDict
+
+
+class TestBulkLoad(object):
+    @pytest.mark.parametrize('enabled', [True, False])
+    def test_gc_paused_restores_state(self, enabled):
+        was_enabled = gc.isenabled()
+        (gc.enable if enabled else gc.disable)()
+        try:
+            with gc_paused():
+                assert not gc.isenabled()
+                with gc_paused():
+                    assert not gc.isenabled()
+                assert not gc.isenabled()
+            assert gc.isenabled() == enabled
+        finally:
+            (gc.enable if was_enabled else gc.disable)()
+
+    def test_gc_paused_on_error(self):
+        assert gc.isenabled()
+        with pytest.raises(ValueError):
+            with gc_paused():
+                raise ValueError
+        assert gc.isenabled()
+
+    def test_builds_like_constructor(self):
+        data = dict(a=dict(b=1, c='x'), d=None)
+        result = AD.bulk_load(data, e=2)
+        assert result == AD(data, e=2)
+        assert isinstance(result.a, AD)
+
+    def test_list_leaves_kept_by_default(self):
+        leaf = [1, 2]
+        assert AD.bulk_load(a=dict(b=leaf)).a.b is leaf
+
+    def test_list_leaves_become_tuples(self):
+        result = AD.bulk_load(dict(a=dict(b=[1, [2, 3]]), c=[]), tuple_leaves=True)
+        assert result.a.b == (1, (2, 3))
+        assert result.c == ()
+
+    def test_subclass(self):
+        assert type(AutoAttrDict.bulk_load(a=dict(b=1)).a) is AutoAttrDict
+
+
+class TestTransaction(object):
+    def test_operations_applied_on_exit(self, ad3):
+        with ad3.transaction() as tx:
+            tx.set(('root', 'branch', 'another'), 4)
+            tx.set(('new', 'branch'), 5)
+            tx.pop(('root', 'branch', 'leaf'))
+            assert ad3 == AD(root=AD(branch=AD(leaf=3)))
+        assert ad3 == AD(root=AD(branch=AD(another=4)), new=AD(branch=5))
+
+    def test_results(self, ad3):
+        with ad3.transaction() as tx:
+            tx.set(('root', 'x'), 1)
+            tx.setdefault(('root', 'x'), 2)
+            tx.pop(('root', 'branch', 'leaf'))
+            tx.pop(('root', 'unknown', 'leaf'), 42)
+        assert tx.results == [None, 1, 3, 42]
+
+    def test_paths_checked_up_front(self, ad1):
+        tx = ad1.transaction()
+        with pytest.raises(ValueError):
+            tx.set((), 1)
+        with pytest.raises(TypeError):
+            tx.pop(('a', []))
+
+    def test_exception_in_block_discards_operations(self, ad1):
+        with pytest.raises(RuntimeError):
+            with ad1.transaction() as tx:
+                tx.set(('another',), 2)
+                raise RuntimeError()
+        assert ad1 == AD(root=1)
+
+    def test_rollback_on_path_type_error(self, ad3):
+        path = ('root', 'branch', 'leaf', 'x')
+        with pytest.raises(PathTypeError) as exc_info:
+            with ad3.transaction() as tx:
+                tx.set(('root', 'branch', 'leaf'), 4)
+                tx.set(('root', 'new', 'deep'), 5)
+                tx.pop(('root', 'branch'))
+                tx.set(('root', 'branch', 'leaf'), 6)
+                tx.set(path, 7)
+        assert_path_not_a_mapping_error(
+            exc_info, path=('root', 'branch'), key='leaf', full_path=path
+        )
+        assert ad3 == AD(root=AD(branch=AD(leaf=3)))
+
+    def test_rollback_on_path_key_error(self, ad3):
+        branch = ad3.root.branch
+        path = ('root', 'unknown', 'leaf')
+        with pytest.raises(PathKeyError) as exc_info:
+            with ad3.transaction() as tx:
+                tx.pop(('root', 'branch'))
+                tx.pop(path)
+        assert_path_key_error(exc_info, 'unknown',
+                              path=('root',), full_path=path)
+        assert ad3.root.branch is branch
+
+    def test_rollback_on_missing_key(self, ad2):
+        with pytest.raises(PathKeyError):
+            with ad2.transaction() as tx:
+                tx.set(('root', 'leaf'), 5)
+                tx.pop(('root', 'unknown'))
+        assert ad2 == AD(root=AD(leaf=2))
+
+    def test_cursor_follows_replaced_branch(self, ad3):
+        with ad3.transaction() as tx:
+            tx.set(('root', 'branch', 'a'), 1)
+            tx.set(('root', 'branch'), {'b': 2})
+            tx.set(('root', 'branch', 'c'), 3)
+        assert ad3 == AD(root=AD(branch=AD(b=2, c=3)))
+
+    def test_rollback_removes_created_branches(self, ad1):
+        with pytest.raises(PathKeyError):
+            with ad1.transaction() as tx:
+                tx.set(('a', 'b', 'c'), 1)
+                tx.pop(('unknown',))
+        assert ad1 == AD(root=1)
+
+    def test_typed_attrdict_rollback_restores_raw_values(self):
+        class HelloWorld(DictDescriptor):
+            def __dictset__(self, dct, key, value):
+                super(HelloWorld, self).__dictset__(dct, key, value + ' world')
+
+        class Tad(TypedAttrDict):
+            key = HelloWorld()
+        tad = Tad()
+        tad.key = 'hello'
+        with pytest.raises(PathKeyError):
+            with tad.transaction() as tx:
+                tx.set(('key',), 'bye')
+                tx.pop(('unknown',))
+        assert tad.key == 'hello world'
@@ -0,0 +1,138 @@
+import array
+
+import pytest
+
+from attrdict import AttrDict, PathKeyError, PathTypeError
+from attrdict_table import AttrDictTable, Row
+
+AD = AttrDict
+
+
+@pytest.fixture
+def records():
+    return [AD(name='r%d' % i, db=dict(host='h%d' % i, port=i))
+            for i in range(3)]
+
+
+@pytest.fixture
+def table(records):
+    return AttrDictTable.from_records(records)
+
+
+class TestAttrDictTable(object):
+    def test_paths(self, table):
+        assert table.paths == [('db', 'host'), ('db', 'port'), ('name',)]
+
+    def test_len(self, table):
+        assert len(table) == 3
+
+    def test_column(self, table):
+        assert table.column(('db', 'port')) == [0, 1, 2]
+
+    def test_typecodes(self, records):
+        table = AttrDictTable.from_records(
+            records, typecodes={('db', 'port'): 'l'})
+        assert table.column(('db', 'port')) == array.array('l', [0, 1, 2])
+
+    def test_round_trip(self, table, records):
+        assert table.to_records() == records
+
+    def test_append(self, table):
+        table.append(dict(name='x', db=dict(host='y', port=5)))
+        assert table[-1].db.port == 5
+
+    @pytest.mark.parametrize('record', [
+        dict(name='x', db=dict(host='y')),
+        dict(name='x', db=dict(host='y', port=5, user='u')),
+        dict(name='x', db=5),
+    ])
+    def test_extend_checks_shape(self, table, record):
+        good = dict(name='x', db=dict(host='y', port=5))
+        with pytest.raises(ValueError):
+            table.extend([good, record])
+        assert len(table) == 3
+        assert len(table.column(('name',))) == 3
+
+    def test_extend_checks_typecodes(self, records):
+        for record in records:
+            record.name = len(record.name)
+        table = AttrDictTable.from_records(
+            records, typecodes={('db', 'port'): 'l', ('name',): 'l'})
+        with pytest.raises(TypeError):
+            table.extend([dict(name='x', db=dict(host='y', port=5))])
+        assert len(table) == 3
+        assert [len(table.column(path)) for path in table.paths] == [3, 3, 3]
+
+    def test_index_error(self, table):
+        with pytest.raises(IndexError):
+            table[3]
+
+    def test_from_no_records(self):
+        with pytest.raises(ValueError):
+            AttrDictTable.from_records([])
+
+    def test_leaf_and_branch_path(self):
+        with pytest.raises(ValueError):
+            AttrDictTable([('a',), ('a', 'b')])
+
+
+class TestRow(object):
+    def test_getattr(self, table):
+        assert table[1].db.host == 'h1'
+
+    def test_getitem(self, table):
+        assert table[1]['db']['port'] == 1
+
+    def test_branch_is_a_row(self, table):
+        assert isinstance(table[1].db, Row)
+
+    def test_equals_record(self, table, records):
+        assert table[2] == records[2]
+
+    def test_iteration(self, table):
+        assert sorted(table[0]) == ['db', 'name']
+        assert sorted(table[0].db) == ['host', 'port']
+
+    def test_unknown_key(self, table):
+        with pytest.raises(KeyError):
+            table[0]['unknown']
+        with pytest.raises(AttributeError):
+            table[0].unknown
+
+    def test_get_path(self, table):
+        assert table[1].get_path(('db', 'port')) == 1
+        assert table[1].db.get_path(('port',)) == 1
+        assert table[1].get_path(('db', 'unknown'), 42) == 42
+
+    @pytest.mark.parametrize('path, error', [
+        (('db', 'port', 'x'), PathTypeError),
+        (('nope', 'x'), PathKeyError),
+    ])
+    def test_get_path_errors(self, table, records, path, error):
+        for mapping in [table[1], records[1]]:
+            with pytest.raises(error):
+                mapping.get_path(path, 'default')
+        assert table[1].get_path(('nope', 'x'), 'default', strict=False) == 'default'
+
+    def test_set(self, table):
+        table[1].db.port = 10
+        table[1]['name'] = 'new'
+        assert table.column(('db', 'port')) == [0, 10, 2]
+        assert table[1].name == 'new'
+
+    def test_set_path(self, table):
+        table[2].set_path(('db', 'port'), 20)
+        assert table[2].db.port == 20
+
+    def test_set_path_unknown(self, table):
+        with pytest.raises(PathKeyError):
+            table[2].set_path(('db', 'user'), 'u')
+
+    def test_shape_cant_change(self, table):
+        with pytest.raises(KeyError):
+            table[0].db.user = 'u'
+        with pytest.raises(TypeError):
+            del table[0].name
+
+    def test_to_attrdict(self, table, records):
+        assert table[0].db.to_attrdict() == records[0].db
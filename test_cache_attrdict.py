@@ -0,0 +1,164 @@
+import pytest
+
+from attrdict import AttrDict, PathKeyError, merge
+from cache_attrdict import CacheAttrDict
+
+AD = AttrDict
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+class TestCacheAttrDict(object):
+    def test_behaves_like_attrdict(self):
+        cache = CacheAttrDict(dict(a=1))
+        cache.set_path(('b', 'c'), 2)
+        assert cache == AD(a=1, b=AD(c=2))
+        assert isinstance(cache.b, CacheAttrDict)
+        assert cache.stats()['leaves'] == 2
+
+    def test_evicts_least_recently_used(self):
+        cache = CacheAttrDict(max_leaves=2)
+        cache.set_path(('t', 'a'), 1)
+        cache.set_path(('t', 'b'), 2)
+        assert cache.t.a == 1
+        cache.set_path(('t', 'c'), 3)
+        assert cache == AD(t=AD(a=1, c=3))
+        assert cache.stats()['evictions'] == 1
+
+    @pytest.mark.parametrize('read', [
+        lambda cache: cache.t.a,
+        lambda cache: cache.get_path(('t', 'a')),
+        lambda cache: cache.get.t.a(),
+    ])
+    def test_reads_update_recency(self, read):
+        cache = CacheAttrDict(max_leaves=2)
+        cache.set_path(('t', 'a'), 1)
+        cache.set_path(('t', 'b'), 2)
+        assert read(cache) == 1
+        cache.set_path(('t', 'c'), 3)
+        assert 'b' not in cache.t
+
+    def test_eviction_prunes_empty_parents(self):
+        cache = CacheAttrDict(max_leaves=1)
+        cache.set_path(('a', 'b', 'c'), 1)
+        cache.set_path(('x', 'y'), 2)
+        assert cache == AD(x=AD(y=2))
+
+    def test_max_bytes(self):
+        cache = CacheAttrDict(max_bytes=10, sizeof=len)
+        cache.a = 'x' * 6
+        cache.b = 'y' * 4
+        cache.c = 'z'
+        assert cache == AD(b='yyyy', c='z')
+        assert cache.stats()['bytes'] == 5
+
+    def test_replacing_subtree_forgets_its_leaves(self):
+        cache = CacheAttrDict(max_leaves=3)
+        cache.a = dict(b=1, c=2)
+        cache.a = 3
+        del cache.a
+        assert cache.stats()['leaves'] == 0
+
+    def test_ttl(self, clock):
+        cache = CacheAttrDict(ttl=10, clock=clock)
+        cache.set_path(('a', 'b'), 1)
+        cache.set_path(('a', 'c'), 2, ttl=None)
+        clock.now = 10
+        assert 'b' not in cache.a
+        assert cache.get_path(('a', 'b')) is None
+        assert cache == AD(a=AD(c=2))
+        assert cache.stats()['expirations'] == 1
+
+    def test_expired_leaf_replaced_by_mapping(self, clock):
+        cache = CacheAttrDict(ttl=1, clock=clock)
+        cache.a = 1
+        clock.now = 5
+        cache.set_path(('a', 'b'), 2, ttl=None)
+        assert cache == AD(a=AD(b=2))
+        assert cache.stats()['leaves'] == 1
+
+    def test_expire(self, clock):
+        cache = CacheAttrDict(clock=clock)
+        cache.set_path(('a', 'b'), 1, ttl=1)
+        cache.set_path(('a', 'c'), 2, ttl=5)
+        clock.now = 2
+        assert cache.expire() == 1
+        assert cache == AD(a=AD(c=2))
+
+    def test_counters(self):
+        cache = CacheAttrDict(dict(a=1))
+        cache.a
+        cache.get_path(('b',))
+        assert 'a' in cache
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses']) == (1, 1)
+
+    def test_transaction_rollback(self):
+        cache = CacheAttrDict(dict(k=dict(v=0)), max_leaves=3)
+        with pytest.raises(PathKeyError):
+            with cache.transaction() as tx:
+                tx.set(('a', 'b'), 1)
+                tx.set(('x', 'y'), 2)
+                tx.set(('k',), 3)
+                tx.pop(('missing',))
+        assert cache == AD(k=AD(v=0))
+        assert cache.stats()['leaves'] == 1
+        cache.p = 1
+        cache.q = 2
+        cache.r = 3
+        assert cache == AD(p=1, q=2, r=3)
+        assert cache.stats()['leaves'] == 3
+
+    def test_merge_keeps_settings(self, clock):
+        cache = CacheAttrDict(dict(a=1), max_leaves=2, ttl=10, clock=clock)
+        merged = merge(cache, dict(b=2, c=dict(d=3)))
+        assert type(merged) is CacheAttrDict
+        assert merged == AD(b=2, c=AD(d=3))
+        clock.now = 10
+        assert merged.expire() == 2
+
+    def test_removed_subtree_is_detached(self):
+        cache = CacheAttrDict(max_leaves=2)
+        cache.set_path(('a', 'x'), 1)
+        sub = cache['a']
+        del cache['a']
+        sub['y'] = 2
+        assert cache.stats()['leaves'] == 0
+        assert sub.stats()['leaves'] == 2
+        cache.set_path(('b', 'c'), 3)
+        cache.set_path(('b', 'd'), 4)
+        cache.set_path(('b', 'e'), 5)
+        assert cache == AD(b=AD(d=4, e=5))
+
+    def test_evicted_subtree_is_detached(self):
+        cache = CacheAttrDict(max_leaves=1)
+        cache.set_path(('a', 'x'), 1)
+        sub = cache.a
+        cache.b = 2
+        sub.y = 3
+        assert cache == AD(b=2)
+        assert sub == AD(y=3)
+
+    def test_set_own_subtree(self):
+        cache = CacheAttrDict(dict(a=dict(b=1)))
+        cache.a = cache.a
+        assert cache == AD(a=AD(b=1))
+        assert cache.stats()['leaves'] == 1
+
+    def test_bulk_load_passes_settings(self):
+        cache = CacheAttrDict.bulk_load(
+            dict(a=[1], b=2), tuple_leaves=True, max_leaves=1)
+        assert cache._max_leaves == 1
+        assert len(cache) == 1
+        assert 'max_leaves' not in cache
@@ -0,0 +1,131 @@
+import gc
+import json
+import os
+import threading
+
+import pytest
+
+from attrdict import AttrDict, MergeError
+from file_config import FileConfigLoader
+from observable_attrdict import ObservableAttrDict
+
+AD = AttrDict
+
+
+@pytest.fixture
+def files(tmpdir):
+    paths = [str(tmpdir.join('defaults.json')), str(tmpdir.join('local.json'))]
+    write(paths[0], dict(db=dict(host='localhost', port=5432), debug=False))
+    write(paths[1], dict(db=dict(port=6432)))
+    return paths
+
+
+def write(path, data):
+    mtime = os.path.getmtime(path) if os.path.exists(path) else 0
+    with open(path, 'w') as file_:
+        json.dump(data, file_)
+    # Files are rewritten faster than the mtime resolution
+    os.utime(path, (mtime + 1, mtime + 1))
+
+
+class TestFileConfigLoader(object):
+    def test_later_files_override(self, files):
+        loader = FileConfigLoader(files)
+        assert loader.tree == AD(db=AD(host='localhost', port=6432), debug=False)
+
+    def test_missing_file_is_empty(self, files, tmpdir):
+        loader = FileConfigLoader(files + [str(tmpdir.join('missing.json'))])
+        assert loader.tree.db.port == 6432
+
+    def test_unchanged_files_arent_parsed(self, files):
+        parsed = []
+
+        def parser(file_):
+            parsed.append(file_.name)
+            return json.load(file_)
+        loader = FileConfigLoader(files, parser=parser)
+        del parsed[:]
+        assert loader.reload() == []
+        write(files[1], dict(db=dict(port=7432)))
+        assert loader.reload() == [('db', 'port')]
+        assert parsed == [files[1]]
+
+    def test_update_keeps_tree_identity(self, files):
+        loader = FileConfigLoader(files)
+        tree, db = loader.tree, loader.tree.db
+        write(files[0], dict(db=dict(host='remote', port=5432), debug=False))
+        assert loader.reload() == [('db', 'host')]
+        assert loader.tree is tree
+        assert tree.db is db
+        assert db.host == 'remote'
+
+    def test_override_removed_falls_back(self, files):
+        loader = FileConfigLoader(files)
+        write(files[1], dict())
+        assert loader.reload() == [('db', 'port')]
+        assert loader.tree.db.port == 5432
+
+    def test_removed_keys_and_empty_mappings(self, files):
+        loader = FileConfigLoader(files)
+        write(files[0], dict(debug=False, cache=dict(ttl=dict())))
+        os.remove(files[1])
+        assert loader.reload() == [
+            ('cache', 'ttl'), ('db', 'host'), ('db', 'port')]
+        assert loader.tree == AD(debug=False, cache=AD(ttl=AD()))
+
+    def test_leaf_replaced_by_mapping(self, files):
+        loader = FileConfigLoader(files)
+        write(files[0], dict(db=dict(host='localhost', port=5432),
+                             debug=dict(level=1)))
+        assert loader.reload() == [('debug',), ('debug', 'level')]
+        assert loader.tree.debug == AD(level=1)
+
+    def test_conflict_leaves_everything_as_it_was(self, files):
+        loader = FileConfigLoader(files)
+        write(files[1], dict(db=1))
+        with pytest.raises(MergeError):
+            loader.reload()
+        assert loader.tree == AD(db=AD(host='localhost', port=6432), debug=False)
+        with pytest.raises(MergeError):
+            loader.reload()
+
+    def test_parse_error_is_retried(self, files):
+        loader = FileConfigLoader(files)
+        with open(files[1], 'w') as file_:
+            file_.write('{"db": ')
+        os.utime(files[1], (0, 0))
+        with pytest.raises(ValueError):
+            loader.reload()
+        write(files[1], dict(db=dict(port=1)))
+        assert loader.reload() == [('db', 'port')]
+
+    def test_bulk(self, files):
+        enabled = []
+
+        def parser(file_):
+            enabled.append(gc.isenabled())
+            return json.load(file_)
+        loader = FileConfigLoader(files, parser=parser, bulk=True)
+        assert enabled == [False, False]
+        assert gc.isenabled()
+        assert loader.tree.db.port == 6432
+
+    def test_factory(self, files):
+        loader = FileConfigLoader(files, factory=ObservableAttrDict)
+        events = []
+        loader.tree.subscribe(('db',), events.append)
+        write(files[1], dict(db=dict(port=1)))
+        loader.reload()
+        assert [event.path for event in events] == [('db', 'port')]
+
+    def test_watch(self, files):
+        loader = FileConfigLoader(files)
+        changed = threading.Event()
+        watcher = loader.watch(interval=0.01, callback=lambda paths: changed.set())
+        try:
+            write(files[1], dict(db=dict(port=1)))
+            assert changed.wait(5)
+        finally:
+            watcher.stop()
+        assert loader.tree.db.port == 1
+        assert not watcher.is_alive()
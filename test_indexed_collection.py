@@ -0,0 +1,89 @@
+import pytest
+
+from attrdict import AttrDict
+from indexed_collection import IndexedCollection
+
+AD = AttrDict
+
+
+def _names(records):
+    return sorted(record.name for record in records)
+
+
+@pytest.fixture
+def users():
+    return IndexedCollection(
+        [
+            dict(name='ann', age=30, owner=dict(team='core')),
+            dict(name='bob', age=25, owner=dict(team='web')),
+            dict(name='cid', age=41, owner=dict(team='core')),
+            dict(name='dan', tags=['x']),
+        ],
+        indexes=[('owner', 'team'), 'tags'],
+        sorted_indexes=['age'],
+    )
+
+
+def _get(users, name):
+    return next(record for record in users if record.name == name)
+
+
+class TestIndexedCollection(object):
+    def test_find(self, users):
+        assert _names(users.find(('owner', 'team'), 'core')) == ['ann', 'cid']
+        assert users.find(('owner', 'team'), 'unknown') == []
+        assert users.count(['owner', 'team'], 'web') == 1
+
+    def test_find_range(self, users):
+        assert [r.name for r in users.find_range('age', 25, 41)] == ['bob', 'ann']
+        assert [r.name for r in users.find_range('age', low=30)] == ['ann', 'cid']
+        assert [r.name for r in users.find_range('age')] == ['bob', 'ann', 'cid']
+
+    def test_unhashable_values_arent_indexed(self, users):
+        assert users.count('tags', ('x',)) == 0
+
+    @pytest.mark.parametrize('change', [
+        lambda record: record.set_path(('owner', 'team'), 'web'),
+        lambda record: record.owner.__setitem__('team', 'web'),
+        lambda record: setattr(record, 'owner', dict(team='web')),
+        lambda record: record.set.owner.team('web'),
+    ])
+    def test_changes_update_index(self, users, change):
+        change(_get(users, 'ann'))
+        assert _names(users.find(('owner', 'team'), 'core')) == ['cid']
+        assert _names(users.find(('owner', 'team'), 'web')) == ['ann', 'bob']
+
+    def test_removed_path_leaves_index(self, users):
+        ann = _get(users, 'ann')
+        ann.pop_path(('owner', 'team'))
+        assert _names(users.find(('owner', 'team'), 'core')) == ['cid']
+        ann.age = 50
+        assert [r.name for r in users.find_range('age', 40)] == ['cid', 'ann']
+
+    def test_detached_subtree_doesnt_update_index(self, users):
+        ann = _get(users, 'ann')
+        owner = ann.owner
+        ann.owner = dict(team='web')
+        owner.team = 'core'
+        assert users.count(('owner', 'team'), 'core') == 1
+
+    def test_add_and_remove(self, users):
+        eve = users.add(AD(name='eve', owner=dict(team='web')))
+        assert eve in users
+        assert _names(users.find(('owner', 'team'), 'web')) == ['bob', 'eve']
+        users.remove(eve)
+        eve.set_path(('owner', 'team'), 'core')
+        assert len(users) == 4
+        assert _names(users.find(('owner', 'team'), 'core')) == ['ann', 'cid']
+
+    def test_add_index_later(self, users):
+        users.add_index('name')
+        assert _names(users.find('name', 'bob')) == ['bob']
+
+    def test_errors(self, users):
+        with pytest.raises(KeyError):
+            users.find('name', 'bob')
+        with pytest.raises(TypeError):
+            users.find_range(('owner', 'team'))
+        with pytest.raises(ValueError):
+            users.add_index('age')
@@ -0,0 +1,112 @@
+import pytest
+
+import attrdict
+import instrumentation
+from attrdict import (
+    AttrDict, TypedAttrDict, DictDescriptor, PathKeyError,
+    PathTypeError, merge
+)
+
+AD = AttrDict
+
+
+@pytest.fixture(autouse=True)
+def clean_instrumentation():
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_by_default():
+    assert not instrumentation.is_enabled()
+    AD(a=dict(b=1)).get_path(('a', 'b'))
+    assert instrumentation.stats()['node_conversions'] == 0
+
+
+def test_disable_restores_original_functions():
+    originals = [
+        AttrDict.__dict__['__setitem__'],
+        AttrDict.__dict__['_get_mapping'],
+        TypedAttrDict.__dict__['_action_func'],
+        attrdict.generic_merge,
+    ]
+    instrumentation.enable()
+    assert AttrDict.__dict__['__setitem__'] is not originals[0]
+    instrumentation.disable()
+    assert originals == [
+        AttrDict.__dict__['__setitem__'],
+        AttrDict.__dict__['_get_mapping'],
+        TypedAttrDict.__dict__['_action_func'],
+        attrdict.generic_merge,
+    ]
+    assert '__init__' not in PathKeyError.__dict__
+    assert '__init__' not in PathTypeError.__dict__
+
+
+def test_counters():
+    instrumentation.enable()
+    d = AD(a=dict(b=dict(c=1)))
+    d.get_path(('a', 'b', 'c'))
+    with pytest.raises(PathKeyError):
+        d.pop_path(('a', 'unknown', 'c'))
+    with pytest.raises(PathTypeError):
+        d.set_path(('a', 'b', 'c', 'd'), 1)
+    merge(d, dict(a=dict(b=dict(c=2))))
+    stats = instrumentation.stats()
+    assert stats['path_key_errors'] == 1
+    assert stats['path_type_errors'] == 1
+    assert stats['merge_nodes'] == 3
+    assert stats['path_depths'][2] == 2
+    assert stats['node_conversions'] > 0
+
+
+def test_path_functors():
+    d = AD(a=dict(b=1))
+    with instrumentation.measure() as stats:
+        d.set.a.b = 2
+    assert stats['path_functors'] == 1
+
+
+def test_descriptor_dispatches():
+    class Tad(TypedAttrDict):
+        key = DictDescriptor()
+    tad = Tad()
+    with instrumentation.measure() as stats:
+        tad.key = 1
+        tad.key
+    assert stats['descriptor_dispatches'] == 2
+
+
+def test_measure_is_scoped():
+    with instrumentation.measure() as stats:
+        AD(a=dict(b=1))
+    assert stats['node_conversions'] == 1
+    assert not instrumentation.is_enabled()
+    AD(a=dict(b=1))
+    assert instrumentation.stats()['node_conversions'] == 1
+
+
+def test_measure_keeps_enabled_instrumentation():
+    instrumentation.enable()
+    with instrumentation.measure():
+        pass
+    assert instrumentation.is_enabled()
+
+
+def test_reset():
+    instrumentation.enable()
+    AD(a=dict(b=1))
+    instrumentation.reset()
+    assert instrumentation.stats()['node_conversions'] == 0
+
+
+def test_depths_of_all_path_methods():
+    d = AD(a=dict(b=dict(c=1)))
+    with instrumentation.measure() as stats:
+        d.set_path(('a', 'x'), 1)
+        d.setdefault_path(('a', 'b', 'd'), 2)
+        d.has_path(('a', 'b', 'c'))
+        d.get_path(('a', 'y'), strict=False)
+        d.get_path(('a', 'b', 'c'))
+    assert stats['path_depths'] == {1: 2, 2: 3}
@@ -0,0 +1,102 @@
+import pytest
+
+from attrdict import AttrDict
+from interned_attrdict import InternedAttrDict, InternPool
+from memory_report import deep_sizeof
+
+AD = AttrDict
+
+
+def _hosts(count=3):
+    return dict(
+        ('host%d' % i, dict(port=80, opts=dict(timeout=1.5, name='web')))
+        for i in range(count)
+    )
+
+
+class TestInternPool(object):
+    def test_identical_subtrees_are_shared(self):
+        pool = InternPool()
+        hosts = pool.intern(_hosts())
+        assert hosts._dict['host0'] is hosts._dict['host1']
+        assert hosts == AD(_hosts())
+        # Both the host blocks and the opts inside them
+        assert pool.stats()['node_hits'] == 4
+
+    def test_leaves_are_shared(self):
+        pool = InternPool()
+        result = pool.intern(dict(a='x' * 100, b=dict(c='x' * 100)))
+        assert result._dict['a'] is result._dict['b']._dict['c']
+
+    def test_nodes_matched_by_leaf_values(self):
+        pool = InternPool()
+        first = pool.intern(dict(a=dict(x=1.5)))
+        second = pool.intern(dict(b=dict(x=float('1.5'))))
+        assert first._dict['a'] is second._dict['b']
+
+    def test_dead_nodes_are_forgotten(self):
+        pool = InternPool()
+        tree = InternedAttrDict.load(_hosts(), pool)
+        for i in range(100):
+            tree.set_path(('host0', 'opts'), dict(timeout=i))
+        assert pool.stats()['nodes'] <= 4
+        del tree
+        assert pool.stats()['nodes'] == 0
+
+    def test_mutable_leaves_arent_shared(self):
+        pool = InternPool()
+        result = pool.intern(dict(a=dict(l=[1]), b=dict(l=[1])))
+        assert result._dict['a'] is not result._dict['b']
+        assert result._dict['a']._dict['l'] is not result._dict['b']._dict['l']
+
+    @pytest.mark.parametrize('left,right', [
+        (0.0, -0.0),
+        (1, True),
+        (1, 1.0),
+    ])
+    def test_equal_values_of_different_kinds_arent_mixed(self, left, right):
+        pool = InternPool()
+        result = pool.intern(dict(a=dict(x=left), b=dict(x=right)))
+        assert repr(result._dict['b']._dict['x']) == repr(right)
+
+    def test_stats(self):
+        pool = InternPool()
+        pool.intern(_hosts(100))
+        stats = pool.stats()
+        assert stats['bytes_saved'] == stats['bytes_total'] - stats['bytes_unique']
+        assert stats['bytes_unique'] < stats['bytes_total'] / 5
+
+
+class TestInternedAttrDict(object):
+    def test_equals_source(self):
+        assert InternedAttrDict(_hosts()) == AD(_hosts())
+        assert InternedAttrDict(_hosts()) != AD(host0=1)
+
+    def test_write_doesnt_leak_to_shared_copies(self):
+        hosts = InternedAttrDict(_hosts())
+        hosts.host0.opts.timeout = 3
+        hosts.set_path(('host1', 'opts', 'extra'), dict(a=1))
+        assert hosts.host2 == AD(port=80, opts=AD(timeout=1.5, name='web'))
+        assert hosts.host0.opts.timeout == 3
+        assert hosts.host1.opts.extra == AD(a=1)
+
+    def test_reads_dont_copy_shared_nodes(self):
+        hosts = InternedAttrDict(_hosts(100))
+        size = deep_sizeof(hosts)
+        for key in hosts:
+            assert hosts[key].opts.timeout == 1.5
+            assert hosts.get_path((key, 'opts', 'name')) == 'web'
+        assert hosts._dict['host0'] is hosts._dict['host1']
+        assert deep_sizeof(hosts) == size
+
+    def test_new_branches_use_the_same_pool(self):
+        hosts = InternedAttrDict(_hosts())
+        hosts.set_path(('new', 'host'), dict(port=80, opts=dict(timeout=1.5, name='web')))
+        assert hosts.new._dict['host'] is hosts._dict['host0']
+
+    def test_load_with_shared_pool(self):
+        pool = InternPool()
+        first = InternedAttrDict.load(_hosts(), pool)
+        second = InternedAttrDict.load(_hosts(), pool)
+        assert first._dict['host0'] is second._dict['host0']
+        assert first.intern_stats() == pool.stats()
@@ -0,0 +1,75 @@
+import sys
+
+from attrdict import AttrDict, TypedAttrDict, DictDescriptor
+from interned_attrdict import InternedAttrDict
+from memory_report import memory_report, deep_sizeof
+
+AD = AttrDict
+
+
+def _tree():
+    return AD(
+        big=dict(('k%d' % i, 'v' * 100) for i in range(100)),
+        small=dict(a=1),
+        leaf='x',
+    )
+
+
+def _by_path(report):
+    return dict((entry.path, entry) for entry in report)
+
+
+class TestMemoryReport(object):
+    def test_root_matches_deep_sizeof(self):
+        tree = _tree()
+        report = memory_report(tree)
+        assert report[0].path == ()
+        assert report[0].size == deep_sizeof(tree)
+
+    def test_sorted_breakdown(self):
+        report = memory_report(_tree())
+        assert [entry.path for entry in report] == [(), ('big',), ('small',)]
+        entries = _by_path(report)
+        assert entries[()].nodes == 3
+        assert entries[()].leaves == 102
+        assert entries[('small',)].leaves == 1
+
+    def test_subtree_sizes_add_up(self):
+        tree = _tree()
+        entries = _by_path(memory_report(tree))
+        root_only = deep_sizeof(tree) - deep_sizeof(tree.big) - deep_sizeof(tree.small)
+        # Strings like '_dict' are shared between nodes, they are counted
+        # for the root here and for the first subtree in the report
+        assert entries[()].size - entries[('big',)].size - entries[('small',)].size >= root_only
+
+    def test_max_depth(self):
+        tree = AD()
+        tree.set_path(('a', 'b', 'c'), 1)
+        assert sorted(entry.path for entry in memory_report(tree, max_depth=2)) == [
+            (), ('a',), ('a', 'b')]
+        assert [entry.path for entry in memory_report(tree, max_depth=0)] == [()]
+
+    def test_shared_objects_counted_once(self):
+        tree = InternedAttrDict(
+            a=dict(x=dict(y=1)), b=dict(x=dict(y=1)))
+        entries = _by_path(memory_report(tree))
+        assert entries[()].nodes == 3
+        assert min(entries[('a',)].size, entries[('b',)].size) == 0
+
+    def test_deep_tree(self):
+        tree = AD()
+        tree.set_path(('k',) * (sys.getrecursionlimit() * 2), 1)
+        assert memory_report(tree)[0].leaves == 1
+
+    def test_sample_extrapolates(self):
+        tree = AD(root=dict(('k%d' % i, dict(v=i)) for i in range(1000)))
+        exact = _by_path(memory_report(tree))[('root',)]
+        sampled = _by_path(memory_report(tree, sample=100))[('root',)]
+        assert sampled.nodes == exact.nodes
+        assert abs(sampled.size - exact.size) < exact.size * 0.1
+
+    def test_typed_attrdict(self):
+        class Tad(TypedAttrDict):
+            a = b = DictDescriptor()
+        tree = Tad(a=dict(b=1))
+        assert _by_path(memory_report(tree))[('a',)].leaves == 1
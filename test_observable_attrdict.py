@@ -0,0 +1,163 @@
+import threading
+
+import pytest
+from mock import MagicMock, call
+
+from attrdict import AttrDict, PathKeyError, inplace_merge
+from observable_attrdict import (
+    ObservableAttrDict, ChangeEvent, SubscriptionTrie
+)
+
+AD = AttrDict
+
+
+@pytest.fixture
+def od():
+    return ObservableAttrDict(a=dict(b=dict(c=1)), x=1)
+
+
+def subscribe(od, prefix=()):
+    callback = MagicMock()
+    od.subscribe(prefix, callback)
+    return callback
+
+
+class TestSubscriptionTrie(object):
+    def test_match_ancestors_and_descendants(self):
+        trie = SubscriptionTrie()
+        for prefix in [(), ('a',), ('a', 'b'), ('a', 'b', 'c'), ('x',)]:
+            trie.add(prefix, prefix)
+        assert sorted(trie.match(('a', 'b'))) == [
+            (), ('a',), ('a', 'b'), ('a', 'b', 'c')
+        ]
+
+    def test_remove_prunes_empty_branches(self):
+        trie = SubscriptionTrie()
+        trie.add(('a', 'b'), 'sub')
+        trie.remove(('a', 'b'), 'sub')
+        assert not trie
+        assert trie.match(('a', 'b')) == []
+
+
+class TestObservableAttrDict(object):
+    def test_setitem(self, od):
+        callback = subscribe(od)
+        od['y'] = 2
+        callback.assert_called_once_with(ChangeEvent('set', ('y',), 2))
+
+    def test_delattr(self, od):
+        callback = subscribe(od)
+        del od.x
+        callback.assert_called_once_with(ChangeEvent('del', ('x',), None))
+
+    def test_set_path(self, od):
+        callback = subscribe(od, ('a', 'b'))
+        od.set_path(('a', 'b', 'd'), 2)
+        callback.assert_called_once_with(
+            ChangeEvent('set', ('a', 'b', 'd'), 2))
+
+    def test_set_path_new_branch(self, od):
+        callback = subscribe(od, ('n',))
+        od.set_path(('n', 'm'), 2)
+        assert [args[0].path for args, _ in callback.call_args_list] == [
+            ('n',), ('n', 'm')]
+
+    def test_pop_path(self, od):
+        callback = subscribe(od, ('a',))
+        od.pop_path(('a', 'b', 'c'))
+        callback.assert_called_once_with(
+            ChangeEvent('del', ('a', 'b', 'c'), None))
+
+    def test_unrelated_subscribers_not_called(self, od):
+        callback = subscribe(od, ('x',))
+        od.set_path(('a', 'b', 'c'), 2)
+        assert not callback.called
+
+    def test_replacing_ancestor_notifies_descendant_subscribers(self, od):
+        callback = subscribe(od, ('a', 'b', 'c'))
+        od.a = {'b': {'c': 2}}
+        callback.assert_called_once_with(
+            ChangeEvent('set', ('a',), AD(b=AD(c=2))))
+
+    def test_subscription_on_nested_node_has_relative_path(self, od):
+        callback = subscribe(od.a)
+        od.set_path(('a', 'b', 'c'), 2)
+        callback.assert_called_once_with(ChangeEvent('set', ('b', 'c'), 2))
+
+    def test_detached_node_doesnt_notify(self, od):
+        callback = subscribe(od)
+        old = od.a
+        od.a = {}
+        callback.reset_mock()
+        old.b.c = 2
+        assert not callback.called
+
+    def test_merge(self, od):
+        callback = subscribe(od, ('a', 'b', 'd'))
+        inplace_merge(od, dict(a=dict(b=dict(d=5))))
+        assert call(ChangeEvent('set', ('a', 'b', 'd'), 5)) in \
+            callback.call_args_list
+
+    def test_nested_subscription_survives_merge(self, od):
+        child = od.a
+        callback = subscribe(child)
+        root_callback = subscribe(od)
+        inplace_merge(od, dict(a=dict(b=dict(d=5))))
+        assert od.a is child
+        callback.assert_called_once_with(ChangeEvent('set', ('b', 'd'), 5))
+        root_callback.assert_called_once_with(
+            ChangeEvent('set', ('a', 'b', 'd'), 5))
+        od.set_path(('a', 'b', 'c'), 2)
+        assert callback.call_count == 2
+
+    def test_cancel(self, od):
+        callback = MagicMock()
+        subscription = od.subscribe(('x',), callback)
+        subscription.cancel()
+        od.x = 2
+        assert not callback.called
+        assert not od._trie
+
+    def test_batch_coalesces_events(self, od):
+        callback = subscribe(od)
+        with od.batch():
+            od.x = 2
+            od.set_path(('a', 'b', 'c'), 3)
+            with od.batch():
+                od.x = 3
+            assert not callback.called
+        assert callback.call_args_list == [
+            call(ChangeEvent('set', ('a', 'b', 'c'), 3)),
+            call(ChangeEvent('set', ('x',), 3)),
+        ]
+
+    def test_transaction_rollback(self, od):
+        callback = subscribe(od)
+        old = od.a
+        with pytest.raises(PathKeyError):
+            with od.transaction() as tx:
+                tx.set(('a',), 2)
+                tx.set(('n', 'm'), 3)
+                tx.pop(('missing',))
+        assert od == AD(a=AD(b=AD(c=1)), x=1)
+        assert od.a is old
+        assert callback.call_args_list[-3:] == [
+            call(ChangeEvent('del', ('n', 'm'), None)),
+            call(ChangeEvent('del', ('n',), None)),
+            call(ChangeEvent('set', ('a',), old)),
+        ]
+        callback.reset_mock()
+        od.a.b.c = 2
+        callback.assert_called_once_with(ChangeEvent('set', ('a', 'b', 'c'), 2))
+
+    def test_iterate_subscription_from_another_thread(self, od):
+        subscription = od.subscribe(('x',))
+        received = []
+        consumer = threading.Thread(
+            target=lambda: received.extend(subscription))
+        consumer.start()
+        od.x = 2
+        od.x = 3
+        subscription.cancel()
+        consumer.join()
+        assert [event.value for event in received] == [2, 3]
@@ -0,0 +1,100 @@
+import pytest
+
+from attrdict import AttrDict, PathTypeError
+from path_columns import collect_path, collect_paths, assign_path
+
+AD = AttrDict
+
+
+@pytest.fixture
+def records():
+    return [
+        AD(db=dict(host='a', port=1)),
+        AD(db=dict(host='b')),
+        AD(name='c'),
+    ]
+
+
+class TestCollectPath(object):
+    def test_collect(self, records):
+        assert collect_path(records, ('db', 'port')) == [1, None, None]
+
+    def test_default(self, records):
+        assert collect_path(records, ('db', 'port'), default=0) == [1, 0, 0]
+
+    def test_generator(self, records):
+        assert collect_path(iter(records), ('name',)) == [None, None, 'c']
+
+    def test_path_type_error(self, records):
+        with pytest.raises(PathTypeError) as exc_info:
+            collect_path(records, ('db', 'host', 'x'))
+        details = exc_info.value[1]
+        assert details['path'] == ('db',)
+        assert details['key'] == 'host'
+        assert details['full_path'] == ('db', 'host', 'x')
+
+    def test_path_checked(self, records):
+        with pytest.raises(ValueError):
+            collect_path(records, ())
+
+    def test_dtype(self, records):
+        numpy = pytest.importorskip('numpy')
+        column = collect_path(records, ('db', 'port'), default=0,
+                              dtype='int64')
+        assert isinstance(column, numpy.ndarray)
+        assert column.tolist() == [1, 0, 0]
+
+
+class TestCollectPaths(object):
+    def test_collect(self, records):
+        columns = collect_paths(
+            records, [('db', 'port'), ('db', 'host'), ('name',), ('db',)])
+        assert list(columns) == [
+            ('db', 'port'), ('db', 'host'), ('name',), ('db',)]
+        assert columns[('db', 'port')] == [1, None, None]
+        assert columns[('db', 'host')] == ['a', 'b', None]
+        assert columns[('name',)] == [None, None, 'c']
+        assert columns[('db',)] == [
+            AD(host='a', port=1), AD(host='b'), None]
+
+    def test_matches_collect_path(self, records):
+        paths = [('db', 'port'), ('db', 'host', 'x', 'y')]
+        records = [AD(db=dict(host=dict(x=dict(y=i)))) for i in range(3)]
+        columns = collect_paths(records, paths, default=-1)
+        for path in paths:
+            assert columns[path] == collect_path(records, path, default=-1)
+
+    def test_path_type_error(self, records):
+        with pytest.raises(PathTypeError) as exc_info:
+            collect_paths(records, [('db', 'host', 'x')])
+        assert exc_info.value[1]['path'] == ('db',)
+        assert exc_info.value[1]['key'] == 'host'
+
+
+class TestAssignPath(object):
+    def test_assign(self, records):
+        assign_path(records, ('db', 'port'), [10, 20, 30])
+        assert collect_path(records, ('db', 'port')) == [10, 20, 30]
+        assert records[2] == AD(name='c', db=AD(port=30))
+
+    def test_length_mismatch(self, records):
+        with pytest.raises(ValueError):
+            assign_path(records, ('db', 'port'), [1])
+
+    def test_path_type_error(self, records):
+        with pytest.raises(PathTypeError):
+            assign_path(records, ('db', 'host', 'x'), [1, 2, 3])
+
+    def test_nothing_assigned_on_error(self, records):
+        empty = [AD(), AD(), AD()]
+        with pytest.raises(ValueError):
+            assign_path(empty, ('x',), [1])
+        assert empty == [AD(), AD(), AD()]
+        with pytest.raises(PathTypeError):
+            assign_path(records + [AD(db=1)], ('db', 'port'), [10, 20, 30, 40])
+        assert collect_path(records, ('db', 'port')) == [1, None, None]
+        assert 'db' not in records[2]
+
+    def test_iterators(self, records):
+        assign_path(iter(records), ('db', 'port'), (i for i in [10, 20, 30]))
+        assert collect_path(records, ('db', 'port')) == [10, 20, 30]
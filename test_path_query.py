@@ -0,0 +1,90 @@
+import pytest
+
+from attrdict import AttrDict
+from path_query import ANY, ANY_DEPTH, Key, Query, compile_query
+
+AD = AttrDict
+
+
+@pytest.fixture
+def services():
+    return AD(services=dict(
+        web=dict(db=dict(port=5432, host='db1'), port=80),
+        api=dict(db=dict(port=6432)),
+        worker=dict(queue='q'),
+    ))
+
+
+def find(d, pattern):
+    return sorted(d.query(pattern))
+
+
+class TestQuery(object):
+    def test_exact(self, services):
+        assert find(services, ('services', 'web', 'port')) == [
+            (('services', 'web', 'port'), 80)]
+
+    def test_missing(self, services):
+        assert find(services, ('services', 'unknown')) == []
+
+    def test_any(self, services):
+        assert find(services, ('services', ANY, 'db', 'port')) == [
+            (('services', 'api', 'db', 'port'), 6432),
+            (('services', 'web', 'db', 'port'), 5432),
+        ]
+
+    def test_any_doesnt_descend_into_leaves(self, services):
+        assert find(services, ('services', ANY, ANY, 'x')) == []
+
+    def test_any_depth(self, services):
+        assert find(services, (ANY_DEPTH, 'port')) == [
+            (('services', 'api', 'db', 'port'), 6432),
+            (('services', 'web', 'db', 'port'), 5432),
+            (('services', 'web', 'port'), 80),
+        ]
+
+    def test_any_depth_matches_zero_keys(self):
+        assert find(AD(a=dict(b=1)), ('a', ANY_DEPTH, 'b')) == [(('a', 'b'), 1)]
+
+    def test_trailing_any_depth_matches_everything_below(self):
+        d = AD(a=dict(b=dict(c=1)))
+        assert [path for path, _ in find(d, ('a', ANY_DEPTH))] == [
+            ('a',), ('a', 'b'), ('a', 'b', 'c')]
+
+    def test_several_any_depth_dont_duplicate(self):
+        d = AD(a=dict(a=dict(a=1)))
+        assert find(d, (ANY_DEPTH, 'a', ANY_DEPTH, 'a')) == [
+            (('a', 'a'), AD(a=1)),
+            (('a', 'a', 'a'), 1),
+        ]
+
+    def test_predicate(self, services):
+        assert find(services, ('services', lambda key: key < 'w', 'db')) == [
+            (('services', 'api', 'db'), AD(port=6432))]
+
+    def test_literal_key(self):
+        d = AD({'*': 1, 'x': 2})
+        assert find(d, (Key('*'),)) == [(('*',), 1)]
+
+    def test_empty_pattern_matches_root(self, services):
+        assert find(services, ()) == [((), services)]
+
+    def test_lazy(self, services):
+        matches = services.query((ANY_DEPTH,))
+        next(matches)
+
+    def test_compiled_query(self, services):
+        query = Query(('services', ANY, 'port'))
+        assert find(services, query) == [(('services', 'web', 'port'), 80)]
+
+    def test_compile_query_cache(self):
+        pattern = ('a', ANY)
+        assert compile_query(pattern) is compile_query(pattern)
+
+    def test_pattern_not_a_sequence(self):
+        with pytest.raises(TypeError):
+            Query('a.b')
+
+    def test_unhashable_key(self):
+        with pytest.raises(TypeError):
+            Query(('a', []))
@@ -0,0 +1,125 @@
+import gc
+
+import pytest
+
+import path_tracer
+from attrdict import AttrDict, TypedAttrDict, DictDescriptor
+from path_tracer import pruned_copy, tracing
+
+AD = AttrDict
+
+
+@pytest.fixture(autouse=True)
+def clean_tracer():
+    yield
+    path_tracer.stop()
+
+
+@pytest.fixture
+def config():
+    return AD(
+        db=dict(host='localhost', port=5432, options=dict(ssl=True, timeout=1)),
+        cache=dict(ttl=60, servers=dict(a=1, b=2)),
+        debug=False,
+    )
+
+
+class TestTracing(object):
+    def test_disabled_by_default(self, config):
+        original = AttrDict.__dict__['__getitem__']
+        assert not path_tracer.is_tracing()
+        with tracing(config):
+            assert AttrDict.__dict__['__getitem__'] is not original
+        assert AttrDict.__dict__['__getitem__'] is original
+        assert not path_tracer.is_tracing()
+
+    def test_counts(self, config):
+        with tracing(config) as trace:
+            config.db.host
+            config['db']['port']
+            config.get_path(('db', 'host'))
+            config.get.cache.ttl()
+            config.get('missing')
+        assert trace.counts == {
+            ('db',): 3, ('db', 'host'): 2, ('db', 'port'): 1,
+            ('cache',): 1, ('cache', 'ttl'): 1}
+
+    def test_nodes_referenced_before(self, config):
+        options = config.db.options
+        with tracing(config) as trace:
+            options.ssl
+            config.db.options.timeout
+            options.ssl
+        assert trace.counts == {
+            ('db',): 1, ('db', 'options'): 1,
+            ('db', 'options', 'timeout'): 1, ('db', 'options', 'ssl'): 1}
+
+    def test_nodes_out_of_tree(self, config):
+        other = AD(a=dict(b=1))
+        with tracing(config) as trace:
+            other.a.b
+        assert trace.counts == {}
+
+    def test_new_nodes(self, config):
+        with tracing(config) as trace:
+            config.set_path(('new', 'key'), 1)
+            config.new.key
+        assert trace.counts[('new', 'key')] == 1
+
+    def test_bounded(self, config):
+        with tracing(config, max_paths=2) as trace:
+            config.db.host
+            config.db.port
+            config.db.host
+        assert trace.counts == {('db',): 3, ('db', 'host'): 2}
+        assert trace.dropped == 1
+
+    def test_typed_attrdict_counted_once(self):
+        class Tad(TypedAttrDict):
+            db = host = DictDescriptor()
+        tree = Tad(db=dict(host='h'))
+        with tracing(tree) as trace:
+            tree.db.host
+        assert trace.counts == {('db',): 1, ('db', 'host'): 1}
+
+    def test_dead_nodes_forgotten(self, config):
+        with tracing(config):
+            config.db.options.ssl
+            assert len(path_tracer._nodes) == 3
+            config.db = dict(host='x')
+            gc.collect()
+            # Only the root, the new db isn't read yet
+            assert len(path_tracer._nodes) == 1
+
+    def test_single_trace(self, config):
+        with tracing(config):
+            with pytest.raises(RuntimeError):
+                path_tracer.start(AD())
+
+
+class TestPrunedCopy(object):
+    def test_only_read_paths(self, config):
+        with tracing(config) as trace:
+            config.db.host
+            config.cache.servers
+        assert pruned_copy(trace) == AD(
+            db=AD(host='localhost'), cache=AD(servers=AD(a=1, b=2)))
+
+    def test_removed_paths_skipped(self, config):
+        with tracing(config) as trace:
+            config.db.host
+            config.debug
+        del config.db
+        assert pruned_copy(trace) == AD(debug=False)
+
+    def test_copy_is_independent(self, config):
+        with tracing(config) as trace:
+            config.cache.servers
+        pruned = pruned_copy(trace)
+        pruned.cache.servers.a = 10
+        assert config.cache.servers.a == 1
+
+    def test_active_trace(self, config):
+        with tracing(config) as trace:
+            with pytest.raises(RuntimeError):
+                pruned_copy(trace)
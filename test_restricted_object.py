@@ -0,0 +1,38 @@
+import pytest
+
+from restricted_object import create_restricted_object_cls
+
+# _access_violation itself has to be looked up
+ALLOW_ACCESS = ['__setattr__', '__getattribute__']
+
+
+def test_methods_raise_type_error():
+    obj = create_restricted_object_cls(ALLOW_ACCESS)()
+    with pytest.raises(TypeError) as exc_info:
+        len(obj)
+    assert exc_info.value[0] == '__len__'
+
+
+def test_dont_override_methods():
+    cls = create_restricted_object_cls(ALLOW_ACCESS + ['__add__'])
+    assert '__add__' not in cls.__dict__
+    with pytest.raises(TypeError):
+        cls()[0]
+
+
+def test_slots_is_not_a_real_slots_declaration():
+    obj = create_restricted_object_cls(ALLOW_ACCESS)()
+    obj.attribute = 1
+    assert obj.attribute == 1
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        create_restricted_object_cls(['__unknown__'])
+
+
+def test_classes_are_cached():
+    assert (create_restricted_object_cls(['__add__', '__sub__']) is
+            create_restricted_object_cls(('__sub__', '__add__')))
+    assert (create_restricted_object_cls(['__add__']) is not
+            create_restricted_object_cls(['__sub__']))
@@ -0,0 +1,100 @@
+import pytest
+
+from attrdict import AttrDict, PathKeyError, merge
+from shared_keys_attrdict import SharedKeysAttrDict, get_layout
+
+AD = AttrDict
+SKD = SharedKeysAttrDict
+
+
+@pytest.fixture
+def nodes():
+    return [SKD(host='h%d' % i, port=i, db=dict(name='n')) for i in range(3)]
+
+
+class TestSharedKeysAttrDict(object):
+    def test_equals_attrdict(self, nodes):
+        assert nodes[1] == AD(host='h1', port=1, db=AD(name='n'))
+
+    def test_layout_is_shared(self, nodes):
+        assert nodes[0]._layout is nodes[1]._layout
+        assert nodes[0].db._layout is nodes[1].db._layout
+        assert isinstance(nodes[0]._values, list)
+
+    def test_layout_by_key_set(self):
+        assert get_layout(['a', 'b']) is get_layout(('b', 'a'))
+
+    def test_layout_by_key_types(self):
+        assert get_layout([u'a']) is not get_layout(['a'])
+        unicode_node = SKD({u'name': 1, True: 'b'})
+        node = SKD({'name': 2, 1: 'c'})
+        assert sorted(map(type, node)) == [int, str]
+        assert sorted(map(type, unicode_node)) == [bool, unicode]
+
+    def test_change_existing_key_stays_shared(self, nodes):
+        layout = nodes[0]._layout
+        nodes[0].port = 10
+        assert nodes[0]._layout is layout
+        assert nodes[0].port == 10
+        assert nodes[1].port == 1
+
+    def test_add_key_switches_to_private_dict(self, nodes):
+        nodes[0].user = 'u'
+        assert nodes[0]._layout is None
+        assert nodes[0] == AD(host='h0', port=0, db=AD(name='n'), user='u')
+        assert nodes[1]._layout is not None
+        assert 'user' not in nodes[1]
+
+    def test_delete_key_switches_to_private_dict(self, nodes):
+        del nodes[0].host
+        assert nodes[0]._layout is None
+        assert sorted(nodes[0]) == ['db', 'port']
+        assert sorted(nodes[1]) == ['db', 'host', 'port']
+
+    def test_missing_key(self, nodes):
+        with pytest.raises(KeyError):
+            nodes[0]['unknown']
+        with pytest.raises(AttributeError):
+            nodes[0].unknown
+        assert 'unknown' not in nodes[0]
+
+    def test_len(self, nodes):
+        assert len(nodes[0]) == 3
+        nodes[0].user = 'u'
+        assert len(nodes[0]) == 4
+
+    def test_path_methods(self, nodes):
+        nodes[0].set_path(('db', 'name'), 'x')
+        assert nodes[0].get_path(('db', 'name')) == 'x'
+        nodes[0].set_path(('a', 'b'), 1)
+        assert nodes[0].a.b == 1
+        assert nodes[0].pop_path(('a', 'b')) == 1
+        assert nodes[0].has_path(('db', 'name'))
+        assert nodes[1].db.name == 'n'
+
+    def test_transaction_stays_shared(self, nodes):
+        with nodes[0].transaction() as tx:
+            tx.set(('port',), 10)
+            tx.set(('db', 'name'), 'x')
+        assert nodes[0]._layout is not None
+        assert nodes[0].db._layout is not None
+        assert nodes[0] == AD(host='h0', port=10, db=AD(name='x'))
+
+    def test_transaction_rollback(self, nodes):
+        with pytest.raises(PathKeyError):
+            with nodes[0].transaction() as tx:
+                tx.set(('port',), 10)
+                tx.pop(('missing',))
+        assert nodes[0]._layout is not None
+        assert nodes[0].port == 0
+
+    def test_magic_syntax(self, nodes):
+        nodes[0].set.db.name = 'x'
+        assert nodes[0].get.db.name() == 'x'
+
+    def test_merge(self, nodes):
+        assert merge(nodes[0], dict(db=dict(user='u'))) == \
+            AD(host='h0', port=0, db=AD(name='n', user='u'))
+
+    def test_repr(self):
+        assert repr(SKD(a=1)) == "SharedKeysAttrDict({'a': 1})"
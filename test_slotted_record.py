@@ -0,0 +1,98 @@
+import gc
+
+import pytest
+
+from attrdict import (
+    AttrDict, TypedAttrDict, DictDescriptor, ComputedField, PathKeyError)
+from memory_report import deep_sizeof
+from slotted_record import SlottedRecord, declared_fields, record_class
+
+AD = AttrDict
+
+
+class _Upper(DictDescriptor):
+    def __dictget__(self, dct, key):
+        return super(_Upper, self).__dictget__(dct, key).upper()
+
+
+class Config(TypedAttrDict):
+    host = port = db = name = DictDescriptor()
+    user = _Upper()
+    url = ComputedField(
+        lambda dct: '%s:%s' % (dct.host, dct.port), depends_on=['host', 'port'])
+
+
+ConfigRecord = record_class(Config)
+
+
+def _has_instance_dict(obj):
+    # Reading obj.__dict__ would create it
+    return any(type(referent) is dict for referent in gc.get_referents(obj))
+
+
+class TestSlottedRecord(object):
+    def test_class(self):
+        assert record_class(Config) is ConfigRecord
+        assert issubclass(ConfigRecord, (Config, SlottedRecord))
+        assert ConfigRecord.__name__ == 'ConfigRecord'
+        assert declared_fields(Config) == ['db', 'host', 'name', 'port', 'user']
+
+    def test_mapping_interface(self):
+        record = ConfigRecord(host='h', db=dict(name='n'))
+        assert record == AD(host='h', db=AD(name='n'))
+        assert record['host'] == record.host == 'h'
+        assert sorted(record) == ['db', 'host']
+        assert len(record) == 2
+        assert 'port' not in record
+        assert record.get('port') is None
+        assert isinstance(record.db, ConfigRecord)
+        assert repr(record) == "ConfigRecord({'db': ConfigRecord({'name': 'n'}), 'host': 'h'})"
+
+    def test_no_storage_dicts(self):
+        record = ConfigRecord(host='h', port=1, db=dict(name='n'))
+        record.port = 2
+        assert not _has_instance_dict(record)
+        assert not _has_instance_dict(record.db)
+        assert deep_sizeof(record) < deep_sizeof(Config(record))
+        assert not _has_instance_dict(record)
+
+    def test_undeclared_key(self):
+        record = ConfigRecord()
+        with pytest.raises(KeyError):
+            record['other'] = 1
+        with pytest.raises(KeyError):
+            del record['host']
+        with pytest.raises(AttributeError):
+            record.host
+
+    def test_hooks(self):
+        record = ConfigRecord(user='ann')
+        assert record.user == 'ANN'
+        assert record._raw_getitem('user') == 'ann'
+
+    def test_computed_field(self):
+        record = ConfigRecord(host='h', port=1)
+        assert record.url == 'h:1'
+        record.port = 2
+        assert record.url == 'h:2'
+        with pytest.raises(TypeError):
+            record.url = 'x'
+
+    def test_path_methods(self):
+        record = ConfigRecord()
+        record.set_path(('db', 'name'), 'n')
+        assert record.get_path(('db', 'name')) == 'n'
+        assert record.db.name == 'n'
+        assert record.pop_path(('db', 'name')) == 'n'
+        assert record.db == AD()
+        with pytest.raises(PathKeyError):
+            record.get_path(('host', 'name'))
+
+    def test_transaction_rollback(self):
+        record = ConfigRecord(host='h')
+        with pytest.raises(PathKeyError):
+            with record.transaction() as tx:
+                tx.set(('port',), 1)
+                tx.pop(('host',))
+                tx.pop(('name',))
+        assert record == AD(host='h')
@@ -0,0 +1,157 @@
+import collections
+import threading
+
+import pytest
+
+from attrdict import AttrDict, PathTypeError
+from snapshot_attrdict import (
+    FrozenAttrDict, CopyOnWriteAttrDict, SnapshotAttrDict, freeze
+)
+
+AD = AttrDict
+Point = collections.namedtuple('Point', 'x y')
+
+
+@pytest.fixture
+def holder():
+    return SnapshotAttrDict(
+        db=dict(host='localhost', port=5432),
+        cache=dict(ttl=dict(default=10)),
+    )
+
+
+class TestFrozenAttrDict(object):
+    def test_equals_source(self):
+        assert FrozenAttrDict(a=1, b=dict(c=2)) == AD(a=1, b=AD(c=2))
+
+    def test_nested_are_frozen(self):
+        assert isinstance(FrozenAttrDict(b=dict(c=2)).b, FrozenAttrDict)
+
+    @pytest.mark.parametrize('mutate', [
+        lambda x: x.__setitem__('a', 2),
+        lambda x: x.__delitem__('a'),
+        lambda x: setattr(x, 'a', 2),
+        lambda x: x.set_path(('b', 'c'), 3),
+        lambda x: x.set_path(('new', 'c'), 3),
+        lambda x: x.b.__setitem__('c', 3),
+    ])
+    def test_immutable(self, mutate):
+        frozen = FrozenAttrDict(a=1, b=dict(c=2))
+        with pytest.raises(TypeError):
+            mutate(frozen)
+        assert frozen == AD(a=1, b=AD(c=2))
+
+    def test_frozen_subtrees_are_shared(self):
+        inner = FrozenAttrDict(c=2)
+        assert FrozenAttrDict(b=inner).b is inner
+
+    def test_freeze_leaves_values_alone(self):
+        assert freeze(1) == 1
+
+    def test_freeze_containers(self):
+        frozen = FrozenAttrDict(a=[1, [2, dict(b=3)]], s=set([4]))
+        assert frozen.a == (1, (2, AD(b=3)))
+        assert isinstance(frozen.a[1][1], FrozenAttrDict)
+        assert frozen.s == frozenset([4])
+
+    def test_freeze_keeps_tuple_subclasses(self):
+        point = Point(1, 2)
+        holder = SnapshotAttrDict(p=point)
+        holder.set_path(('other',), 1)
+        assert holder.snapshot().p is point
+
+
+class TestCopyOnWriteAttrDict(object):
+    def test_untouched_children_stay_shared(self):
+        frozen = FrozenAttrDict(a=dict(x=1), b=dict(y=2))
+        draft = CopyOnWriteAttrDict._from_frozen(frozen)
+        draft.set_path(('a', 'x'), 5)
+        result = freeze(draft)
+        assert result == AD(a=AD(x=5), b=AD(y=2))
+        assert result.b is frozen.b
+        assert frozen.a.x == 1
+
+    def test_reads_dont_copy(self):
+        frozen = FrozenAttrDict(a=dict(b=dict(c=1)))
+        draft = CopyOnWriteAttrDict._from_frozen(frozen)
+        assert draft.a.b.c == 1
+        assert draft._dict['a'] is frozen.a
+        assert freeze(draft.a) is frozen.a
+
+    def test_write_through_views(self):
+        frozen = FrozenAttrDict(a=dict(b=dict(c=1)), d=dict(e=2))
+        draft = CopyOnWriteAttrDict._from_frozen(frozen)
+        b = draft.a.b
+        b.c = 5
+        del draft.d.e
+        assert draft == AD(a=AD(b=AD(c=5)), d=AD())
+        assert frozen == AD(a=AD(b=AD(c=1)), d=AD(e=2))
+        assert freeze(draft).a.b.c == 5
+
+
+class TestSnapshotAttrDict(object):
+    def test_snapshot_is_frozen(self, holder):
+        assert isinstance(holder.snapshot(), FrozenAttrDict)
+
+    def test_set_path_publishes_new_snapshot(self, holder):
+        old = holder.snapshot()
+        holder.set_path(('db', 'port'), 6432)
+        new = holder.snapshot()
+        assert old.db.port == 5432
+        assert new.db.port == 6432
+        assert new.cache is old.cache
+
+    def test_pop_path(self, holder):
+        assert holder.pop_path(('db', 'host')) == 'localhost'
+        assert holder.snapshot().db == AD(port=5432)
+
+    def test_pop_path_default(self, holder):
+        old = holder.snapshot()
+        assert holder.pop_path(('db', 'unknown'), 42) == 42
+        assert holder.snapshot() == old
+
+    def test_inplace_merge(self, holder):
+        holder.inplace_merge(dict(cache=dict(ttl=dict(users=5))))
+        assert holder.snapshot().cache.ttl == AD(default=10, users=5)
+        assert holder.snapshot().db.port == 5432
+
+    def test_draft_leaves_dont_change_snapshot(self):
+        holder = SnapshotAttrDict(tags=['a'])
+        old = holder.snapshot()
+        tags = ['b']
+        with holder.update() as draft:
+            with pytest.raises(AttributeError):
+                draft.tags.append('c')
+            draft.hosts = tags
+        tags.append('c')
+        assert old.tags == ('a',)
+        assert holder.snapshot().hosts == ('b',)
+
+    def test_update_is_atomic(self, holder):
+        old = holder.snapshot()
+        with pytest.raises(PathTypeError):
+            with holder.update() as draft:
+                draft.set_path(('db', 'user'), 'admin')
+                draft.set_path(('db', 'port', 'x'), 1)
+        assert holder.snapshot() is old
+        assert 'user' not in holder.snapshot().db
+
+    def test_concurrent_readers_see_consistent_snapshots(self, holder):
+        errors = []
+
+        def read():
+            for _ in range(2000):
+                snapshot = holder.snapshot()
+                if snapshot.db.port != snapshot.cache.ttl.default + 5422:
+                    errors.append(snapshot)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for i in range(200):
+            with holder.update() as draft:
+                draft.set_path(('db', 'port'), 5432 + i)
+                draft.set_path(('cache', 'ttl', 'default'), 10 + i)
+        for reader in readers:
+            reader.join()
+        assert errors == []
@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+import sorted_attrdict
+from attrdict import AttrDict, PathKeyError
+from sorted_attrdict import SortedAttrDict
+
+AD = AttrDict
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(sorted_attrdict, '_BLOCK_SIZE', 2)
+
+
+@pytest.fixture
+def users(small_blocks):
+    keys = ['user:%d:%s' % (i, field) for i in (1, 4, 42, 420)
+            for field in ('age', 'name')]
+    random.Random(0).shuffle(keys)
+    return SortedAttrDict((key, i) for i, key in enumerate(keys))
+
+
+class TestSortedAttrDict(object):
+    def test_iteration_is_sorted(self, users):
+        assert list(users) == sorted(users._dict)
+        assert users.keys() == sorted(users._dict)
+        assert len(users._blocks) > 1
+
+    def test_equals_attrdict(self):
+        assert SortedAttrDict(b=1, a=dict(c=2)) == AD(a=AD(c=2), b=1)
+        assert isinstance(SortedAttrDict(a=dict(c=2)).a, SortedAttrDict)
+
+    def test_repr_is_sorted(self):
+        assert repr(SortedAttrDict(b=1, a=2)) == "SortedAttrDict({'a': 2, 'b': 1})"
+
+    def test_iprefix(self, users):
+        assert list(users.iprefix('user:42:')) == ['user:42:age', 'user:42:name']
+        assert list(users.iprefix('user:4')) == [
+            'user:420:age', 'user:420:name', 'user:42:age', 'user:42:name',
+            'user:4:age', 'user:4:name']
+        assert list(users.iprefix('other')) == []
+
+    def test_iprefix_tuple_keys(self):
+        d = SortedAttrDict({(1, 2): 'a', (1, 3): 'b', (2, 1): 'c', 5: 'd'})
+        assert list(d.iprefix((1,))) == [(1, 2), (1, 3)]
+
+    @pytest.mark.parametrize('args,kwargs,expected', [
+        ((), {}, range(20)),
+        ((5, 8), {}, [5, 6, 7]),
+        ((5, 8), dict(inclusive=(False, True)), [6, 7, 8]),
+        ((5.5,), {}, range(6, 20)),
+        ((), dict(high=3), [0, 1, 2]),
+        ((30,), {}, []),
+    ])
+    def test_irange(self, small_blocks, args, kwargs, expected):
+        keys = range(20)
+        random.Random(1).shuffle(keys)
+        d = SortedAttrDict((key, None) for key in keys)
+        assert list(d.irange(*args, **kwargs)) == expected
+
+    def test_delete_keeps_order(self, users):
+        for key in list(users.iprefix('user:4')):
+            del users[key]
+        assert list(users) == ['user:1:age', 'user:1:name']
+        assert [block for block in users._blocks if not block] == []
+        users['user:0:x'] = 1
+        assert list(users)[0] == 'user:0:x'
+
+    def test_path_methods(self, small_blocks):
+        d = SortedAttrDict()
+        d.set_path(('b', 'y'), 1)
+        d.set_path(('b', 'x'), 2)
+        d.setdefault_path(('a',), 3)
+        assert list(d) == ['a', 'b']
+        assert list(d.b) == ['x', 'y']
+        assert d.pop_path(('b', 'x')) == 2
+        assert list(d.b) == ['y']
+
+    def test_transaction_rollback(self):
+        d = SortedAttrDict(a=1)
+        with pytest.raises(PathKeyError):
+            with d.transaction() as tx:
+                tx.set(('b', 'c'), 1)
+                tx.pop(('a',))
+                tx.pop(('unknown',))
+        assert list(d) == ['a']
+        assert d == AD(a=1)
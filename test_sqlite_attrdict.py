@@ -0,0 +1,143 @@
+import collections
+
+import pytest
+
+from attrdict import AttrDict, MergeError, PathKeyError, inplace_merge, merge
+from sqlite_attrdict import SqliteAttrDict
+
+AD = AttrDict
+
+
+@pytest.fixture
+def filename(tmpdir):
+    return str(tmpdir.join('tree.db'))
+
+
+@pytest.fixture
+def tree(filename):
+    return SqliteAttrDict(filename, dict(
+        db=dict(host='localhost', port=5432), debug=False))
+
+
+def _rows(tree):
+    return tree._store.connection.execute('SELECT COUNT(*) FROM nodes').fetchone()[0]
+
+
+class TestSqliteAttrDict(object):
+    def test_equals_attrdict(self, tree):
+        assert tree == AD(db=AD(host='localhost', port=5432), debug=False)
+        assert isinstance(tree.db, SqliteAttrDict)
+        assert tree.db.port == 5432
+        assert sorted(tree) == ['db', 'debug']
+        assert len(tree.db) == 2
+        assert 'db' in tree and 'other' not in tree
+
+    def test_persistent(self, tree, filename):
+        tree.set_path(('db', 'user'), 'u')
+        tree.close()
+        reopened = SqliteAttrDict(filename)
+        assert reopened.get_path(('db', 'user')) == 'u'
+        assert reopened.db == AD(host='localhost', port=5432, user='u')
+
+    def test_path_methods(self, tree):
+        tree.set_path(('a', 'b', 'c'), 1)
+        assert tree.get_path(('a', 'b', 'c')) == 1
+        assert tree.setdefault_path(('a', 'b', 'c'), 2) == 1
+        assert tree.pop_path(('a', 'b', 'c')) == 1
+        assert tree.a == AD(b=AD())
+        assert tree.has_path(('db', 'host'))
+        with pytest.raises(PathKeyError):
+            tree.get_path(('x', 'y'))
+
+    def test_replaced_mapping_removes_subtree(self, tree):
+        rows = _rows(tree)
+        tree.db = 1
+        assert _rows(tree) == rows - 2
+        tree.debug = dict(level=dict(value=1))
+        assert tree.get_path(('debug', 'level', 'value')) == 1
+        del tree.debug
+        assert _rows(tree) == rows - 3
+
+    def test_set_own_subtree(self, tree):
+        tree.db = tree.db
+        tree.other = tree.db
+        assert tree.other == tree.db
+        tree.db = tree.db
+        tree['db'] = dict(inner=tree.db)
+        assert tree.db == AD(inner=AD(host='localhost', port=5432))
+
+    def test_lru_is_bounded(self, filename):
+        tree = SqliteAttrDict(filename, cache_size=10)
+        tree.update(('k%d' % i, dict(v=i)) for i in range(100))
+        assert [tree['k%d' % i].v for i in range(100)] == range(100)
+        assert len(tree._store.lru) == 10
+
+    def test_cache_follows_writes(self, tree):
+        assert tree.db.host == 'localhost'
+        tree.db.host = 'remote'
+        assert tree.db.host == 'remote'
+        tree.db = dict(host='other')
+        assert tree.db.host == 'other'
+
+    def test_batch_rollback(self, tree):
+        with pytest.raises(ValueError):
+            with tree.batch():
+                tree.db.host = 'remote'
+                tree.new = dict(a=1)
+                raise ValueError
+        assert tree == AD(db=AD(host='localhost', port=5432), debug=False)
+
+    def test_failed_transaction_in_batch(self, tree, filename):
+        with tree.batch():
+            tree.debug = True
+            with pytest.raises(PathKeyError):
+                with tree.transaction() as tx:
+                    tx.set(('a', 'b'), 1)
+                    tx.pop(('missing', 'x'))
+        tree.close()
+        assert SqliteAttrDict(filename) == AD(
+            db=AD(host='localhost', port=5432), debug=True)
+
+    def test_inplace_merge(self, tree):
+        inplace_merge(tree, dict(db=dict(port=6432), cache=dict(ttl=1)))
+        assert tree == AD(db=AD(host='localhost', port=6432), debug=False,
+                          cache=AD(ttl=1))
+
+    def test_inplace_merge_is_atomic(self, tree):
+        with pytest.raises(MergeError):
+            inplace_merge(tree, collections.OrderedDict([('x', 1), ('db', 5)]))
+        assert 'x' not in tree
+
+    @pytest.mark.parametrize('do_merge', [
+        lambda tree, other: tree._merge(other),
+        merge,
+    ])
+    def test_merge_is_in_memory(self, tree, do_merge):
+        result = do_merge(tree, dict(db=dict(port=1)))
+        assert type(result) is AD
+        assert type(result.db) is AD
+        assert result.db == AD(host='localhost', port=1)
+        assert tree.db.port == 5432
+
+    def test_transaction(self, tree, filename):
+        with tree.transaction() as tx:
+            tx.set(('db', 'port'), 6432)
+            tx.set(('cache', 'ttl'), 1)
+            tx.pop(('debug',))
+        assert tx.results == [None, None, False]
+        tree.close()
+        assert SqliteAttrDict(filename) == AD(
+            db=AD(host='localhost', port=6432), cache=AD(ttl=1))
+
+    def test_transaction_rollback(self, tree):
+        with pytest.raises(PathKeyError):
+            with tree.transaction() as tx:
+                tx.set(('db', 'port'), 6432)
+                tx.set(('cache', 'ttl'), 1)
+                tx.pop(('missing',))
+        assert tree == AD(db=AD(host='localhost', port=5432), debug=False)
+
+    def test_keys_and_leaves_are_pickled(self, tree):
+        tree[(1, 'a')] = [1, 2]
+        assert tree[(1, 'a')] == [1, 2]
+        assert repr(tree.db).startswith('SqliteAttrDict({')